@@ -47,25 +47,9 @@ if [ ! -f ".env" ]; then
     fi
 fi
 
-# 7. systemd 서비스 파일 생성
+# 7. systemd 서비스 파일 설치 (저장소의 .devops/ec2/ai-epub-api.service를 그대로 사용)
 echo "🔧 systemd 서비스 설정 중..."
-sudo bash -c "cat > /etc/systemd/system/ai-epub-api.service" << 'EOF'
-[Unit]
-Description=AI EPUB API Service
-After=network.target
-
-[Service]
-Type=simple
-User=ubuntu
-WorkingDirectory=/home/ubuntu/ai-epub-api
-Environment="PATH=/home/ubuntu/ai-epub-api/venv/bin"
-ExecStart=/home/ubuntu/ai-epub-api/venv/bin/gunicorn -c gunicorn.conf.py app:app
-Restart=always
-RestartSec=3
-
-[Install]
-WantedBy=multi-user.target
-EOF
+sudo cp .devops/ec2/ai-epub-api.service /etc/systemd/system/ai-epub-api.service
 
 # 8. systemd 서비스 활성화
 echo "🚀 서비스 활성화 중..."
@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 import time
 import logging
+from typing import Optional
 from fastapi import FastAPI, Request, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
+import orjson
 import uvicorn
 
 from app.domain.models import InspectRequest, InspectResponse
@@ -22,11 +24,13 @@ from app.dependencies import (
     get_llm_client,
     get_start_point_detector,
     get_db_logger,
+    get_decision_cache,
 )
 from app.application.shared.pipeline import UndrmPipeline
 from app.application.shared.services import EbookAnalyzer
 from app.infrastructure.llm.openai_client import LlmClient
 from app.application.find_start_point.services import StartPointDetector
+from app.application.find_start_point.decision_cache import DecisionCache
 from app.domain.interfaces import ILogger
 from app.lifespan import lifespan
 
@@ -47,37 +51,34 @@ app = FastAPI(
 )
 
 # --- Exception Handlers ---
-@app.exception_handler(UnsupportedPurposeError)
-async def unsupported_purpose_handler(req: Request, exc: UnsupportedPurposeError):
-    return JSONResponse(status_code=400, content={"detail": str(exc)})
+# 예외 타입 → (HTTP 상태 코드, detail 템플릿, 원본 메시지를 "error" 필드로 포함할지 여부)
+EXC_MAP = {
+    UnsupportedPurposeError: (400, "{exc}", False),
+    MissingTocError: (422, "처리할 수 없는 EPUB 파일입니다: {exc}", False),
+    EpubFileNotFoundError: (404, "{exc}", False),
+    EpubParsingError: (422, "처리할 수 없는 EPUB 파일입니다: {exc}", False),
+    DrmDecryptionError: (500, "내부 처리 오류 (복호화): {exc}", False),
+    LlmApiError: (503, "외부 서비스(LLM) 오류: {exc}", False),
+    ExternalServiceError: (503, "외부 서비스 종속성 오류가 발생했습니다.", True),
+    ServerConfigurationError: (500, "서버 설정 오류: {exc}", False),
+}
 
-@app.exception_handler(MissingTocError)
-async def missing_toc_handler(req: Request, exc: MissingTocError):
-    return JSONResponse(status_code=422, content={"detail": f"처리할 수 없는 EPUB 파일입니다: {exc}"})
+async def app_error_handler(req: Request, exc: Exception):
+    """EXC_MAP에 등록된 애플리케이션 예외를 하나의 핸들러에서 테이블 조회로 응답으로 변환합니다."""
+    # 하위 클래스 예외도 처리되도록 MRO 순서로 조회합니다. (Starlette의 핸들러 선택 규칙과 동일)
+    for exc_type in type(exc).__mro__:
+        cfg = EXC_MAP.get(exc_type)
+        if cfg is not None:
+            break
+    status_code, template, include_error = cfg
+    content = {"detail": template.format(exc=exc)}
+    if include_error:
+        content["error"] = str(exc)
+    # response_model이 없는 dict 응답이므로 orjson으로 직접 직렬화합니다. (표준 json 대비 2~3배 빠름)
+    return Response(content=orjson.dumps(content), status_code=status_code, media_type="application/json")
 
-@app.exception_handler(EpubFileNotFoundError)
-async def epub_not_found_handler(req: Request, exc: EpubFileNotFoundError):
-    return JSONResponse(status_code=404, content={"detail": str(exc)})
-
-@app.exception_handler(EpubParsingError)
-async def epub_parsing_handler(req: Request, exc: EpubParsingError):
-    return JSONResponse(status_code=422, content={"detail": f"처리할 수 없는 EPUB 파일입니다: {exc}"})
-
-@app.exception_handler(DrmDecryptionError)
-async def drm_decryption_handler(req: Request, exc: DrmDecryptionError):
-    return JSONResponse(status_code=500, content={"detail": f"내부 처리 오류 (복호화): {exc}"})
-
-@app.exception_handler(LlmApiError)
-async def llm_api_handler(req: Request, exc: LlmApiError):
-    return JSONResponse(status_code=503, content={"detail": f"외부 서비스(LLM) 오류: {exc}"})
-
-@app.exception_handler(ExternalServiceError)
-async def external_service_handler(req: Request, exc: ExternalServiceError):
-    return JSONResponse(status_code=503, content={"detail": "외부 서비스 종속성 오류가 발생했습니다.", "error": str(exc)})
-
-@app.exception_handler(ServerConfigurationError)
-async def server_config_handler(req: Request, exc: ServerConfigurationError):
-    return JSONResponse(status_code=500, content={"detail": f"서버 설정 오류: {exc}"})
+for _exc_type in EXC_MAP:
+    app.add_exception_handler(_exc_type, app_error_handler)
 
 # --- API Endpoint ---
 @app.post("/v1/epub/inspect", response_model=InspectResponse)
@@ -88,6 +89,7 @@ async def inspect_epub(
     detector: StartPointDetector = Depends(get_start_point_detector),
     db_logger: ILogger = Depends(get_db_logger),
     pipeline: UndrmPipeline = Depends(UndrmPipeline),
+    decision_cache: Optional[DecisionCache] = Depends(get_decision_cache),
 ):
     start_time = time.time()
     logger.info(f"'{request.purpose}' 목적의 inspect 요청 수신: {request.s3_bucket}/{request.s3_key}")
@@ -104,6 +106,7 @@ async def inspect_epub(
             detector=detector,
             db_logger=db_logger,
             pipeline=pipeline,
+            decision_cache=decision_cache,
         )
     else:
         raise UnsupportedPurposeError(f"지원하지 않는 목적입니다: '{request.purpose}'")
@@ -1,36 +1,55 @@
 # -*- coding: utf-8 -*-
+import io
 import logging
+import asyncio
 from typing import List
-import io
-import zipfile
-from app.core.epub_parser import EpubParser
+from app.core.epub_parser import EpubParser, ZipReader
+from app.core.fast_zip import open_zip
 from app.infrastructure.llm.openai_client import LlmClient
 
 logger = logging.getLogger(__name__)
 
+# 동시에 읽기/텍스트 변환을 진행할 챕터 수 (최대 메모리와 병렬성의 균형)
+_CHAPTER_BATCH = 8
+
 class HashtagExtractor:
     """EPUB 본문에서 LLM을 사용하여 해시태그를 추출합니다."""
     def __init__(self, parser: EpubParser, llm_client: LlmClient):
         self._parser = parser
         self._llm_client = llm_client
 
+    def _spine_paths(self, zf: ZipReader) -> List[str]:
+        """ZIP에서 본문(spine) 파일 경로들을 읽기 순서대로 반환합니다."""
+        return self._parser.load_spine_info(zf).text_files
+
     async def extract_async(self, decrypted_epub: bytes) -> List[str]:
         """EPUB의 전체 텍스트를 추출하고 LLM을 호출하여 해시태그를 생성합니다."""
         logger.info("해시태그 추출을 위한 전체 텍스트 추출을 시작합니다...")
-        
-        full_text = []
-        epub_buffer = io.BytesIO(decrypted_epub)
-        with zipfile.ZipFile(epub_buffer, "r") as zf:
-            opf_path = self._parser._find_opf_path(zf)
-            manifest, (spine_ids, _) = self._parser._parse_opf_bytes(self._parser._zip_read(zf, opf_path))
-            
-            text_files = self._parser.get_text_files_from_spine(opf_path, manifest, spine_ids)
-            for file_path in text_files:
-                content_bytes = self._parser._zip_read(zf, file_path)
-                plain_text = self._parser.get_plain_text(content_bytes)
-                full_text.append(plain_text)
-        
-        combined_text = " ".join(full_text)
+
+        # 챕터를 _CHAPTER_BATCH개씩 스레드풀에서 읽기+변환하고, 결과를 순서대로 하나의 버퍼에 이어 붙입니다.
+        # 전체 원본 바이트/텍스트 리스트를 동시에 들고 있지 않으므로 최대 메모리가 책 한 권 분량으로 줄어듭니다.
+        zf = await asyncio.to_thread(open_zip, memoryview(decrypted_epub))
+        try:
+            text_files = await asyncio.to_thread(self._spine_paths, zf)
+            buf = io.StringIO()
+            for start in range(0, len(text_files), _CHAPTER_BATCH):
+                # 배치 안의 작업이 모두 끝난 뒤에 zf를 닫을 수 있도록 예외도 결과로 모은 다음 다시 발생시킵니다.
+                texts = await asyncio.gather(
+                    *(asyncio.to_thread(self._parser.read_plain_text, zf, file_path)
+                      for file_path in text_files[start:start + _CHAPTER_BATCH]),
+                    return_exceptions=True,
+                )
+                for i, text in enumerate(texts, start):
+                    if isinstance(text, BaseException):
+                        raise text
+                    if i:
+                        buf.write(" ")
+                    buf.write(text)
+                del texts
+        finally:
+            zf.close()
+
+        combined_text = buf.getvalue()
         logger.info(f"총 {len(combined_text)}자의 텍스트를 추출했습니다.")
 
         # TODO: LlmClient에 해시태그 추출을 위한 별도의 메서드(예: generate_hashtags)를 만들고 호출해야 합니다.
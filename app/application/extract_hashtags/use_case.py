@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import logging
-from datetime import datetime, timezone
 
+from app.core.buffer_utils import wipe_buffer
 from app.domain.interfaces import ILogger
 from app.application.shared.pipeline import UndrmPipeline
 from .services import HashtagExtractor
@@ -29,31 +29,23 @@ async def extract_hashtags(
         reason="extract_hashtags"
     )
     
-    event_id = pipeline_output.event_id
-    decrypted_epub = None
+    log_entry = pipeline_output.log_entry
+    event_id = log_entry.event_id
+    decrypted_epub = pipeline_output.decrypted_epub
 
     try:
-        decrypted_epub = pipeline_output.decrypted_epub
-        
         hashtags = await extractor.extract_async(decrypted_epub)
         
-        await db_logger.update_log(
-            event_id=event_id, 
-            status="SUCCESS", 
-            end_time=datetime.now(timezone.utc).isoformat()
-        )
+        # 성공 시 감사 로그는 최종 상태로 한 번만 기록합니다.
+        await db_logger.create_log(log_entry.finished("SUCCESS"))
         
         return {"hashtags": hashtags}
 
     except Exception as e:
-        await db_logger.update_log(
-            event_id=event_id, 
-            status="FAILURE", 
-            end_time=datetime.now(timezone.utc).isoformat(),
-            failure_reason=str(e)
-        )
+        await db_logger.create_log(log_entry.finished("FAILURE", failure_reason=str(e)))
         raise e
     finally:
-        if decrypted_epub:
-            del decrypted_epub
-            logger.info(f"[{event_id}] 복호화된 EPUB 데이터가 메모리에서 해제되었습니다.")
+        # pipeline_output이 같은 객체를 계속 참조하므로 del만으로는 해제되지 않습니다.
+        # bytearray를 0으로 덮어쓰고 비워 복호화된 데이터를 즉시 메모리에서 지웁니다.
+        wipe_buffer(decrypted_epub)
+        logger.info(f"[{event_id}] 복호화된 EPUB 데이터가 메모리에서 해제되었습니다.")
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+'본문 시작점 찾기' 결과(DecideOutput)를 (itemId, 옵션, EPUB 내용 해시)별로 보관하는 메모리 캐시입니다.
+
+같은 책을 다시 검사하는 요청은 EPUB 분석과 LLM 호출을 모두 건너뛰고 캐시된 결정을 그대로 반환합니다.
+키에 복호화된 EPUB의 내용 해시가 포함되므로, 같은 itemId라도 파일이 교체되면 자동으로 캐시를 빗나갑니다.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.domain.models import DecideOutput
+
+# xxh3는 수 MB 버퍼를 1ms 이내에 해시합니다. 설치되지 않은 경우 blake2b로 대체합니다.
+try:
+    import xxhash
+    XXHASH_INSTALLED = True
+except ImportError:
+    XXHASH_INSTALLED = False
+
+DecisionKey = Tuple[str, bool, str]
+
+
+def content_digest(data: bytes) -> str:
+    """복호화된 EPUB 바이트의 내용 해시(16진수 문자열)를 반환합니다."""
+    if XXHASH_INSTALLED:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class DecisionCache:
+    """
+    TTL과 최대 크기를 갖는 LRU 캐시입니다.
+    이벤트 루프 단일 스레드에서만 접근하므로 별도 잠금 없이 사용합니다.
+    """
+    def __init__(self, maxsize: int = 4096, ttl: float = 7 * 24 * 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[DecisionKey, Tuple[float, DecideOutput]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(item_id: str, use_full_toc_analysis: bool, decrypted_epub: bytes) -> DecisionKey:
+        """LLM 프롬프트가 달라지는 분석 옵션까지 포함하여 캐시 키를 만듭니다."""
+        return (item_id, use_full_toc_analysis, content_digest(decrypted_epub))
+
+    def get(self, key: DecisionKey) -> Optional[DecideOutput]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, decision = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return decision
+
+    def put(self, key: DecisionKey, decision: DecideOutput) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, decision)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
@@ -14,11 +14,12 @@ class StartPointDetector:
         llm_candidate = decide_input.llm
 
         # ── anchor 정규화: 앞의 '#' 제거, 빈 문자열이면 None
+        # (LlmCandidate.anchor는 Optional[str]로 검증되므로 타입 검사는 생략합니다)
         anchor = llm_candidate.anchor
-        if isinstance(anchor, str):
-            anchor = anchor.lstrip('#')  # 맨 앞(연속) '#' 제거
-            if anchor == "":
-                anchor = None
+        if anchor and anchor[0] == '#':
+            anchor = anchor.lstrip('#')  # '#'로 시작할 때만 맨 앞(연속) '#' 제거 → 일반적인 경우 새 문자열 할당 없음
+        if not anchor:
+            anchor = None
 
         logger.info(f"LLM 추천을 최종 시작점으로 채택: {llm_candidate.file}")
         return DecideOutput(
@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import logging
-from datetime import datetime, timezone
+from typing import Optional
 
 from app.domain.models import LlmInput, DecideInput, UndrmPipelineOutput
 from app.core.exceptions import ServerConfigurationError
+from app.core.buffer_utils import wipe_buffer
 from app.infrastructure.llm.openai_client import LlmClient
 from app.domain.interfaces import ILogger
 from app.application.shared.services import EbookAnalyzer
 from .services import StartPointDetector
+from .decision_cache import DecisionCache
 from app.application.shared.pipeline import UndrmPipeline
 
 logger = logging.getLogger(__name__)
@@ -23,10 +26,12 @@ async def find_start_point(
     detector: StartPointDetector,
     db_logger: ILogger,
     pipeline: UndrmPipeline,
+    decision_cache: Optional[DecisionCache] = None,
 ) -> dict:
     """
     '본문 시작점 찾기' 유스케이스.
     복호화 파이프라인을 실행하고, 분석 및 LLM 추론을 통해 시작점을 결정합니다.
+    decision_cache가 주어지면 같은 책(itemId + 내용 해시)에 대한 이전 결정을 재사용하여 분석과 LLM 호출을 건너뜁니다.
     """
     pipeline_output = await pipeline.run(
         s3_bucket=s3_bucket,
@@ -36,12 +41,22 @@ async def find_start_point(
         reason="find_start_point"
     )
     
-    event_id = pipeline_output.event_id
-    decrypted_epub = None  # Ensure decrypted_epub is defined
+    log_entry = pipeline_output.log_entry
+    event_id = log_entry.event_id
+    decrypted_epub = pipeline_output.decrypted_epub
 
     try:
-        decrypted_epub = pipeline_output.decrypted_epub
-        
+        cache_key = None
+        if decision_cache is not None:
+            cache_key = await asyncio.to_thread(
+                DecisionCache.make_key, itemId, use_full_toc_analysis, decrypted_epub
+            )
+            cached = decision_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"[{event_id}] 캐시된 시작점 결정을 사용합니다. (분석/LLM 호출 생략)")
+                await db_logger.create_log(log_entry.finished("SUCCESS"))
+                return {"start_point": cached.model_dump()}
+
         analysis = await analyzer.analyze_async(decrypted_epub)
 
         if not llm_client.llm:
@@ -53,27 +68,20 @@ async def find_start_point(
         decision = detector.decide(DecideInput(
             toc=analysis.toc, file_char_counts=analysis.file_char_counts, llm=llm_candidate
         ))
+        if cache_key is not None:
+            decision_cache.put(cache_key, decision)
         
-        # Log success before returning
-        await db_logger.update_log(
-            event_id=event_id, 
-            status="SUCCESS", 
-            end_time=datetime.now(timezone.utc).isoformat()
-        )
+        # Log success before returning (성공 시 감사 로그는 최종 상태로 한 번만 기록)
+        await db_logger.create_log(log_entry.finished("SUCCESS"))
         
         return {"start_point": decision.model_dump()}
 
     except Exception as e:
         # Log failure and re-raise
-        await db_logger.update_log(
-            event_id=event_id, 
-            status="FAILURE", 
-            end_time=datetime.now(timezone.utc).isoformat(),
-            failure_reason=str(e)
-        )
+        await db_logger.create_log(log_entry.finished("FAILURE", failure_reason=str(e)))
         raise e
     finally:
-        # Always clean up the decrypted data
-        if decrypted_epub:
-            del decrypted_epub
-            logger.info(f"[{event_id}] 복호화된 EPUB 데이터가 메모리에서 해제되었습니다.")
+        # pipeline_output이 같은 객체를 계속 참조하므로 del만으로는 해제되지 않습니다.
+        # bytearray를 0으로 덮어쓰고 비워 복호화된 데이터를 즉시 메모리에서 지웁니다.
+        wipe_buffer(decrypted_epub)
+        logger.info(f"[{event_id}] 복호화된 EPUB 데이터가 메모리에서 해제되었습니다.")
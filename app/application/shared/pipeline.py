@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import logging
-from datetime import datetime, timezone
+import asyncio
+from app.core.time_utils import utc_iso_now
+from app.core.buffer_utils import wipe_buffer
 from fastapi import Depends
 
 from app.domain.models import UndrmInput, UndrmLog, UndrmPipelineOutput
@@ -30,11 +32,21 @@ class UndrmPipeline:
     ) -> UndrmPipelineOutput:
         """
         공통 복호화 파이프라인.
-        S3에서 EPUB을 가져와 복호화하고, 처리 상태 로그를 생성합니다.
+        S3에서 EPUB을 가져와 복호화합니다.
+        성공 시에는 감사 로그를 기록하지 않고 로그 항목만 만들어 반환하며,
+        유스케이스가 최종 결과를 채워 한 번만 기록합니다. (실패 시에는 여기서 FAILURE를 기록합니다)
         """
-        encrypted_epub = await self.s3_client.get_object_bytes(bucket=s3_bucket, key=s3_key)
-        license_key = await self.license_service.get_license(itemId)
-        
+        # S3 다운로드와 라이선스 조회는 서로 의존하지 않으므로 동시에 수행합니다.
+        # 예외는 기존 순차 실행과 동일하게 S3 → 라이선스 순서로 우선하여 전파합니다.
+        encrypted_epub, license_key = await asyncio.gather(
+            self.s3_client.get_object_bytes(bucket=s3_bucket, key=s3_key),
+            self.license_service.get_license(itemId),
+            return_exceptions=True,
+        )
+        for result in (encrypted_epub, license_key):
+            if isinstance(result, BaseException):
+                raise result
+
         if not license_key:
             raise DrmDecryptionError(f"'{itemId}'에 대한 라이선스 키를 찾을 수 없습니다.")
 
@@ -44,27 +56,29 @@ class UndrmPipeline:
             tenant_id=tenant_id
         )
         
-        start_time = datetime.now(timezone.utc)
-        event_id = None
+        start_time = utc_iso_now()
         try:
             output = await self.undrm_adapter.decrypt_async(undrm_input)
-            
+            # 암호화된 원본은 더 이상 쓰지 않으므로 바로 지웁니다. (DRM이 없는 EPUB은 원본을 그대로 반환하므로 제외)
+            if output.decrypted_epub is not encrypted_epub:
+                wipe_buffer(encrypted_epub)
+
             log_entry = UndrmLog(
                 tenant_id=tenant_id, itemId=itemId, grant_id="N/A",
                 s3_bucket=s3_bucket, s3_key=s3_key, 
                 reason=reason, status="PROCESSING", drm_type=output.drm_type,
-                undrm_start_time=start_time.isoformat(), undrm_end_time=None
+                undrm_start_time=start_time, undrm_end_time=None
             )
-            event_id = await self.db_logger.create_log(log_entry)
-            
-            return UndrmPipelineOutput(decrypted_epub=output.decrypted_epub, event_id=event_id)
+            return UndrmPipelineOutput(decrypted_epub=output.decrypted_epub, log_entry=log_entry)
 
         except Exception as e:
+            # 키가 교체되었을 수 있으므로 캐시된 라이선스를 버리고 다음 요청에서 다시 조회합니다.
+            self.license_service.invalidate(itemId)
             log_entry = UndrmLog(
                 tenant_id=tenant_id, itemId=itemId, grant_id="N/A",
                 s3_bucket=s3_bucket, s3_key=s3_key,
                 reason=reason, status="FAILURE", failure_reason=str(e),
-                undrm_start_time=start_time.isoformat(), undrm_end_time=datetime.now(timezone.utc).isoformat()
+                undrm_start_time=start_time, undrm_end_time=utc_iso_now()
             )
             await self.db_logger.create_log(log_entry)
             raise DrmDecryptionError(f"EPUB 복호화 파이프라인 실패: {e}")
\ No newline at end of file
@@ -1,44 +1,85 @@
 # -*- coding: utf-8 -*-
 import logging
-import io
-import zipfile
 import asyncio
+from typing import List, Tuple
 
-from app.domain.models import AnalyzeOutput, FileCharStat
-from app.core.epub_parser import EpubParser
+from app.domain.models import AnalyzeOutput, FileCharStat, TocItem
+from app.core.epub_parser import EpubParser, ZipReader
+from app.core.fast_zip import open_zip
 from app.domain.errors import MissingTocError
 
 logger = logging.getLogger(__name__)
 
+# 책 한 권이 동시에 점유할 수 있는 스레드풀 작업 수 상한.
+# 큰 책 하나가 기본 스레드풀을 모두 차지해 다른 요청이 대기(head-of-line blocking)하지 않도록 제한합니다.
+_PER_BOOK_CONCURRENCY = 8
+
 class EbookAnalyzer:
     """EPUB 파일을 분석하여 구조화된 메타데이터를 추출하는 서비스입니다."""
     def __init__(self, parser: EpubParser):
         self._parser = parser
 
+    def _load_toc(self, zf: ZipReader) -> Tuple[List[TocItem], List[str], int]:
+        """
+        ZIP에서 목차와 본문(spine) 파일 경로 목록을 읽어옵니다.
+
+        Returns:
+            tuple: (목차, 본문 파일 경로 리스트, 전체 파일 수)
+        """
+        # OPF 파싱/본문 목록은 같은 EPUB이면 캐시에서 재사용됩니다.
+        spine = self._parser.load_spine_info(zf)
+        toc = self._parser.get_toc_from_stream(zf, spine.opf_path, spine.manifest, spine.spine_props)
+
+        # 비즈니스 규칙: 목차(TOC)가 없는 EPUB은 처리하지 않음
+        if not toc:
+            raise MissingTocError("EPUB 파일에 목차(TOC) 정보가 존재하지 않아 처리를 중단합니다.")
+
+        return toc, spine.text_files, len(zf.namelist())
+
+    def _count_chars(self, zf: ZipReader, file_path: str) -> int:
+        """본문 파일 하나의 순수 텍스트 글자 수를 계산합니다. 변환된 텍스트는 바로 버려집니다."""
+        return len(self._parser.read_plain_text(zf, file_path))
+
+    def _build_output(self, toc: List[TocItem], text_files: List[str], char_counts: List[int], file_count: int) -> AnalyzeOutput:
+        file_char_counts = [
+            FileCharStat(path=file_path, chars=chars, has_text=True)
+            for file_path, chars in zip(text_files, char_counts)
+        ]
+        logger.info(f"분석 완료: TOC {len(toc)}개, 텍스트 파일 {len(file_char_counts)}개")
+        return AnalyzeOutput(file_char_counts=file_char_counts, toc=toc, meta={"file_count": file_count})
+
     def analyze(self, decrypted_epub: bytes) -> AnalyzeOutput:
         """EPUB 바이트를 분석하여 목차, 파일 통계 등을 반환합니다."""
         logger.info("EPUB 파일 분석을 시작합니다...")
-        epub_buffer = io.BytesIO(decrypted_epub)
-        with zipfile.ZipFile(epub_buffer, "r") as zf:
-            opf_path = self._parser._find_opf_path(zf)
-            opf_bytes = self._parser._zip_read(zf, opf_path)
-            manifest, (spine_ids, spine_props) = self._parser._parse_opf_bytes(opf_bytes)
-            toc = self._parser.get_toc_from_stream(zf, opf_path, manifest, spine_props)
-
-            # 비즈니스 규칙: 목차(TOC)가 없는 EPUB은 처리하지 않음
-            if not toc:
-                raise MissingTocError("EPUB 파일에 목차(TOC) 정보가 존재하지 않아 처리를 중단합니다.")
-
-            text_files = self._parser.get_text_files_from_spine(opf_path, manifest, spine_ids)
-            file_char_counts = [
-                FileCharStat(path=file_path, chars=len(self._parser.get_plain_text(self._parser._zip_read(zf, file_path))), has_text=True)
-                for file_path in text_files
-            ]
-        logger.info(f"분석 완료: TOC {len(toc)}개, 텍스트 파일 {len(file_char_counts)}개")
-        return AnalyzeOutput(file_char_counts=file_char_counts, toc=toc, meta={"file_count": len(zf.infolist())})
+        # BytesIO 복사 없이 memoryview로 직접 참조하며, 중앙 디렉토리는 한 번만 인덱싱됩니다.
+        with open_zip(memoryview(decrypted_epub)) as zf:
+            toc, text_files, file_count = self._load_toc(zf)
+            char_counts = [self._count_chars(zf, file_path) for file_path in text_files]
+        return self._build_output(toc, text_files, char_counts, file_count)
 
     async def analyze_async(self, decrypted_epub: bytes) -> AnalyzeOutput:
         """
-        동기적인 analyze 메서드를 별도의 스레드에서 실행하여 비동기적으로 호출합니다.
+        analyze의 비동기 버전입니다.
+        본문 파일마다 (ZIP 읽기 → HTML→텍스트 변환)을 하나의 스레드풀 작업으로 처리하고,
+        책 한 권당 동시 작업 수를 _PER_BOOK_CONCURRENCY로 제한하여 다른 요청과 스레드풀을 나눠 씁니다.
         """
-        return await asyncio.to_thread(self.analyze, decrypted_epub)
+        logger.info("EPUB 파일 분석을 시작합니다...")
+        zf = await asyncio.to_thread(open_zip, memoryview(decrypted_epub))
+        try:
+            toc, text_files, file_count = await asyncio.to_thread(self._load_toc, zf)
+
+            sem = asyncio.Semaphore(_PER_BOOK_CONCURRENCY)
+
+            async def count_chars(file_path: str) -> int:
+                async with sem:
+                    return await asyncio.to_thread(self._count_chars, zf, file_path)
+
+            # 모든 작업이 끝난 뒤에 zf를 닫을 수 있도록 예외도 결과로 모은 다음 다시 발생시킵니다.
+            results = await asyncio.gather(*(count_chars(p) for p in text_files), return_exceptions=True)
+        finally:
+            zf.close()
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return self._build_output(toc, text_files, results, file_count)
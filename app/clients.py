@@ -3,7 +3,32 @@
 애플리케이션 전체에서 공유될 클라이언트 인스턴스를 저장하는 중앙 저장소입니다.
 lifespan 이벤트를 통해 앱 시작 시 여기에 클라이언트가 채워집니다.
 """
-from typing import Dict, Any
+from dataclasses import dataclass, fields
+from typing import Any
 
-# 싱글턴 클라이언트 인스턴스를 보관할 딕셔너리
-clients: Dict[str, Any] = {}
+
+@dataclass(slots=True)
+class Clients:
+    """
+    싱글턴 클라이언트 인스턴스 보관소입니다.
+    요청마다 읽히므로 딕셔너리 대신 slots 속성으로 두어 문자열 키 해시/탐색 없이 접근합니다.
+    초기화되지 않은 항목은 None입니다.
+    """
+    boto_session: Any = None
+    s3_client: Any = None
+    kms_client: Any = None
+    dynamodb_client: Any = None
+    db_engine: Any = None
+    openai_client: Any = None
+    chat_llm: Any = None
+    license_cache: Any = None
+    decision_cache: Any = None
+
+    def clear(self) -> None:
+        """모든 항목을 None으로 되돌립니다. (lifespan 종료 시 호출)"""
+        for f in fields(self):
+            setattr(self, f.name, None)
+
+
+# 싱글턴 클라이언트 인스턴스
+CLIENTS = Clients()
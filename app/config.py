@@ -10,6 +10,7 @@
 import os
 import json
 import logging
+from functools import lru_cache
 from dotenv import load_dotenv
 import boto3
 from botocore.exceptions import ClientError
@@ -48,16 +49,21 @@ class Config:
                 os.environ["LANGSMITH_TRACING_V2"] = "true"
             logging.info(f"LangSmith 트레이싱이 활성화되었습니다. (프로젝트: {self.LANGSMITH_PROJECT})")
 
+        # DRM 및 분석용 스레드풀 크기 (.env에서 로드)
+        self.EPUB_THREADS = int(os.getenv("EPUB_THREADS", str(max(10, (os.cpu_count() or 2) * 3))))
+
         # AWS 설정 (.env에서 로드)
         self.AWS_PROFILE_NAME           = os.getenv("AWS_PROFILE_NAME")
         self.AWS_REGION                 = os.getenv("AWS_REGION", "ap-northeast-2")
         self.KMS_KEY_ID                 = os.getenv("KMS_KEY_ID")
 
         # AWS 설정 : S3 (.env에서 로드)
-        self.S3_MAX_POOL        = int(os.getenv("S3_MAX_POOL", "128"))
+        self.S3_MAX_POOL        = int(os.getenv("S3_MAX_POOL", "256"))
         self.S3_MAX_ATTEMPTS    = int(os.getenv("S3_MAX_ATTEMPTS", "8"))
         self.S3_CONNECT_TIMEOUT = int(os.getenv("S3_CONNECT_TIMEOUT", "5"))
         self.S3_READ_TIMEOUT    = int(os.getenv("S3_READ_TIMEOUT", "120"))
+        self.S3_PARALLEL_READS  = int(os.getenv("S3_PARALLEL_READS", "16"))
+        self.S3_MIN_PART_SIZE   = int(os.getenv("S3_MIN_PART_SIZE", str(1024 * 1024)))
 
         # AWS 설정 : DDB (.env에서 로드)
         self.DDB_MAX_POOL           = int(os.getenv("DDB_MAX_POOL", "64"))
@@ -73,9 +79,17 @@ class Config:
             self.DYNAMODB_LOG_TABLE_NAME = secrets.get("DYNAMODB_LOG", "ai-epub-api-undrm-logs")
 
         # DB엔진 설정 (.env에서 로드)
+        # MySQL/MariaDB는 동시 요청 100 이상에서 풀 25~50 정도가 적정합니다. (DB의 max_connections와 함께 조정)
         self.DB_POOL_SIZE       = int(os.getenv("DB_POOL_SIZE", "10"))
         self.DB_MAX_OVERFLOW    = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+        self.DB_POOL_TIMEOUT    = int(os.getenv("DB_POOL_TIMEOUT", "2"))
         self.DB_POOL_RECYCLE    = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+        self.DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "3"))
+        self.DB_POOL_PRE_PING   = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+        # pre_ping을 끈 경우, 풀에서 이 초 이상 쉬었던 커넥션만 체크아웃 시 핑합니다. (0 이하면 핑하지 않음)
+        self.DB_POOL_PING_IDLE  = float(os.getenv("DB_POOL_PING_IDLE", "300"))
+        # 시작 시 DB_POOL_SIZE개의 커넥션을 미리 열어 둘지 여부
+        self.DB_POOL_PREWARM    = os.getenv("DB_POOL_PREWARM", "true").lower() in ("1", "true", "yes")
 
         # 데이터베이스 설정
         # 로컬: .env에서 DB_CONNECTION_STRING 직접 사용
@@ -99,6 +113,14 @@ class Config:
             self.DB_DATABASE_NAME = db_database
             self.DB_TABLE_NAME = secrets.get("DB_TABLE") or os.getenv("DB_TABLE_NAME", "license_keys")
 
+        # 라이선스 캐시 설정 (.env에서 로드)
+        self.LICENSE_CACHE_MAXSIZE  = int(os.getenv("LICENSE_CACHE_MAXSIZE", "4096"))
+        self.LICENSE_CACHE_TTL      = int(os.getenv("LICENSE_CACHE_TTL", "900"))
+
+        # 시작점 결정 캐시 설정 (.env에서 로드, 기본 TTL 7일)
+        self.DECISION_CACHE_MAXSIZE = int(os.getenv("DECISION_CACHE_MAXSIZE", "4096"))
+        self.DECISION_CACHE_TTL     = int(os.getenv("DECISION_CACHE_TTL", "604800"))
+
         # LLM 프롬프트 로딩
         self._load_prompts()
 
@@ -167,8 +189,16 @@ class Config:
             logging.error(f"프롬프트 파일 로딩 중 오류 발생: {e}")
 
 # --- 설정 인스턴스 제공자 ---
+@lru_cache(maxsize=1)
 def get_config() -> Config:
     """
-    Config 클래스의 새 인스턴스를 반환합니다.
+    프로세스 전체에서 공유하는 Config 싱글톤을 반환합니다.
+    Config 생성은 .env 로드, Secrets Manager 호출, 프롬프트 파싱을 수반하므로 최초 1회만 수행합니다.
     """
-    return Config()
\ No newline at end of file
+    return Config()
+
+
+def reload_config() -> Config:
+    """캐시된 Config를 버리고 새로 로드합니다. (테스트나 환경 변수 변경 후 사용)"""
+    get_config.cache_clear()
+    return get_config()
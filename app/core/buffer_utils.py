@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+복호화된 EPUB처럼 민감한 바이트 버퍼를 다 쓴 뒤 정리하는 유틸리티입니다.
+
+`del`은 참조 하나를 없앨 뿐이라, 다른 객체(DTO, memoryview 등)가 같은 버퍼를 참조하고 있으면
+내용이 그대로 메모리에 남습니다. 여기서는 bytearray 내용을 제자리에서 0으로 덮어쓴 뒤 비웁니다.
+"""
+import ctypes
+from typing import Union
+
+
+def wipe_buffer(buf: Union[bytearray, bytes, None]) -> bool:
+    """
+    bytearray의 내용을 0으로 덮어쓰고 메모리를 해제합니다.
+
+    bytes는 불변이므로 건드리지 않고 False를 반환합니다.
+    아직 해제되지 않은 memoryview가 남아 있으면 0으로 덮어쓰기만 하고, 메모리 해제는 GC에 맡깁니다.
+
+    Returns:
+        bool: 내용을 0으로 덮어썼으면 True
+    """
+    if not isinstance(buf, bytearray) or not buf:
+        return False
+    n = len(buf)
+    view = (ctypes.c_char * n).from_buffer(buf)
+    ctypes.memset(view, 0, n)
+    # ctypes 배열도 버퍼를 참조하므로 clear() 전에 먼저 놓아 줍니다.
+    del view
+    try:
+        buf.clear()
+    except BufferError:
+        pass
+    return True
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+stdout 로그를 요청 스레드에서 바로 쓰지 않고 모아서 쓰는 로깅 핸들러입니다.
+
+`accesslog = "-"`처럼 stdout으로 로그를 내보내면 요청마다 이벤트 루프 스레드에서 write(2)가 일어납니다.
+`BufferedLogHandler`는 레코드를 큐에 넣기만 하고, 백그라운드 스레드가 MemoryHandler에 모았다가
+일정 건수가 차거나, ERROR 이상이 오거나, 마지막으로 쓴 뒤 flush_interval초가 지나면 한 번에 씁니다.
+(nginx의 `access_log ... buffer=32k flush=5s`와 같은 방식: 로그가 끊이지 않아도 버퍼에 flush_interval초 넘게 머물지 않습니다)
+
+gunicorn은 마스터에서 로깅을 설정한 뒤 워커를 fork하는데, 스레드는 fork되지 않으므로
+자식 프로세스에서는 큐와 백그라운드 스레드를 자동으로 새로 만듭니다.
+"""
+import logging
+import os
+import queue
+import sys
+import time
+import weakref
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+from typing import Optional, TextIO
+
+_handlers: "weakref.WeakSet[BufferedLogHandler]" = weakref.WeakSet()
+
+
+class _IntervalFlushListener(QueueListener):
+    """마지막으로 버퍼를 비운 뒤 flush_interval초가 지나면 새 로그가 계속 들어와도 버퍼를 비우는 QueueListener입니다."""
+    def __init__(self, log_queue: queue.Queue, buffer: MemoryHandler, flush_interval: float):
+        super().__init__(log_queue, buffer, respect_handler_level=True)
+        self.buffer = buffer
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+
+    def _flush(self) -> None:
+        self.buffer.flush()
+        self._last_flush = time.monotonic()
+
+    def _flush_due(self) -> bool:
+        return time.monotonic() - self._last_flush >= self.flush_interval
+
+    def dequeue(self, block: bool):
+        while True:
+            # 새 로그를 기다리는 시간도 다음 flush 시각까지로 제한합니다.
+            timeout = max(self._last_flush + self.flush_interval - time.monotonic(), 0.0)
+            try:
+                return self.queue.get(block, timeout)
+            except queue.Empty:
+                self._flush()
+
+    def handle(self, record: logging.LogRecord) -> None:
+        super().handle(record)
+        if self._flush_due():
+            self._flush()
+
+
+class BufferedLogHandler(QueueHandler):
+    """
+    레코드를 호출 스레드에서 포맷만 하고 큐에 넣은 뒤, 백그라운드 스레드가 묶어서 stream에 씁니다.
+    logging.config.dictConfig의 "()" 팩토리로 지정할 수 있습니다.
+    """
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        capacity: int = 8192,
+        flush_interval: float = 5.0,
+        flush_level: int = logging.ERROR,
+    ):
+        super().__init__(queue.SimpleQueue())
+        target = logging.StreamHandler(stream or sys.stdout)
+        # 메시지는 QueueHandler.prepare()에서 이미 포맷되어 전달됩니다.
+        target.setFormatter(logging.Formatter("%(message)s"))
+        self.buffer = MemoryHandler(capacity, flushLevel=flush_level, target=target, flushOnClose=True)
+        self.flush_interval = flush_interval
+        self.listener: Optional[_IntervalFlushListener] = None
+        self._start()
+        _handlers.add(self)
+
+    def _start(self) -> None:
+        self.listener = _IntervalFlushListener(self.queue, self.buffer, self.flush_interval)
+        self.listener.start()
+
+    def stop(self) -> None:
+        """백그라운드 스레드를 멈추고 남은 로그를 모두 씁니다."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        self.buffer.flush()
+
+    def close(self) -> None:
+        self.stop()
+        super().close()
+
+    def _after_fork_in_child(self) -> None:
+        # 부모의 큐와 버퍼에 남은 레코드는 부모가 쓰므로 버리고, 자식 전용 큐/스레드로 다시 시작합니다.
+        self.queue = queue.SimpleQueue()
+        self.buffer.buffer.clear()
+        self._start()
+
+
+def stop_buffered_logging() -> None:
+    """이 프로세스의 모든 BufferedLogHandler를 멈추고 버퍼를 비웁니다. (프로세스 종료 직전 호출)"""
+    for handler in list(_handlers):
+        handler.stop()
+
+
+def _restart_after_fork() -> None:
+    for handler in list(_handlers):
+        if handler.listener is not None:
+            handler._after_fork_in_child()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
@@ -9,25 +9,98 @@ import posixpath
 import re
 import urllib.parse
 import logging
-from typing import Any, Dict, List
-from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Union
+from bs4 import BeautifulSoup
 from lxml import etree
-import warnings
 from app.domain.models import TocItem
-
-# BeautifulSoup이 XHTML을 HTML 파서로 처리할 때 발생하는 경고를 무시합니다.
-# EPUB 내 XHTML은 XML에 가깝지만, HTML 파서로도 대부분 안정적으로 처리 가능합니다.
-warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+from app.core.fast_zip import FastZip
+
+# selectolax(lexbor)는 C 레벨에서 HTML 트리 구성과 텍스트 추출을 처리하므로 BeautifulSoup보다 훨씬 빠릅니다.
+# 설치되지 않은 환경에서는 lxml 경로로 폴백합니다.
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_INSTALLED = True
+except ImportError:
+    LexborHTMLParser = None
+    SELECTOLAX_INSTALLED = False
+
+# 본문 텍스트 추출용 lxml HTML 파서와 XPath (selectolax 폴백 경로). 매 호출마다 다시 만들지 않도록 모듈 단위로 재사용합니다.
+# EPUB 내 XHTML은 XML에 가깝지만, 복구 모드의 HTML 파서로도 대부분 안정적으로 처리 가능합니다.
+_HTML_PARSER = etree.HTMLParser(recover=True, huge_tree=False)
+_XP_TEXT_NODES = etree.XPath("//text()")
+_XML_DECL_ENCODING = re.compile(rb"""^\s*<\?xml[^>]*?encoding\s*=\s*["']([A-Za-z0-9._-]+)["']""")
+_html_parsers_by_encoding: Dict[str, "etree.HTMLParser"] = {}
+
+# 목차(nav.xhtml) 파싱용 XML 파서. 다소 깨진 XHTML도 처리할 수 있도록 복구 모드를 사용합니다.
+_XML_RECOVER_PARSER = etree.XMLParser(recover=True)
+_EPUB_TYPE_ATTR = "{http://www.idpf.org/2007/ops}type"
+
+# container.xml / OPF / NCX 파싱에 쓰이는 XPath를 한 번만 컴파일해 두고 재사용합니다.
+_CONTAINER_NS = {"c": "urn:oasis:names:tc:opendocument:xmlns:container"}
+_OPF_NAMESPACE = "http://www.idpf.org/2007/opf"
+_OPF_NS = {"opf": _OPF_NAMESPACE}
+_NCX_NS = {"ncx": "http://www.daisy.org/z3986/2005/ncx/"}
+_XP_ROOTFILE = etree.XPath("string(.//c:rootfile/@full-path)", namespaces=_CONTAINER_NS)
+_XP_MANIFEST_ITEMS = etree.XPath(".//opf:manifest/opf:item", namespaces=_OPF_NS)
+_XP_ITEMREF = etree.XPath("opf:itemref", namespaces=_OPF_NS)
+_XP_NAVMAP = etree.XPath(".//ncx:navMap", namespaces=_NCX_NS)
+_XP_STRING_VALUE = etree.XPath("string()")
+_NCX_NAVPOINT_TAG = "{http://www.daisy.org/z3986/2005/ncx/}navPoint"
+_NCX_NAVLABEL_TAG = "{http://www.daisy.org/z3986/2005/ncx/}navLabel"
+_NCX_TEXT_TAG = "{http://www.daisy.org/z3986/2005/ncx/}text"
+_NCX_CONTENT_TAG = "{http://www.daisy.org/z3986/2005/ncx/}content"
+
+
+def _html_parser_for(content: bytes) -> "etree.HTMLParser":
+    """
+    문서의 인코딩에 맞는 HTML 파서를 반환합니다.
+    libxml2의 HTML 파서는 BOM과 <meta charset>만 인식하고 XML 선언의 encoding은 무시하며,
+    아무 선언이 없으면 Latin-1로 해석합니다. 따라서 XML 선언의 인코딩(없으면 EPUB 기본값인 UTF-8)을 명시한 파서를 사용합니다.
+    """
+    if content.startswith((b"\xef\xbb\xbf", b"\xff\xfe", b"\xfe\xff")) or b"charset" in content[:1024].lower():
+        return _HTML_PARSER
+    m = _XML_DECL_ENCODING.match(content)
+    encoding = m.group(1).decode("ascii").lower() if m else "utf-8"
+    parser = _html_parsers_by_encoding.get(encoding)
+    if parser is None:
+        try:
+            parser = etree.HTMLParser(recover=True, huge_tree=False, encoding=encoding)
+        except LookupError:
+            return _HTML_PARSER
+        _html_parsers_by_encoding[encoding] = parser
+    return parser
 
 logger = logging.getLogger(__name__)
 
+# 파서가 읽기 대상으로 받는 ZIP 핸들 (표준 zipfile 또는 memoryview 기반 FastZip)
+ZipReader = Union[zipfile.ZipFile, FastZip]
+
+
+class SpineInfo(NamedTuple):
+    """OPF 파싱 결과와 본문 파일 목록입니다. 캐시에서 공유되므로 읽기 전용으로 다뤄야 합니다."""
+    opf_path: str
+    manifest: Dict[str, Dict[str, str]]
+    spine_ids: List[str]
+    spine_props: Dict[str, Any]
+    text_files: List[str]
+
+
+# 같은 EPUB을 반복 분석할 때(재시도, 전체/축약 TOC 분석 등) OPF 파싱을 건너뛰기 위한 LRU 캐시
+# 키: FastZip.fingerprint (중앙 디렉토리 해시). 분석은 스레드풀에서 실행되므로 잠금으로 보호합니다.
+_SPINE_CACHE_MAXSIZE = 256
+_spine_cache: "OrderedDict[bytes, SpineInfo]" = OrderedDict()
+_spine_cache_lock = threading.Lock()
+
 class EpubParser:
     """
     EPUB 컨테이너(ZIP)를 파싱하여 목차, 파일 목록, 텍스트 콘텐츠 등을 추출하는 유틸리티 클래스입니다.
     EPUB 2와 EPUB 3 표준의 주요 차이점(특히 목차 파일)을 모두 처리할 수 있습니다.
     """
     # 본문이 아닐 가능성이 높은 파일을 식별하기 위한 키워드 (정규표현식, 대소문자 무시)
-    DEFAULT_EXCLUDE_PATTERNS = tuple(re.compile(p, re.I) for p in ("cover", "toc", "copyright", "nav"))
+    # 키워드들을 하나의 정규식으로 합쳐, spine 항목마다 문자열을 한 번만 검사합니다.
+    _EXCLUDE_RE = re.compile(r"(?:cover|toc|copyright|nav)", re.I)
 
     def _normalize_zip_path(self, path: str) -> str:
         """
@@ -43,11 +116,22 @@ class EpubParser:
             str: 표준 형식으로 변환된 경로 문자열.
         """
         if not path: return path
+        # 대부분의 경로(manifest href, ZIP 엔트리 이름)는 이미 정규화되어 있으므로 변환 없이 그대로 반환합니다.
+        if self._is_plain_path(path): return path
         # URL 디코딩 및 경로 구분자 통일
         normalized_path = urllib.parse.unquote(path).replace("\\", "/")
         # 상대 경로 해석 (예: 'OEBPS/../Text/chapter1.xhtml' -> 'Text/chapter1.xhtml')
         return posixpath.normpath(normalized_path)
 
+    @staticmethod
+    def _is_plain_path(path: str) -> bool:
+        """URL 인코딩, 역슬래시, 빈 세그먼트('//', 끝의 '/'), '.'/'..' 세그먼트가 없어 정규화가 필요 없는 경로인지 확인합니다."""
+        return not (
+            "%" in path or "\\" in path or "//" in path or path.endswith("/")
+            or path in (".", "..") or path.startswith(("./", "../"))
+            or "/./" in path or "/../" in path or path.endswith(("/.", "/.."))
+        )
+
     def _resolve_href(self, base_dir: str, href: str) -> str:
         """
         베이스 디렉토리와 href(앵커 포함 가능)를 조합하여 정규화된 전체 경로를 생성합니다.
@@ -56,10 +140,12 @@ class EpubParser:
         if not href:
             return self._normalize_zip_path(base_dir)
 
-        path_part, fragment = href, ""
-        if "#" in path_part:
-            path_part, fragment = path_part.split("#", 1)
-            fragment = "#" + fragment
+        # 앵커가 없는 대부분의 href는 분할/문자열 재조합 없이 그대로 사용합니다.
+        idx = href.find("#")
+        if idx < 0:
+            path_part, fragment = href, ""
+        else:
+            path_part, fragment = href[:idx], href[idx:]
 
         # href가 비어있는 경우(e.g., href="#some_id")를 처리
         if path_part:
@@ -69,13 +155,13 @@ class EpubParser:
         
         return full_path + fragment
 
-    def _zip_read(self, zf: zipfile.ZipFile, path: str) -> bytes:
+    def _zip_read(self, zf: ZipReader, path: str) -> bytes:
         """
         ZipFile 객체에서 정규화된 경로의 파일을 안전하게 읽어 바이트를 반환합니다.
         경로가 정확히 일치하지 않을 경우를 대비해, 정규화된 경로명으로 다시 한번 탐색합니다.
 
         Args:
-            zf (zipfile.ZipFile): 열려 있는 ZipFile 객체.
+            zf (ZipReader): 열려 있는 ZipFile 또는 FastZip 객체.
             path (str): 읽고자 하는 파일의 ZIP 내 경로.
 
         Returns:
@@ -89,19 +175,32 @@ class EpubParser:
             return zf.read(normalized_path)
         except KeyError:
             # OPF 파일 등에서 경로가 비표준적으로 기록된 경우를 위한 폴백(fallback) 로직
-            for zip_info in zf.infolist():
-                if self._normalize_zip_path(zip_info.filename) == normalized_path:
-                    return zf.read(zip_info.filename)
+            name = self._normalized_names(zf).get(normalized_path)
+            if name is not None:
+                return zf.read(name)
             logger.error(f"ZIP에서 파일을 찾을 수 없습니다: {path} (정규화된 경로: {normalized_path})")
             raise
 
-    def _find_opf_path(self, zf: zipfile.ZipFile) -> str:
+    def _normalized_names(self, zf: ZipReader) -> Dict[str, str]:
+        """
+        {정규화된 경로: 실제 엔트리 이름} 매핑을 ZIP 핸들마다 한 번만 만들어 핸들에 보관합니다.
+        같은 정규화 경로가 여러 개면 namelist() 순서상 첫 엔트리를 사용합니다.
+        """
+        names = getattr(zf, "_epub_normalized_names", None)
+        if names is None:
+            names = {}
+            for name in zf.namelist():
+                names.setdefault(self._normalize_zip_path(name), name)
+            zf._epub_normalized_names = names
+        return names
+
+    def _find_opf_path(self, zf: ZipReader) -> str:
         """
         EPUB 표준에 따라 'META-INF/container.xml'을 파싱하여
         EPUB의 핵심 메타데이터 파일(.opf)의 전체 경로를 찾습니다.
 
         Args:
-            zf (zipfile.ZipFile): EPUB 파일의 ZipFile 객체.
+            zf (ZipReader): EPUB 파일의 ZipFile 또는 FastZip 객체.
 
         Returns:
             str: .opf 파일의 ZIP 내 전체 경로.
@@ -113,8 +212,7 @@ class EpubParser:
         
         root = etree.fromstring(container_xml)
         # XML 네임스페이스를 사용하여 'rootfile' 요소를 정확히 찾습니다.
-        ns = {"c": "urn:oasis:names:tc:opendocument:xmlns:container"}
-        opf_path = root.xpath("string(.//c:rootfile/@full-path)", namespaces=ns)
+        opf_path = _XP_ROOTFILE(root)
         
         if not opf_path:
             raise ValueError("container.xml에서 .opf 파일 경로('full-path')를 찾을 수 없습니다.")
@@ -135,7 +233,15 @@ class EpubParser:
         """
         root = etree.fromstring(opf_bytes)
         # .opf 파일의 네임스페이스는 버전에 따라 다를 수 있으므로 동적으로 가져옵니다.
-        ns = {"opf": root.nsmap.get(None) or "http://www.idpf.org/2007/opf"}
+        # 표준 네임스페이스(대부분의 EPUB)면 미리 컴파일된 XPath를 사용합니다.
+        ns = {"opf": root.nsmap.get(None) or _OPF_NAMESPACE}
+        spine_elem = root.find(".//opf:spine", namespaces=ns)
+        if ns == _OPF_NS:
+            manifest_items = _XP_MANIFEST_ITEMS(root)
+            itemrefs = _XP_ITEMREF(spine_elem)
+        else:
+            manifest_items = root.xpath(".//opf:manifest/opf:item", namespaces=ns)
+            itemrefs = spine_elem.xpath("opf:itemref", namespaces=ns)
         
         # manifest: 각 item의 id를 키로 하는 딕셔너리 생성
         manifest_map = {
@@ -144,13 +250,12 @@ class EpubParser:
                 "media-type": item.get("media-type"),
                 "properties": item.get("properties", "") # EPUB 3에서 사용
             }
-            for item in root.xpath(".//opf:manifest/opf:item", namespaces=ns)
+            for item in manifest_items
             if item.get("id") and item.get("href")
         }
         
         # spine: itemref의 idref 순서대로 리스트 생성
-        spine_elem = root.find(".//opf:spine", namespaces=ns)
-        spine_ids = [item.get("idref") for item in spine_elem.xpath("opf:itemref", namespaces=ns)]
+        spine_ids = [item.get("idref") for item in itemrefs]
         # EPUB 2 목차(.ncx)를 찾기 위한 'toc' 속성
         spine_props = {"toc": spine_elem.get("toc")}
         
@@ -170,22 +275,55 @@ class EpubParser:
             List[str]: 본문 텍스트 파일들의 ZIP 내 전체 경로 리스트.
         """
         opf_dir = posixpath.dirname(opf_path)
-        text_files = []
-        for idref in spine_ids:
-            item = manifest.get(idref)
-            if not item or not item.get("href"): continue
-            
-            href = item.get("href")
-            # 제외 키워드(cover, toc 등)에 해당하지 않는 파일만 필터링
-            if not any(p.search(href) for p in self.DEFAULT_EXCLUDE_PATTERNS):
-                # .opf 파일 기준 상대 경로를 ZIP 루트 기준 전체 경로로 변환
-                full_path = self._normalize_zip_path(posixpath.join(opf_dir, href))
-                text_files.append(full_path)
-        return text_files
+        exclude = self._EXCLUDE_RE.search
+        normalize = self._normalize_zip_path
+        # 1) spine 순서대로 href만 모은 뒤 2) 제외 키워드(cover, toc 등)를 걸러내고 ZIP 루트 기준 전체 경로로 변환합니다.
+        # 파이썬 레벨 루프/속성 조회 대신 리스트 컴프리헨션 두 번으로 처리합니다.
+        hrefs = [item["href"] for item in map(manifest.get, spine_ids) if item and item.get("href")]
+        return [normalize(posixpath.join(opf_dir, href)) for href in hrefs if not exclude(href)]
+
+    def load_spine_info(self, zf: ZipReader) -> SpineInfo:
+        """
+        OPF 위치 탐색, OPF 파싱, 본문 파일 목록 계산을 한 번에 수행합니다.
+        FastZip으로 연 경우 아카이브 fingerprint를 키로 결과를 캐시하여 같은 EPUB의 재분석 시 재사용합니다.
+
+        Args:
+            zf (ZipReader): 열려 있는 EPUB(ZIP) 핸들.
+
+        Returns:
+            SpineInfo: (opf 경로, manifest, spine ID 리스트, spine 속성, 본문 파일 경로 리스트)
+        """
+        key = getattr(zf, "fingerprint", None)
+        if key is not None:
+            with _spine_cache_lock:
+                info = _spine_cache.get(key)
+                if info is not None:
+                    _spine_cache.move_to_end(key)
+                    return info
+
+        opf_path = self._find_opf_path(zf)
+        manifest, (spine_ids, spine_props) = self._parse_opf_bytes(self._zip_read(zf, opf_path))
+        text_files = self.get_text_files_from_spine(opf_path, manifest, spine_ids)
+        info = SpineInfo(opf_path, manifest, spine_ids, spine_props, text_files)
+
+        if key is not None:
+            with _spine_cache_lock:
+                _spine_cache[key] = info
+                while len(_spine_cache) > _SPINE_CACHE_MAXSIZE:
+                    _spine_cache.popitem(last=False)
+        return info
+
+    def read_plain_text(self, zf: ZipReader, path: str) -> str:
+        """
+        ZIP 엔트리 하나를 읽어 곧바로 순수 텍스트로 변환합니다. 원본 바이트는 반환 즉시 해제됩니다.
+        DEFLATE 해제(zlib)와 lexbor HTML 파싱은 GIL을 놓고 실행되므로 스레드풀에서 병렬로 처리됩니다.
+        """
+        return self.get_plain_text(self._zip_read(zf, path))
 
     def get_plain_text(self, content: bytes) -> str:
         """
         HTML/XHTML 바이트에서 스크립트, 스타일 태그를 제거하고 순수 텍스트만 추출합니다.
+        selectolax가 설치되어 있으면 이를 사용하고, 실패하거나 설치되지 않은 경우 lxml로 처리합니다.
 
         Args:
             content (bytes): HTML/XHTML 파일의 바이트 데이터.
@@ -193,31 +331,48 @@ class EpubParser:
         Returns:
             str: 추출된 순수 텍스트.
         """
+        if SELECTOLAX_INSTALLED:
+            try:
+                tree = LexborHTMLParser(content)
+                tree.strip_tags(["script", "style"])
+                if tree.root is None:
+                    return ""
+                # BeautifulSoup의 get_text(separator=" ", strip=True)와 동일하게 공백뿐인 텍스트 노드는 건너뜁니다.
+                if b"\x00" not in content:
+                    # 노드 순회/strip을 C 레벨 text()에 맡기고 NUL 구분자로 빈 노드만 걸러내어,
+                    # 스레드풀 작업 중 GIL을 잡는 파이썬 루프를 없앱니다. (파싱과 inflate는 이미 GIL 밖에서 실행됨)
+                    return " ".join(filter(None, tree.root.text(separator="\x00", strip=True).split("\x00")))
+                texts = (node.text_content.strip() for node in tree.root.traverse(include_text=True) if node.tag == "-text")
+                return " ".join(t for t in texts if t)
+            except Exception as e:
+                # 비정상적인 XHTML 등으로 실패하면 lxml 경로로 폴백
+                logger.warning(f"selectolax 텍스트 추출 실패 (lxml로 폴백): {e}")
+        return self._get_plain_text_lxml(content)
+
+    def _get_plain_text_lxml(self, content: bytes) -> str:
+        """lxml 기반의 텍스트 추출 (selectolax 폴백 경로)."""
         try:
-            # lxml 파서가 더 빠르고 안정적입니다.
-            soup = BeautifulSoup(content, "lxml")
-        except Exception:
-            # lxml이 설치되지 않은 경우를 대비한 폴백
-            soup = BeautifulSoup(content, "html.parser")
-        
-        # 텍스트가 아닌 콘텐츠(스크립트, 스타일) 제거
+            root = etree.fromstring(content, _html_parser_for(content))
+        except etree.ParserError:
+            # lxml이 처리하지 못하는 문서만 BeautifulSoup(html.parser)으로 처리합니다.
+            return self._get_plain_text_bs4(content)
+        if root is None:
+            return ""
+
+        # 텍스트가 아닌 콘텐츠(스크립트, 스타일) 제거. 태그 뒤에 이어지는 텍스트(tail)는 보존합니다.
+        etree.strip_elements(root, "script", "style", with_tail=False)
+
+        # BeautifulSoup의 get_text(separator=" ", strip=True)와 동일하게 공백뿐인 텍스트 노드는 건너뜁니다.
+        return " ".join(t for t in (s.strip() for s in _XP_TEXT_NODES(root)) if t)
+
+    def _get_plain_text_bs4(self, content: bytes) -> str:
+        """BeautifulSoup 기반의 텍스트 추출 (lxml이 파싱하지 못한 문서의 최종 폴백)."""
+        soup = BeautifulSoup(content, "html.parser")
         for tag in soup(["script", "style"]):
             tag.decompose()
-        
         return soup.get_text(separator=" ", strip=True)
 
-    def _flatten_toc(self, toc_tree: List[Dict[str, Any]]) -> List[TocItem]:
-        """재귀적으로 구성된 목차 트리 구조를 평탄한 리스트(DTO)로 변환합니다."""
-        flat_list = []
-        for item in toc_tree:
-            # 'children' 키를 제외하고 TocItem DTO 객체 생성
-            flat_list.append(TocItem(title=item['title'], href=item['href'], level=item['depth']))
-            # 자식 노드가 있으면 재귀적으로 호출하여 리스트에 추가
-            if item.get('children'):
-                flat_list.extend(self._flatten_toc(item['children']))
-        return flat_list
-
-    def get_toc_from_stream(self, zf: zipfile.ZipFile, opf_path: str, manifest: Dict, spine_props: Dict) -> List[TocItem]:
+    def get_toc_from_stream(self, zf: ZipReader, opf_path: str, manifest: Dict, spine_props: Dict) -> List[TocItem]:
         """
         EPUB 스트림에서 목차(TOC)를 추출합니다.
 
@@ -226,7 +381,7 @@ class EpubParser:
         2.  **EPUB 2 폴백**: EPUB 3 방식이 실패하면, `spine`의 `toc` 속성이 가리키는 `.ncx` 파일을 찾아 파싱합니다.
 
         Args:
-            zf (zipfile.ZipFile): EPUB의 ZipFile 객체.
+            zf (ZipReader): EPUB의 ZipFile 또는 FastZip 객체.
             opf_path (str): .opf 파일의 경로.
             manifest (Dict): manifest 정보.
             spine_props (Dict): spine의 속성 정보.
@@ -242,10 +397,10 @@ class EpubParser:
             try:
                 nav_path = self._normalize_zip_path(posixpath.join(opf_dir, nav_item['href']))
                 nav_content = self._zip_read(zf, nav_path)
-                toc_tree = self._parse_toc_nav_xhtml(nav_content, nav_path)
-                if toc_tree:
+                toc = self._parse_toc_nav_xhtml(nav_content, nav_path)
+                if toc:
                     logger.info("EPUB 3 네비게이션 문서(nav.xhtml)에서 목차를 성공적으로 추출했습니다.")
-                    return self._flatten_toc(toc_tree)
+                    return toc
             except Exception as e:
                 logger.warning(f"EPUB 3 목차 분석 중 오류 발생 (EPUB 2로 폴백 시도): {e}")
 
@@ -260,63 +415,97 @@ class EpubParser:
             try:
                 ncx_path = self._normalize_zip_path(posixpath.join(opf_dir, ncx_item['href']))
                 ncx_content = self._zip_read(zf, ncx_path)
-                toc_tree = self._parse_toc_ncx(ncx_content, ncx_path)
-                if toc_tree:
+                toc = self._parse_toc_ncx(ncx_content, ncx_path)
+                if toc:
                     logger.info("EPUB 2 목차 파일(.ncx)에서 목차를 성공적으로 추출했습니다.")
-                    return self._flatten_toc(toc_tree)
+                    return toc
             except Exception as e:
                 logger.error(f"EPUB 2 목차 분석 중 오류 발생: {e}")
         
         logger.warning("EPUB에서 유효한 목차를 찾지 못했습니다.")
         return []
 
-    def _parse_toc_nav_xhtml(self, data: bytes, nav_full_path: str) -> List[Dict[str, Any]]:
-        """EPUB 3의 nav.xhtml 파일을 파싱하여 목차 트리 구조를 생성합니다."""
-        soup = BeautifulSoup(data, 'lxml-xml')
-        # epub:type="toc" 속성을 가진 <nav> 요소를 찾습니다.
-        nav = soup.find("nav", attrs={"epub:type": re.compile(r"toc")})
-        if not nav: return []
-
-        def parse_ol(ol_element, depth: int) -> List[Dict[str, Any]]:
-            items = []
+    def _parse_toc_nav_xhtml(self, data: bytes, nav_full_path: str) -> List[TocItem]:
+        """
+        EPUB 3의 nav.xhtml 파일을 파싱하여 목차를 생성합니다.
+        중간 트리를 만들지 않고 순회하면서 곧바로 평탄한(전위 순회 순서) TocItem 리스트에 추가합니다.
+        """
+        try:
+            root = etree.fromstring(data, _XML_RECOVER_PARSER)
+        except etree.XMLSyntaxError:
+            # 복구 모드로도 파싱할 수 없는 문서(빈 파일 등)는 목차가 없는 것으로 처리합니다.
+            return []
+        if root is None: return []
+        # epub:type="toc" 속성을 가진 <nav> 요소를 찾습니다. (landmarks/page-list 등 다른 nav는 건너뜀)
+        # '{*}' 와일드카드로 XHTML 네임스페이스 유무와 관계없이 로컬 이름으로 매칭합니다.
+        nav = next((el for el in root.iter("{*}nav") if "toc" in el.get(_EPUB_TYPE_ATTR, "")), None)
+        if nav is None: return []
+        base_dir = posixpath.dirname(nav_full_path)
+
+        def first_child(element, localname: str):
+            return next(element.iterchildren("{*}" + localname), None)
+
+        toc: List[TocItem] = []
+
+        def parse_ol(ol_element, depth: int) -> None:
             # 직계 자식 <li>들만 순회하여 중첩된 목차를 정확히 파싱
-            for li in ol_element.find_all("li", recursive=False):
-                a = li.find("a", recursive=False)
-                if not a: continue
+            for li in ol_element.iterchildren("{*}li"):
+                a = first_child(li, "a")
+                if a is None: continue
                 
-                title = a.get_text(" ", strip=True)
+                # BeautifulSoup의 get_text(" ", strip=True)와 동일하게 공백뿐인 텍스트는 건너뜁니다.
+                title = " ".join(t for t in (s.strip() for s in a.itertext()) if t)
                 # href 경로를 EPUB 루트 기준의 전체 경로로 변환 (앵커 보존)
-                href = self._resolve_href(posixpath.dirname(nav_full_path), a.get("href", ""))
-                
-                entry = {"title": title, "href": href, "depth": depth, "children": []}
+                href = self._resolve_href(base_dir, a.get("href", ""))
+                # 입력이 이미 검증된 문자열/정수이므로 검증 없이 DTO를 생성합니다.
+                toc.append(TocItem.model_construct(title=title, href=href, level=depth))
                 
                 # 중첩된 <ol>이 있으면 재귀 호출
-                child_ol = li.find("ol", recursive=False)
-                if child_ol:
-                    entry["children"] = parse_ol(child_ol, depth + 1)
-                items.append(entry)
-            return items
+                child_ol = first_child(li, "ol")
+                if child_ol is not None:
+                    parse_ol(child_ol, depth + 1)
 
-        top_ol = nav.find("ol")
-        return parse_ol(top_ol, 1) if top_ol else []
+        top_ol = next(nav.iter("{*}ol"), None)
+        if top_ol is not None:
+            parse_ol(top_ol, 1)
+        return toc
 
-    def _parse_toc_ncx(self, data: bytes, ncx_full_path: str) -> List[Dict[str, Any]]:
-        """EPUB 2의 .ncx 파일을 파싱하여 목차 트리 구조를 생성합니다."""
+    def _parse_toc_ncx(self, data: bytes, ncx_full_path: str) -> List[TocItem]:
+        """
+        EPUB 2의 .ncx 파일을 파싱하여 목차를 생성합니다.
+        중간 트리를 만들지 않고 순회하면서 곧바로 평탄한(전위 순회 순서) TocItem 리스트에 추가합니다.
+        """
         root = etree.fromstring(data)
-        ns = {"ncx": "http://www.daisy.org/z3986/2005/ncx/"}
+        base_dir = posixpath.dirname(ncx_full_path)
         
-        def parse_navpoint(element, depth):
-            items = []
-            # <navPoint> 요소들을 순회
-            for np in element.xpath('ncx:navPoint', namespaces=ns):
-                title = np.xpath('string(ncx:navLabel/ncx:text)', namespaces=ns)
-                src = np.xpath('string(ncx:content/@src)', namespaces=ns)
-                href = self._resolve_href(posixpath.dirname(ncx_full_path), src)
+        def label_of(np) -> str:
+            """string(ncx:navLabel/ncx:text)와 같은 값. 자식 요소가 없는 일반적인 <text>는 .text를 바로 사용합니다."""
+            for label in np.iterchildren(_NCX_NAVLABEL_TAG):
+                for text in label.iterchildren(_NCX_TEXT_TAG):
+                    return (text.text or "") if len(text) == 0 else _XP_STRING_VALUE(text)
+            return ""
+
+        def src_of(np) -> str:
+            """string(ncx:content/@src)와 같은 값 (src 속성이 있는 첫 <content>)."""
+            for content in np.iterchildren(_NCX_CONTENT_TAG):
+                src = content.get("src")
+                if src is not None:
+                    return src
+            return ""
+
+        toc: List[TocItem] = []
+
+        def parse_navpoint(element, depth: int) -> None:
+            # 직계 자식 <navPoint> 요소들을 순회 (navPoint마다 XPath를 평가하지 않고 태그로 직접 자식을 찾음)
+            for np in element.iterchildren(_NCX_NAVPOINT_TAG):
+                title = label_of(np)
+                href = self._resolve_href(base_dir, src_of(np))
+                toc.append(TocItem.model_construct(title=title, href=href, level=depth))
                 
                 # 재귀적으로 자식 <navPoint>들을 파싱
-                entry = {"title": title, "href": href, "depth": depth, "children": parse_navpoint(np, depth + 1)}
-                items.append(entry)
-            return items
+                parse_navpoint(np, depth + 1)
 
-        navmap = root.find('.//ncx:navMap', namespaces=ns)
-        return parse_navpoint(navmap, 1) if navmap is not None else []
\ No newline at end of file
+        navmap = next(iter(_XP_NAVMAP(root)), None)
+        if navmap is not None:
+            parse_navpoint(navmap, 1)
+        return toc
\ No newline at end of file
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+메모리 내 EPUB(ZIP) 버퍼를 위한 경량 읽기 전용 ZIP 리더 모듈입니다.
+
+`zipfile.ZipFile(io.BytesIO(...))`와 달리 입력 버퍼를 복사하지 않고 memoryview로 참조하며,
+중앙 디렉토리(Central Directory)를 한 번만 파싱하여 `{이름: 엔트리}` 인덱스를 만듭니다.
+이후 `read()`는 인덱스 조회 → 로컬 헤더 건너뛰기 → (STORED) 슬라이스 / (DEFLATE) 단일 inflate 호출로 처리됩니다.
+
+DEFLATE 해제에는 `deflate`(libdeflate 바인딩)가 설치되어 있으면 이를 사용하고, 없으면 표준 zlib을 사용합니다.
+ZIP64나 STORED/DEFLATED 이외의 압축 방식(BZIP2, LZMA 등)이 포함된 아카이브는 `open_zip()`이 표준 zipfile로 엽니다.
+"""
+import hashlib
+import io
+import struct
+import zlib
+import zipfile
+from typing import Dict, List, NamedTuple, Optional, Union
+
+# libdeflate는 스트리밍 상태 없이 전체 버퍼를 한 번에 해제하며 zlib보다 약 2배 빠릅니다.
+try:
+    import deflate
+    DEFLATE_INSTALLED = True
+except ImportError:
+    DEFLATE_INSTALLED = False
+
+# --- ZIP 포맷 상수 ---
+_EOCD_SIG = b"PK\x05\x06"
+_EOCD = struct.Struct("<4s4H2LH")          # End of Central Directory (22 bytes)
+_CDH_SIG = b"PK\x01\x02"
+_CDH = struct.Struct("<4s6H3L5H2L")        # Central Directory File Header (46 bytes)
+_LFH_SIG = b"PK\x03\x04"
+_LFH = struct.Struct("<4s5H3L2H")          # Local File Header (30 bytes)
+
+_MAX_COMMENT = 0xFFFF
+_ZIP64_MARKER = 0xFFFFFFFF
+_FLAG_UTF8 = 0x800
+
+ZIP_STORED = zipfile.ZIP_STORED
+ZIP_DEFLATED = zipfile.ZIP_DEFLATED
+_SUPPORTED_METHODS = frozenset((ZIP_STORED, ZIP_DEFLATED))
+
+
+class UnsupportedZipError(zipfile.BadZipFile):
+    """아카이브는 정상이지만 FastZip이 처리하지 않는 형식(ZIP64, 지원하지 않는 압축 방식)인 경우입니다."""
+
+
+class ZipEntry(NamedTuple):
+    """중앙 디렉토리에서 읽어 둔 단일 엔트리 정보입니다."""
+    offset: int       # 로컬 파일 헤더의 시작 위치
+    comp_size: int
+    uncomp_size: int
+    method: int
+
+
+class FastZip:
+    """
+    memoryview 기반의 읽기 전용 ZIP 리더입니다.
+
+    `zipfile.ZipFile`의 읽기 API 중 EpubParser가 사용하는 부분(`read`, `namelist`, 컨텍스트 매니저)만
+    동일한 의미로 제공하므로, 파서 코드 수정 없이 대체 사용할 수 있습니다.
+    내부 상태는 생성 이후 변경되지 않으므로 여러 스레드에서 동시에 `read()`를 호출해도 안전합니다.
+
+    Raises:
+        zipfile.BadZipFile: EOCD/중앙 디렉토리가 손상된 경우.
+        UnsupportedZipError: ZIP64 아카이브이거나 STORED/DEFLATED 이외의 압축 방식 엔트리가 있는 경우.
+    """
+
+    def __init__(self, buf: Union[bytes, bytearray, memoryview]):
+        self._buf = memoryview(buf)
+        self._cd_span = (0, 0)
+        try:
+            self._entries: Dict[str, ZipEntry] = self._parse_central_directory()
+        except BaseException:
+            # 실패 시 memoryview를 바로 놓아 주어야 호출자가 bytearray를 해제/재사용할 수 있습니다.
+            self._buf.release()
+            raise
+        self._fingerprint: Optional[bytes] = None
+
+    # --- 컨텍스트 매니저 (zipfile.ZipFile 호환) ---
+    def __enter__(self) -> "FastZip":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """내부 memoryview를 해제합니다. 원본 버퍼는 호출자가 관리합니다."""
+        self._buf.release()
+
+    def _parse_central_directory(self) -> Dict[str, ZipEntry]:
+        """EOCD를 찾아 중앙 디렉토리 전체를 한 번에 인덱싱합니다."""
+        buf = self._buf
+        size = len(buf)
+        if size < _EOCD.size:
+            raise zipfile.BadZipFile("ZIP 파일이 너무 짧습니다.")
+
+        # EOCD는 파일 끝에서 (22 + 최대 코멘트 길이) 이내에 위치합니다.
+        tail_start = max(0, size - (_EOCD.size + _MAX_COMMENT))
+        eocd_pos = bytes(buf[tail_start:]).rfind(_EOCD_SIG)
+        if eocd_pos < 0:
+            raise zipfile.BadZipFile("EOCD(End of Central Directory) 레코드를 찾을 수 없습니다.")
+        eocd_pos += tail_start
+
+        _, _, _, _, n_entries, cd_size, cd_offset, _ = _EOCD.unpack_from(buf, eocd_pos)
+        if cd_offset == _ZIP64_MARKER or n_entries == 0xFFFF:
+            raise UnsupportedZipError("ZIP64 아카이브는 지원하지 않습니다.")
+        if cd_offset + cd_size > eocd_pos:
+            raise zipfile.BadZipFile("중앙 디렉토리 위치가 올바르지 않습니다.")
+
+        self._cd_span = (cd_offset, cd_offset + cd_size)
+        entries: Dict[str, ZipEntry] = {}
+        pos = cd_offset
+        for _ in range(n_entries):
+            (sig, _, _, flags, method, _, _, _, comp_size, uncomp_size,
+             name_len, extra_len, comment_len, _, _, _, offset) = _CDH.unpack_from(buf, pos)
+            if sig != _CDH_SIG:
+                raise zipfile.BadZipFile("중앙 디렉토리 헤더 시그니처가 올바르지 않습니다.")
+            name_start = pos + _CDH.size
+            raw_name = bytes(buf[name_start:name_start + name_len])
+            name = raw_name.decode("utf-8" if flags & _FLAG_UTF8 else "cp437")
+            if _ZIP64_MARKER in (comp_size, uncomp_size, offset):
+                raise UnsupportedZipError(f"ZIP64 엔트리는 지원하지 않습니다: {name}")
+            if method not in _SUPPORTED_METHODS:
+                raise UnsupportedZipError(f"지원하지 않는 압축 방식입니다 (method={method}): {name}")
+            entries[name] = ZipEntry(offset, comp_size, uncomp_size, method)
+            pos = name_start + name_len + extra_len + comment_len
+        return entries
+
+    @property
+    def fingerprint(self) -> bytes:
+        """
+        아카이브 내용을 식별하는 16바이트 다이제스트입니다.
+        중앙 디렉토리에는 엔트리별 이름/CRC-32/크기/오프셋이 모두 들어 있으므로,
+        전체 버퍼 대신 중앙 디렉토리(수 KB)만 해시해도 같은 EPUB인지 판별할 수 있습니다.
+        """
+        if self._fingerprint is None:
+            start, end = self._cd_span
+            self._fingerprint = hashlib.blake2b(self._buf[start:end], digest_size=16).digest()
+        return self._fingerprint
+
+    def namelist(self) -> List[str]:
+        """아카이브에 포함된 엔트리 이름 목록을 중앙 디렉토리 순서대로 반환합니다."""
+        return list(self._entries)
+
+    def read(self, name: str) -> bytes:
+        """
+        엔트리 하나의 압축 해제된 내용을 반환합니다.
+
+        Raises:
+            KeyError: 해당 이름의 엔트리가 없는 경우 (zipfile.ZipFile.read와 동일).
+            zipfile.BadZipFile: 로컬 헤더가 손상되었거나 지원하지 않는 압축 방식인 경우.
+        """
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"There is no item named {name!r} in the archive")
+
+        buf = self._buf
+        sig, _, _, _, _, _, _, _, _, name_len, extra_len = _LFH.unpack_from(buf, entry.offset)
+        if sig != _LFH_SIG:
+            raise zipfile.BadZipFile(f"로컬 파일 헤더 시그니처가 올바르지 않습니다: {name}")
+        # 로컬 헤더의 extra 길이는 중앙 디렉토리와 다를 수 있으므로 로컬 헤더 값을 사용합니다.
+        data_start = entry.offset + _LFH.size + name_len + extra_len
+        payload = buf[data_start:data_start + entry.comp_size]
+
+        if entry.method == ZIP_STORED:
+            return bytes(payload)
+        if entry.method == ZIP_DEFLATED:
+            # 원본 크기를 알고 있으므로 출력 버퍼를 한 번에 할당하는 단일 inflate 호출로 처리합니다.
+            if DEFLATE_INSTALLED:
+                try:
+                    # libdeflate는 bytearray를 반환하므로, 파서(lexbor 등)가 요구하는 bytes로 변환합니다.
+                    return bytes(deflate.deflate_decompress(payload, entry.uncomp_size))
+                except deflate.DeflateError:
+                    # 중앙 디렉토리의 원본 크기가 실제와 다른 등 비정상 엔트리는 zlib 경로에서 다시 처리합니다.
+                    pass
+            return zlib.decompress(payload, -15, entry.uncomp_size or zlib.DEF_BUF_SIZE)
+        raise zipfile.BadZipFile(f"지원하지 않는 압축 방식입니다 (method={entry.method}): {name}")
+
+
+def open_zip(buf: Union[bytes, bytearray, memoryview]) -> Union[FastZip, zipfile.ZipFile]:
+    """
+    EPUB(ZIP) 버퍼를 읽기 전용으로 엽니다.
+    FastZip으로 열 수 없는 형식(ZIP64, BZIP2/LZMA 등)은 같은 read/namelist/close API를 가진 표준 zipfile로 엽니다.
+
+    Raises:
+        zipfile.BadZipFile: 아카이브가 손상된 경우.
+    """
+    try:
+        return FastZip(buf)
+    except UnsupportedZipError:
+        return zipfile.ZipFile(io.BytesIO(buf), "r")
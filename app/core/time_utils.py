@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+요청 경로에서 반복 호출되는 UTC 타임스탬프 문자열 생성 유틸리티입니다.
+
+`datetime.now(timezone.utc).isoformat()`은 매 호출마다 tz-aware datetime 객체를 만들고
+파이썬 레벨 포매터를 거칩니다. 여기서는 초 단위 접두부("YYYY-MM-DDTHH:MM:SS")를 1개 항목으로 캐시하고
+마이크로초와 오프셋만 붙여 같은 형식의 문자열을 만듭니다.
+"""
+import time
+from datetime import datetime, timezone
+from typing import Tuple
+
+# (정수 초, 해당 초의 ISO 접두부) - 1개 항목 캐시
+_cache_sec: Tuple[int, str] = (-1, "")
+
+
+def utc_iso_now() -> str:
+    """
+    현재 UTC 시각을 ISO 8601 문자열로 반환합니다.
+
+    Returns:
+        str: 예) "2024-01-01T12:34:56.789012+00:00"
+            (`datetime.isoformat()`과 달리 마이크로초가 0이어도 항상 6자리를 포함합니다.)
+    """
+    global _cache_sec
+    sec, usec = divmod(time.time_ns() // 1000, 1_000_000)
+    cached_sec, prefix = _cache_sec
+    if sec != cached_sec:
+        prefix = datetime.fromtimestamp(sec, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        _cache_sec = (sec, prefix)
+    return f"{prefix}.{usec:06d}+00:00"
@@ -5,68 +5,84 @@
 이 파일의 함수들은 FastAPI의 `Depends` 시스템과 함께 사용되어,
 각 계층이 필요로 하는 서비스 인스턴스를 생성하고 제공하는 책임을 가집니다.
 """
-from app.clients import clients
-from app.config import Config
+from app.clients import CLIENTS
+from app.config import Config, get_config as load_config
 from app.infrastructure.llm.openai_client import LlmClient
 from app.infrastructure.storage.s3_client import S3Client
 # from app.infrastructure.drm.license_service import LicenseService # KMS 기반 서비스 사용 시 주석 해제
 from app.infrastructure.drm.adapter import UndrmAdapter
 from app.infrastructure.drm.kms_service import KmsKeyService
 from app.infrastructure.drm.database_license_service import DatabaseLicenseService
+from app.infrastructure.drm.cached_license_service import CachedLicenseService
 from app.infrastructure.log.dynamodb_logger import DynamoDBLogger
 from app.infrastructure.log.file_logger import FileLogger
 from app.application.shared.services import EbookAnalyzer
 from app.application.find_start_point.services import StartPointDetector
+from app.application.find_start_point.decision_cache import DecisionCache
 from app.application.extract_hashtags.services import HashtagExtractor
-from fastapi import Depends
+from typing import Optional
+from fastapi import Depends, Request
 from starlette import status
 from app.domain.interfaces import ILogger, ILicenseService
 from app.core.epub_parser import EpubParser
 
 # --- Config Provider (싱글톤) ---
-_config_instance = None
+def get_config(request: Request) -> Config:
+    """
+    lifespan 시작 시 미리 로드해 `app.state.config`에 보관한 Config를 반환합니다.
+    (Secrets Manager 조회/프롬프트 파싱이 요청 경로에서 일어나지 않도록 합니다.)
+    lifespan을 거치지 않은 앱(테스트 등)에서는 프로세스 단위로 캐시된 Config로 폴백합니다.
+    """
+    config = getattr(request.app.state, "config", None)
+    return config if config is not None else load_config()
 
-def get_config() -> Config:
-    global _config_instance
-    if _config_instance is None:
-        _config_instance = Config()
-    return _config_instance
 
+# --- 상태 없는 서비스 (프로세스 단위 싱글톤) ---
+# 요청 범위 상태를 갖지 않으므로 요청마다 새로 만들지 않고 하나의 인스턴스를 공유합니다.
+_EPUB_PARSER = EpubParser()
+_UNDRM_ADAPTER = UndrmAdapter()
+_START_POINT_DETECTOR = StartPointDetector()
 
 # --- Core Providers ---
 
 def get_epub_parser() -> EpubParser:
-    """EpubParser 인턴스를 생성하고 반환합니다."""
-    return EpubParser()
+    """공유 EpubParser 인스턴스를 반환합니다."""
+    return _EPUB_PARSER
 
 # --- Infrastructure Providers ---
 
 def get_llm_client(config: Config = Depends(get_config)) -> LlmClient:
     """공유 AsyncOpenAI 클라이언트를 사용하여 LlmClient 인스턴스를 생성하고 반환합니다."""
     return LlmClient(
-        client=clients.get("openai_client"),
+        client=CLIENTS.openai_client,
         model_name=config.OPENAI_MODEL_NAME,
         system_prompt=config.SYSTEM_PROMPT,
         user_prompt_template=config.USER_PROMPT_TEMPLATE,
+        llm=CLIENTS.chat_llm,
     )
 
-def get_s3_client() -> S3Client:
+def get_s3_client(config: Config = Depends(get_config)) -> S3Client:
     """
     lifespan에서 생성/진입(__aenter__)된 공유 aioboto3 S3 클라이언트를 주입.
     (중요) S3Client(session=...)가 아니라 S3Client(s3_client=...) 입니다.
     """
-    s3 = clients.get("s3_client")
+    s3 = CLIENTS.s3_client
     if s3 is None:
         # lifespan 초기화 누락 시 빠르게 실패하게
         raise RuntimeError("Shared S3 client is not initialized. Check lifespan startup.")
-    return S3Client(s3_client=s3)
+    return S3Client(
+        s3_client=s3,
+        parallel_reads=config.S3_PARALLEL_READS,
+        min_part_size=config.S3_MIN_PART_SIZE,
+    )
 
 def get_kms_key_service(config: Config = Depends(get_config)) -> KmsKeyService:
-    """KmsKeyService 인스턴스를 생성하고 반환합니다."""
+    """KmsKeyService 인스턴스를 생성하고 반환합니다. (lifespan에서 만든 공유 KMS 클라이언트가 있으면 재사용)"""
     return KmsKeyService(
         aws_profile=config.AWS_PROFILE_NAME,
         region_name=config.AWS_REGION,
-        key_id=config.KMS_KEY_ID
+        key_id=config.KMS_KEY_ID,
+        client=CLIENTS.kms_client,
     )
 
 # --- 라이선스 서비스 제공자 (주석 처리된 부분은 KMS 기반 구현체) ---
@@ -76,12 +92,12 @@ def get_kms_key_service(config: Config = Depends(get_config)) -> KmsKeyService:
 #     return LicenseService(kms_service)
 
 def get_db_license_service(config: Config = Depends(get_config)) -> DatabaseLicenseService:
-    session_factory = clients.get("db_sessionmaker")
-    if session_factory is None:
-        raise RuntimeError("DB session factory가 초기화되지 않았습니다. lifespan 확인.")
+    engine = CLIENTS.db_engine
+    if engine is None:
+        raise RuntimeError("DB engine이 초기화되지 않았습니다. lifespan 확인.")
     # (선택) 테이블명 화이트리스트 검증
     # assert config.DB_TABLE_NAME in {"licenses", "license_keys"}  # 예시
-    return DatabaseLicenseService(session_factory=session_factory, table_name=config.DB_TABLE_NAME)
+    return DatabaseLicenseService(engine=engine, table_name=config.DB_TABLE_NAME)
 
 def get_license_service(
     db_license_service: DatabaseLicenseService = Depends(get_db_license_service)
@@ -91,21 +107,25 @@ def get_license_service(
     
     라이선스 조회 방식을 KMS로 변경하려면, 이 함수의 의존성을
     `db_license_service`에서 `get_kms_license_service`로 변경하면 됩니다.
+    lifespan에서 라이선스 캐시가 준비된 경우 item_id별 TTL 캐시로 감싸서 반환합니다.
     """
-    return db_license_service
+    cache = CLIENTS.license_cache
+    if cache is None:
+        return db_license_service
+    return CachedLicenseService(db_license_service, cache)
 
 def get_undrm_adapter() -> UndrmAdapter:
-    """UndrmAdapter 인스턴스를 생성하고 반환합니다."""
-    return UndrmAdapter()
+    """공유 UndrmAdapter 인스턴스를 반환합니다."""
+    return _UNDRM_ADAPTER
 
 def get_db_logger(config: Config = Depends(get_config)) -> ILogger:
     # 로깅 시스템을 교체하려면 이 부분만 수정하면 됩니다.
     # return FileLogger()
-    table = clients.get("dynamodb_table")
-    if table is None:
+    dynamodb_client = CLIENTS.dynamodb_client
+    if dynamodb_client is None:
         # 필요 시 FileLogger로 폴백해도 됨
-        raise RuntimeError("DynamoDB table handle is not initialized. Check lifespan.")
-    return DynamoDBLogger(table=table)
+        raise RuntimeError("DynamoDB client is not initialized. Check lifespan.")
+    return DynamoDBLogger(client=dynamodb_client, table_name=config.DYNAMODB_LOG_TABLE_NAME)
 
 
 # --- Application Providers ---
@@ -115,8 +135,12 @@ def get_ebook_analyzer(parser: EpubParser = Depends(get_epub_parser)) -> EbookAn
     return EbookAnalyzer(parser)
 
 def get_start_point_detector() -> StartPointDetector:
-    """StartPointDetector 인스턴스를 생성하고 반환합니다."""
-    return StartPointDetector()
+    """공유 StartPointDetector 인스턴스를 반환합니다."""
+    return _START_POINT_DETECTOR
+
+def get_decision_cache() -> Optional[DecisionCache]:
+    """lifespan에서 생성된 공유 시작점 결정 캐시를 반환합니다. (초기화되지 않았으면 None → 캐시 미사용)"""
+    return CLIENTS.decision_cache
 
 def get_hashtag_extractor(parser: EpubParser = Depends(get_epub_parser)) -> HashtagExtractor:
     """HashtagExtractor 인스턴스를 생성하고 반환합니다."""
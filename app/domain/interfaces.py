@@ -14,12 +14,12 @@ class ILogger(ABC):
     모든 로거 구현체는 이 인터페이스를 상속받아야 합니다.
     """
     @abstractmethod
-    def create_log(self, log_data: UndrmLog) -> str:
+    async def create_log(self, log_data: UndrmLog) -> str:
         """초기 감사 로그를 생성하고, 생성된 로그의 고유 ID를 반환합니다."""
         pass
 
     @abstractmethod
-    def update_log(self, event_id: str, status: str, end_time: str, failure_reason: str = None):
+    async def update_log(self, event_id: str, status: str, end_time: str, failure_reason: str = None):
         """기존 감사 로그를 업데이트합니다."""
         pass
 
@@ -31,3 +31,7 @@ class ILicenseService(ABC):
     async def get_license(self, item_id: str) -> str:
         """주어진 item_id에 해당하는 라이선스 키를 반환합니다."""
         pass
+
+    def invalidate(self, item_id: str) -> None:
+        """캐시된 라이선스 키를 무효화합니다. 캐시를 사용하지 않는 구현체는 아무 작업도 하지 않습니다."""
+        pass
@@ -1,8 +1,9 @@
 # -*- coding: utf-8 -*-
 import uuid
-from datetime import datetime, timezone
-from typing import List, Literal, Annotated, Optional
-from pydantic import BaseModel, Field, StringConstraints
+from functools import cached_property
+from app.core.time_utils import utc_iso_now
+from typing import Dict, List, Literal, Annotated, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
 
 Digits = Annotated[str, StringConstraints(pattern=r'^\d+$')]
 
@@ -24,18 +25,28 @@ class InspectResponse(BaseModel):
 
 class UndrmPipelineOutput(BaseModel):
     """복호화 파이프라인의 결과를 담는 DTO입니다."""
-    decrypted_epub: bytes
-    event_id: str
+    # 유스케이스가 처리 직후 clear()로 메모리를 즉시 해제할 수 있도록 bytearray를 복사 없이 그대로 보관합니다.
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    decrypted_epub: Union[bytearray, bytes]
+    # 아직 기록되지 않은 감사 로그. 유스케이스가 최종 상태를 채워 한 번만 기록합니다.
+    log_entry: "UndrmLog"
+
+    @property
+    def event_id(self) -> str:
+        return self.log_entry.event_id
 
 # --- Domain DTOs ---
 class UndrmInput(BaseModel):
-    encrypted_epub: bytes
+    # S3에서 받은 bytearray를 bytes로 복사하지 않고 그대로 보관합니다.
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    encrypted_epub: Union[bytearray, bytes]
     license_key: str
     grant_id: Optional[str] = None
     tenant_id: str
 
 class UndrmOutput(BaseModel):
-    decrypted_epub: bytes
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    decrypted_epub: Union[bytearray, bytes]
     drm_type: Optional[Literal["V2"]] = "V2"
 
 class FileCharStat(BaseModel):
@@ -64,6 +75,11 @@ class LlmInput(BaseModel):
     toc: List[TocItem]
     file_char_counts: List[FileCharStat]
 
+    @cached_property
+    def char_counts_map(self) -> Dict[str, int]:
+        """파일 경로 → 글자 수 매핑. 같은 입력으로 재시도할 때 다시 만들지 않도록 한 번만 계산합니다."""
+        return {stat.path: stat.chars for stat in self.file_char_counts}
+
 class DecideInput(BaseModel):
     toc: List[TocItem]
     file_char_counts: List[FileCharStat]
@@ -92,4 +108,14 @@ class UndrmLog(BaseModel):
     drm_type: Literal["V2"] = "V2"
     undrm_start_time: str
     undrm_end_time: Optional[str] = None
-    event_time: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    event_time: str = Field(default_factory=utc_iso_now)
+
+    def finished(self, status: Literal["SUCCESS", "FAILURE"], failure_reason: Optional[str] = None) -> "UndrmLog":
+        """최종 상태, 실패 사유, 종료 시각을 채운 사본을 반환합니다."""
+        return self.model_copy(update={
+            "status": status, "failure_reason": failure_reason, "undrm_end_time": utc_iso_now(),
+        })
+
+
+# UndrmPipelineOutput이 뒤에서 정의된 UndrmLog를 참조하므로 스키마를 다시 빌드합니다.
+UndrmPipelineOutput.model_rebuild()
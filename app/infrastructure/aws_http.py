@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+장시간 살아 있는 aioboto3 클라이언트를 위한 HTTP 세션 설정 모듈입니다.
+
+aiobotocore는 botocore Config의 `tcp_keepalive`로부터 계산된 socket_options를 받기만 하고 소켓에 적용하지 않습니다.
+게다가 리눅스 기본 keep-alive 유휴 시간(7200초)은 NAT/ELB 유휴 타임아웃(350초 안팎)보다 훨씬 길어,
+중간 장비가 조용히 끊은 커넥션이 풀에 남아 CLOSE_WAIT가 쌓이고 수 시간에 걸쳐 지연이 늘어납니다.
+여기서는 aiohttp 커넥터의 socket_factory로 소켓 옵션과 짧은 keep-alive 주기를 직접 적용합니다.
+"""
+import inspect
+import socket
+from typing import List, Tuple
+
+import aiohttp
+from aiobotocore.httpsession import AIOHTTPSession
+
+# 유휴 60초 후부터 20초 간격으로 3번 프로브 → 끊긴 커넥션을 약 2분 안에 감지합니다.
+TCP_KEEPIDLE = 60
+TCP_KEEPINTVL = 20
+TCP_KEEPCNT = 3
+
+# aiohttp 3.12 미만은 socket_factory를 지원하지 않으므로 이 경우 기본 세션과 동일하게 동작합니다.
+_SOCKET_FACTORY_SUPPORTED = "socket_factory" in inspect.signature(aiohttp.TCPConnector).parameters
+
+
+def _keepalive_options() -> List[Tuple[int, int, int]]:
+    """플랫폼이 지원하는 TCP keep-alive 세부 옵션 목록을 반환합니다."""
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    for name, value in (("TCP_KEEPIDLE", TCP_KEEPIDLE), ("TCP_KEEPINTVL", TCP_KEEPINTVL), ("TCP_KEEPCNT", TCP_KEEPCNT)):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+class KeepAliveAIOHTTPSession(AIOHTTPSession):
+    """
+    botocore가 계산한 socket_options(TCP_NODELAY, SO_KEEPALIVE 등)와 짧은 keep-alive 주기를 실제 소켓에 적용하는 세션입니다.
+    `AioConfig(http_session_cls=KeepAliveAIOHTTPSession)`으로 지정합니다.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if _SOCKET_FACTORY_SUPPORTED:
+            options = list(dict.fromkeys([*self._socket_options, *_keepalive_options()]))
+            self._connector_args = {**self._connector_args, "socket_factory": self._socket_factory(options)}
+
+    @staticmethod
+    def _socket_factory(options: List[Tuple[int, int, int]]):
+        def create(addr_info) -> socket.socket:
+            family, type_, proto, _, _ = addr_info
+            sock = socket.socket(family=family, type=type_, proto=proto)
+            for level, optname, value in options:
+                try:
+                    sock.setsockopt(level, optname, value)
+                except OSError:
+                    # 일부 옵션을 지원하지 않는 환경에서도 연결 자체는 진행합니다.
+                    pass
+            return sock
+        return create
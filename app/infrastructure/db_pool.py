@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+SQLAlchemy 커넥션 풀 설정 모듈입니다.
+
+`pool_pre_ping=True`는 체크아웃마다 `SELECT 1` 왕복을 추가하므로, 요청마다 라이선스를 한 번 조회하는
+이 서비스에서는 DB 비용이 사실상 두 배가 됩니다. 대신 풀에서 오래 쉬었던 커넥션만 체크아웃 시 핑하여,
+MySQL wait_timeout이나 NAT/프록시 유휴 타임아웃으로 끊긴 커넥션을 요청 전에 걸러냅니다.
+방금 반납된(LIFO로 주로 재사용되는) 커넥션은 핑 없이 바로 사용합니다.
+"""
+import time
+from typing import Union
+
+from sqlalchemy import Engine, event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+_CHECKIN_AT = "checkin_at"
+
+
+def enable_idle_ping(engine: Union[AsyncEngine, Engine], idle_seconds: float) -> None:
+    """
+    풀에서 idle_seconds초 넘게 쉬었던 커넥션만 체크아웃 시 핑합니다.
+    핑에 실패하면 DisconnectionError로 풀이 해당 커넥션을 버리고 새 커넥션으로 다시 체크아웃합니다.
+    """
+    # 풀 이벤트는 동기 엔진에 등록합니다. (AsyncEngine은 내부의 sync_engine)
+    sync_engine = getattr(engine, "sync_engine", engine)
+    dialect = sync_engine.dialect
+
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        connection_record.info[_CHECKIN_AT] = time.monotonic()
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checkin_at = connection_record.info.get(_CHECKIN_AT)
+        # 새로 연결된 커넥션은 반납 기록이 없으므로 핑하지 않습니다.
+        if checkin_at is None or time.monotonic() - checkin_at <= idle_seconds:
+            return
+        try:
+            alive = dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            raise exc.DisconnectionError(f"유휴 커넥션 핑 실패: {e}") from e
+        if alive is False:
+            raise exc.DisconnectionError("유휴 커넥션 핑 실패")
@@ -7,15 +7,19 @@ import os
 import base64
 import hmac
 import hashlib
+import copy
 import io
+import multiprocessing
+import struct
 import zipfile
-import xml.etree.ElementTree as ET
-from typing import List
+from urllib.parse import unquote
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional
 import asyncio
 
+from lxml import etree
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import padding
 
 from app.domain.models import UndrmInput, UndrmOutput
 
@@ -36,10 +40,188 @@ HMAC_SHA1_KEY_FILE_V2 = bytes([
     0x60, 0x34, 0x4D, 0x2A, 0x71, 0x50, 0x3B, 0x44, 0x64, 0x2B, 0x3D, 0x37, 0x26, 0x2C, 0x4A, 0x44,
 ])
 
+# HMAC 키 스케줄(ipad/opad)을 한 번만 계산해 두고 파일마다 copy()하여 사용합니다.
+_HMAC_SHA1_BASE = hmac.new(HMAC_SHA1_KEY_FILE_V2, digestmod=hashlib.sha1)
+_AES_BLOCK_SIZE = 16
+
+# 네이티브 v2 파일 헤더: (원본 길이, 암호문 길이, 앞부분 HMAC 길이) - 리틀 엔디언 uint32 3개
+_V2_HEADER = struct.Struct("<III")
+
+# encryption.xml에서 암호화된 파일 경로(URI)를 한 번의 XPath 평가로 모두 가져옵니다.
+_XP_CIPHER_REFERENCE_URIS = etree.XPath(
+    ".//enc:EncryptedData/enc:CipherData/enc:CipherReference/@URI",
+    namespaces={"enc": "http://www.w3.org/2001/04/xmlenc#"},
+)
+# 외부 입력이므로 엔티티 확장/네트워크 접근을 막은 파서를 사용합니다.
+_ENC_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+
+# DRM 메타데이터 파일 경로 (복호화된 EPUB에는 포함하지 않음)
+_ENC_XML = "META-INF/encryption.xml"
+# EPUB 표준상 압축하지 않고(STORED) 저장해야 하는 파일
+_MIMETYPE = "mimetype"
+
+# ZIP 로컬 파일 헤더 (30 bytes): 이름/extra 길이를 읽어 압축 데이터의 시작 위치를 계산하는 데 사용
+_LFH = struct.Struct("<4s5H3L2H")
+_LFH_SIG = b"PK\x03\x04"
+_FLAG_DATA_DESCRIPTOR = 0x08
+# 원시 복사는 FastZip이 읽을 수 있는 압축 방식만 허용합니다. (그 외는 해제 후 STORED로 다시 씀)
+_RAW_COPY_METHODS = frozenset((zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED))
+# _copy_entry_raw가 사용하는 zipfile.ZipFile 내부 속성 (CPython 버전에 따라 없으면 원시 복사를 쓰지 않음)
+_ZIPFILE_WRITE_INTERNALS = ("fp", "_lock", "_writecheck", "_didModify", "start_dir", "filelist", "NameToInfo")
+
 # 환경변수/설정에서 동시성 상한 주입 (기본: CPU 코어 * 2, 최소 5)
 _DRM_MAX_CONC = int(os.getenv("DRM_MAX_CONCURRENCY", max(5, (os.cpu_count() or 2)*2)))
 _DRM_SEM = asyncio.BoundedSemaphore(_DRM_MAX_CONC)
 
+# 책 한 권 안의 암호화 파일들을 병렬로 복호화(AES-CBC + HMAC-SHA1)하는 스레드풀.
+# OpenSSL/hashlib이 GIL을 놓고 실행하므로 프로세스 풀 없이도 여러 코어를 사용합니다. (기본: CPU 코어 수)
+_DRM_DECRYPT_WORKERS = int(os.getenv("DRM_DECRYPT_WORKERS", os.cpu_count() or 2))
+_DECRYPT_POOL = ThreadPoolExecutor(max_workers=_DRM_DECRYPT_WORKERS, thread_name_prefix="drm-decrypt")
+
+# 책 한 권 전체의 decrypt(ZIP 읽기/쓰기 포함)를 별도 프로세스에서 실행할 워커 수. (기본 0: 사용 안 함)
+# 복호화 자체는 위 스레드풀에서 GIL 없이 병렬로 돌지만, ZIP 헤더 처리 등 순수 파이썬 구간은 GIL을 잡으므로
+# 동시 요청이 많은 다중 코어 환경에서는 프로세스 풀로 요청 간 병렬성을 높일 수 있습니다.
+# 대신 입력/출력 EPUB 바이트를 프로세스 간에 복사(pickle)하는 비용이 추가됩니다.
+_DRM_PROCESS_WORKERS = int(os.getenv("DRM_PROCESS_WORKERS", "0"))
+_drm_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_drm_process_pool() -> ProcessPoolExecutor:
+    """
+    프로세스 풀을 처음 사용할 때 생성합니다.
+    스레드(복호화 풀, 이벤트 루프 등)가 이미 떠 있는 프로세스를 fork하면 잠금 상태가 복제될 수 있으므로 spawn으로 시작합니다.
+    """
+    global _drm_process_pool
+    if _drm_process_pool is None:
+        _drm_process_pool = ProcessPoolExecutor(
+            max_workers=_DRM_PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _drm_process_pool
+
+
+def shutdown_drm_process_pool() -> None:
+    """애플리케이션 종료 시 프로세스 풀을 정리합니다. (생성된 적이 없으면 아무 일도 하지 않음)"""
+    global _drm_process_pool
+    if _drm_process_pool is not None:
+        _drm_process_pool.shutdown(cancel_futures=True)
+        _drm_process_pool = None
+
+
+def _decrypt_in_process(undrm_input: "UndrmInput") -> "UndrmOutput":
+    """프로세스 풀에서 실행하기 위한 최상위(pickle 가능한) 진입점입니다."""
+    return UndrmAdapter().decrypt(undrm_input)
+
+
+class _ByteArrayWriter(io.RawIOBase):
+    """
+    ZipFile 출력 대상으로 쓰는 bytearray 기반의 seek 가능한 스트림입니다.
+    BytesIO와 달리 결과를 bytes로 복사하지 않고 bytearray(`buf`) 그대로 넘겨,
+    호출자가 사용 후 `clear()`로 메모리를 즉시 해제할 수 있게 합니다.
+    """
+    def __init__(self):
+        super().__init__()
+        self.buf = bytearray()
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, pos: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += len(self.buf)
+        self._pos = pos
+        return pos
+
+    def write(self, b) -> int:
+        n = len(b)
+        if self._pos == len(self.buf):
+            self.buf += b
+        else:
+            # ZipFile이 로컬 헤더를 다시 쓰기 위해 앞쪽으로 seek한 경우
+            self.buf[self._pos:self._pos + n] = b
+        self._pos += n
+        return n
+
+class _MemoryViewReader(io.RawIOBase):
+    """
+    ZipFile 입력으로 쓰는 읽기 전용, seek 가능한 memoryview 스트림입니다.
+    BytesIO는 bytes가 아닌 입력(bytearray 등)을 생성 시 통째로 복사하므로, 대신 원본 버퍼를 그대로 참조합니다.
+    """
+    def __init__(self, view: memoryview):
+        super().__init__()
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, pos: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += len(self._view)
+        self._pos = pos
+        return pos
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else self._pos + size
+        data = bytes(self._view[self._pos:end])
+        self._pos += len(data)
+        return data
+
+    def readinto(self, b) -> int:
+        data = self._view[self._pos:self._pos + len(b)]
+        n = len(data)
+        b[:n] = data
+        self._pos += n
+        return n
+
+def _can_copy_raw(out_zip: zipfile.ZipFile) -> bool:
+    """현재 zipfile 구현이 _copy_entry_raw가 의존하는 내부 속성을 모두 갖고 있는지 확인합니다."""
+    return all(hasattr(out_zip, name) for name in _ZIPFILE_WRITE_INTERNALS)
+
+
+def _copy_entry_raw(src: memoryview, item: zipfile.ZipInfo, out_zip: zipfile.ZipFile) -> None:
+    """
+    암호화되지 않은 엔트리의 압축 데이터를 해제/재압축 없이 그대로 out_zip에 복사합니다.
+    원본의 압축 방식(STORED/DEFLATED)과 CRC/크기 정보를 유지하며, 로컬 헤더는 중앙 디렉토리 값으로 다시 씁니다.
+    (zipfile에는 원시 데이터 복사 API가 없어 writestr과 같은 방식으로 내부 상태를 갱신합니다.
+     호출 전에 _can_copy_raw()로 내부 속성이 있는지 확인해야 합니다.)
+    """
+    sig, _, _, _, _, _, _, _, _, name_len, extra_len = _LFH.unpack_from(src, item.header_offset)
+    if sig != _LFH_SIG:
+        raise zipfile.BadZipFile(f"로컬 파일 헤더 시그니처가 올바르지 않습니다: {item.filename}")
+    data_start = item.header_offset + _LFH.size + name_len + extra_len
+
+    zinfo = copy.copy(item)
+    # 크기/CRC를 로컬 헤더에 바로 기록하므로 데이터 디스크립터는 쓰지 않습니다.
+    zinfo.flag_bits &= ~_FLAG_DATA_DESCRIPTOR
+    # 슬라이스도 원본 버퍼를 붙잡으므로, 예외의 traceback에 남지 않도록 쓰고 나서 바로 release()합니다.
+    with out_zip._lock, src[data_start:data_start + item.compress_size] as raw:
+        out_zip._writecheck(zinfo)
+        out_zip._didModify = True
+        zinfo.header_offset = out_zip.fp.tell()
+        out_zip.fp.write(zinfo.FileHeader())
+        out_zip.fp.write(raw)
+        out_zip.filelist.append(zinfo)
+        out_zip.NameToInfo[zinfo.filename] = zinfo
+        out_zip.start_dir = out_zip.fp.tell()
+
+
 class UndrmAdapter:
     """
     메모리 내에서 EPUB 파일의 DRM을 제거하는 역할을 담당하는 어댑터입니다.
@@ -52,58 +234,65 @@ class UndrmAdapter:
     모든 과정은 디스크 I/O 없이 메모리 내에서만 처리됩니다.
     """
 
-    def _read_uint32_le(self, b: bytes, off: int) -> int:
-        """리틀 엔디언 형식의 4바이트를 부호 없는 32비트 정수로 읽습니다."""
-        return int.from_bytes(b[off:off+4], byteorder="little", signed=False)
-
     def _compute_hmac_sha1(self, data: bytes) -> bytes:
         """주어진 데이터의 HMAC-SHA1 다이제스트를 계산합니다."""
-        return hmac.new(HMAC_SHA1_KEY_FILE_V2, data, hashlib.sha1).digest()
+        h = _HMAC_SHA1_BASE.copy()
+        h.update(data)
+        return h.digest()
 
     def _secure_equals(self, a: bytes, b: bytes) -> bool:
         """타이밍 공격에 안전한 방식으로 두 바이트 시퀀스를 비교합니다."""
         return hmac.compare_digest(a, b)
 
-    def _decrypt_aes256_cbc_pkcs7(self, enc: bytes, key32: bytes, iv: bytes) -> bytes:
-        """AES-256-CBC로 암호화된 데이터를 복호화하고 PKCS7 패딩을 제거합니다."""
-        backend = default_backend()
-        cipher = Cipher(algorithms.AES(key32), modes.CBC(iv), backend=backend)
+    def _new_cipher(self, key32: bytes, iv: bytes = AES_256_IV_FILE) -> Cipher:
+        """
+        AES-256-CBC Cipher 객체를 만듭니다. 키/IV가 책 한 권 안에서 동일하므로
+        decrypt()에서 한 번만 만들고 파일마다 decryptor()만 새로 생성합니다.
+        """
+        return Cipher(algorithms.AES(key32), modes.CBC(iv), backend=default_backend())
+
+    def _decrypt_aes256_cbc(self, enc: bytes, cipher: Cipher) -> bytes:
+        """AES-256-CBC로 암호화된 데이터를 복호화합니다. (PKCS7 패딩은 호출자가 제거)"""
         decryptor = cipher.decryptor()
-        padded = decryptor.update(enc) + decryptor.finalize()
-        unpadder = padding.PKCS7(128).unpadder()
-        data = unpadder.update(padded) + unpadder.finalize()
-        return data
+        padded = decryptor.update(enc)
+        tail = decryptor.finalize()
+        return padded + tail if tail else padded
+
+    def _pkcs7_data_len(self, padded: bytes) -> int:
+        """PKCS7 패딩을 검증하고, 패딩을 제외한 데이터 길이를 반환합니다. (슬라이스 복사 없이 검증만 수행)"""
+        pad = padded[-1] if padded else 0
+        if not (0 < pad <= _AES_BLOCK_SIZE) or padded[-pad:] != bytes((pad,)) * pad:
+            raise ValueError("Invalid padding bytes.")
+        return len(padded) - pad
+
+    def _encrypted_names(self, uris: List[str]) -> frozenset:
+        """
+        encryption.xml의 URI 목록을 ZIP 엔트리 이름 집합으로 변환합니다.
+        URI는 퍼센트 인코딩(`%20` 등)될 수 있으므로 디코딩한 이름도 함께 넣어, 파일마다 O(1) 조회로 매칭합니다.
+        """
+        return frozenset(uris).union(map(unquote, uris))
 
     def _parse_encryption_xml_from_bytes(self, xml_bytes: bytes) -> List[str]:
         """`encryption.xml` 파일의 바이트 데이터를 파싱하여 암호화된 파일 경로 목록을 추출합니다."""
         try:
-            root = ET.fromstring(xml_bytes)
-            ns = {"enc": "http://www.w3.org/2001/04/xmlenc#"}
-            files: List[str] = []
-            for ed in root.findall(".//enc:EncryptedData", ns):
-                cref = ed.find("enc:CipherData/enc:CipherReference", ns)
-                if cref is not None:
-                    uri = cref.attrib.get("URI")
-                    if uri:
-                        files.append(uri)
-            return files
+            root = etree.fromstring(xml_bytes, _ENC_XML_PARSER)
+            return [str(uri) for uri in _XP_CIPHER_REFERENCE_URIS(root) if uri]
         except Exception:
             # XML 파싱 실패 시 빈 목록 반환
             return []
 
-    def _decrypt_file_native_v2(self, data: bytes, key32: bytes) -> bytes:
+    def _decrypt_file_native_v2(self, data: bytes, key32: bytes, cipher: Optional[Cipher] = None) -> bytes:
         """
         네이티브 v2 형식으로 암호화된 단일 파일 데이터를 복호화합니다.
         이 형식은 [헤더][HMAC 일부][암호문][HMAC 나머지] 구조를 가집니다.
+        cipher를 넘기면 파일마다 Cipher를 새로 만들지 않고 재사용합니다.
         """
         if len(data) < 32:
             raise ValueError("암호화된 데이터가 너무 짧습니다.")
 
-        # 1. 헤더 파싱
-        off = 0
-        dst_len = self._read_uint32_le(data, off); off += 4  # 원본 데이터 길이
-        enc_len = self._read_uint32_le(data, off); off += 4  # 암호문 길이
-        hmac_front = self._read_uint32_le(data, off); off += 4  # 앞부분 HMAC 길이
+        # 1. 헤더 파싱 (원본 데이터 길이, 암호문 길이, 앞부분 HMAC 길이)
+        dst_len, enc_len, hmac_front = _V2_HEADER.unpack_from(data)
+        off = _V2_HEADER.size
 
         if not (0 < hmac_front <= 20):
             raise ValueError("잘못된 HMAC 길이입니다.")
@@ -113,26 +302,25 @@ class UndrmAdapter:
         if total_expected > len(data):
             raise ValueError("데이터 길이가 예상과 다릅니다.")
 
-        # 3. HMAC 조각 재구성
-        hmac_bytes = bytearray(20)
-        hmac_bytes[0:hmac_front] = data[off:off+hmac_front]; off += hmac_front
-        enc = data[off:off+enc_len]; off += enc_len
-        if hmac_front < 20:
-            remaining_hmac = 20 - hmac_front
-            hmac_bytes[hmac_front:20] = data[off:off+remaining_hmac]
+        # 3. HMAC 조각 재구성 (암호문 앞/뒤 조각을 이어 붙여 20바이트로 만듦)
+        enc_start = off + hmac_front
+        enc_end = enc_start + enc_len
+        hmac_bytes = data[off:enc_start] + data[enc_end:enc_end + (20 - hmac_front)]
+        # 암호문은 HMAC/AES에 버퍼 프로토콜로 그대로 넘길 수 있으므로 슬라이스 복사 대신 memoryview로 참조합니다.
+        enc = memoryview(data)[enc_start:enc_end]
 
         # 4. HMAC 무결성 검증
         calculated_hmac = self._compute_hmac_sha1(enc)
-        if not self._secure_equals(bytes(hmac_bytes), calculated_hmac):
+        if not self._secure_equals(hmac_bytes, calculated_hmac):
             raise RuntimeError("HMAC 검증에 실패했습니다. 데이터가 변조되었거나 키가 잘못되었습니다.")
 
         # 5. 데이터 복호화
-        plain = self._decrypt_aes256_cbc_pkcs7(enc, key32, AES_256_IV_FILE)
-        if len(plain) < dst_len:
+        padded = self._decrypt_aes256_cbc(enc, cipher or self._new_cipher(key32))
+        if self._pkcs7_data_len(padded) < dst_len:
             raise ValueError("복호화된 데이터가 원본보다 짧습니다.")
 
-        # 6. 원본 길이만큼 잘라서 반환
-        return plain[:dst_len]
+        # 6. 원본 길이만큼 잘라서 반환 (패딩 제거와 길이 맞춤을 한 번의 슬라이스로 처리)
+        return padded[:dst_len]
 
     def decrypt(self, undrm_input: UndrmInput) -> UndrmOutput:
         """
@@ -147,53 +335,91 @@ class UndrmAdapter:
         if len(key) < 32:
             raise ValueError("AES-256 키는 반드시 32바이트 이상이어야 합니다.")
         key32 = key[:32]  # 32바이트로 정규화
+        cipher = self._new_cipher(key32)
 
-        input_buffer = io.BytesIO(undrm_input.encrypted_epub)
-        output_buffer = io.BytesIO()
+        output_buffer = _ByteArrayWriter()
 
         # 2. 입력 EPUB(ZIP) 파일을 읽기 모드로 엽니다.
-        with zipfile.ZipFile(input_buffer, "r") as in_zip:
+        # 입력이 bytes든 bytearray든 원본 버퍼를 복사하지 않고 memoryview로 읽습니다.
+        # 나갈 때 memoryview를 release()해야 호출자의 wipe_buffer()가 bytearray를 실제로 해제(clear)할 수 있습니다.
+        with memoryview(undrm_input.encrypted_epub) as src, zipfile.ZipFile(_MemoryViewReader(src), "r") as in_zip:
             # 3. `encryption.xml`을 찾아 암호화된 파일 목록을 가져옵니다.
             try:
-                enc_xml_bytes = in_zip.read("META-INF/encryption.xml")
-                enc_files = self._parse_encryption_xml_from_bytes(enc_xml_bytes)
+                enc_xml_bytes = in_zip.read(_ENC_XML)
+                # 파일마다 멤버십을 검사하므로 O(1) 조회가 가능한 frozenset으로 보관합니다.
+                enc_files = self._encrypted_names(self._parse_encryption_xml_from_bytes(enc_xml_bytes))
             except KeyError:
                 # `encryption.xml`이 없으면 DRM이 없거나 다른 형식으로 간주하고,
-                # 원본 파일을 그대로 복사하여 반환합니다.
-                input_buffer.seek(0)
-                return UndrmOutput(decrypted_epub=input_buffer.read(), drm_type="V2")
+                # 원본 바이트를 복사 없이 그대로 반환합니다. (bytearray이면 호출자가 사용 후 clear()로 해제)
+                return UndrmOutput(decrypted_epub=undrm_input.encrypted_epub, drm_type="V2")
+
+            # encryption.xml은 있지만 실제로 암호화된 파일이 없으면 ZIP을 다시 만들지 않고 원본을 그대로 반환합니다.
+            if not enc_files:
+                return UndrmOutput(decrypted_epub=undrm_input.encrypted_epub, drm_type="V2")
 
             # 4. 새로운 EPUB(ZIP) 파일을 쓰기 모드로 준비합니다.
             # with zipfile.ZipFile(output_buffer, "w", compression=zipfile.ZIP_DEFLATED) as out_zip:
             with zipfile.ZipFile(output_buffer, "w", compression=zipfile.ZIP_STORED) as out_zip:
+                # DRM 메타데이터 파일은 새 ZIP에 포함하지 않습니다.
+                items = [item for item in in_zip.infolist() if item.filename != _ENC_XML]
+
+                # 5. 암호화된 파일들을 먼저 읽어 스레드풀에 복호화를 맡깁니다. (파일이 1개 이하면 현재 스레드에서 처리)
+                encrypted = [item for item in items if item.filename in enc_files]
+                futures: Dict[str, Future] = {}
+                if len(encrypted) > 1:
+                    for item in encrypted:
+                        # 이름 대신 ZipInfo를 넘겨 이름→엔트리 재조회 없이 이미 파싱된 헤더 정보로 바로 읽습니다.
+                        with in_zip.open(item) as f:
+                            futures[item.filename] = _DECRYPT_POOL.submit(
+                                self._decrypt_file_native_v2, f.read(), key32, cipher
+                            )
 
-                # 5. 원본 ZIP의 모든 파일을 순회합니다.
-                for item in in_zip.infolist():
-                    # DRM 메타데이터 파일은 새 ZIP에 포함하지 않습니다.
-                    if item.filename == "META-INF/encryption.xml":
-                        continue
+                raw_copy = _can_copy_raw(out_zip)
+                try:
+                    # 6. 원본 ZIP의 순서대로 새 ZIP에 씁니다.
+                    for item in items:
+                        # 암호화되지 않은 STORED/DEFLATED 파일은 압축 데이터를 그대로 복사합니다. (mimetype은 항상 STORED)
+                        if (
+                            raw_copy
+                            and item.filename not in enc_files
+                            and item.compress_type in _RAW_COPY_METHODS
+                            and (item.filename != _MIMETYPE or item.compress_type == zipfile.ZIP_STORED)
+                        ):
+                            _copy_entry_raw(src, item, out_zip)
+                            continue
 
-                    content = in_zip.read(item.filename)
-                    # 6. 암호화된 파일 목록에 해당 파일이 있으면 복호화를 수행합니다.
-                    if item.filename in enc_files:
+                        future = futures.get(item.filename)
                         try:
-                            content = self._decrypt_file_native_v2(content, key32)
+                            if future is not None:
+                                content = future.result()
+                            else:
+                                with in_zip.open(item) as f:
+                                    content = f.read()
+                                # 암호화된 파일 목록에 해당 파일이 있으면 복호화를 수행합니다.
+                                if item.filename in enc_files:
+                                    content = self._decrypt_file_native_v2(content, key32, cipher)
                         except Exception as e:
+                            if item.filename not in enc_files:
+                                raise
                             raise RuntimeError(f"파일 복호화에 실패했습니다: {item.filename}") from e
-                    
-                    # 7. 복호화된 (또는 원본) 내용을 새 ZIP에 씁니다.
-                    # EPUB 표준에 따라 'mimetype' 파일은 압축하지 않습니다.
-                    # compress_type = zipfile.ZIP_STORED if item.filename == 'mimetype' else zipfile.ZIP_DEFLATED
-                    # out_zip.writestr(item, content, compress_type=compress_type)
-                    out_zip.writestr(item, content, compress_type=zipfile.ZIP_STORED)
 
-        # 8. 메모리에 생성된 새 EPUB 파일의 바이트를 DTO에 담아 반환합니다.
-        output_buffer.seek(0)
-        return UndrmOutput(decrypted_epub=output_buffer.read(), drm_type="V2")
+                        # 7. 복호화된 (또는 원본) 내용을 새 ZIP에 씁니다.
+                        # EPUB 표준에 따라 'mimetype' 파일은 압축하지 않습니다.
+                        # compress_type = zipfile.ZIP_STORED if item.filename == 'mimetype' else zipfile.ZIP_DEFLATED
+                        # out_zip.writestr(item, content, compress_type=compress_type)
+                        out_zip.writestr(item, content, compress_type=zipfile.ZIP_STORED)
+                finally:
+                    # 실패로 중단된 경우 아직 시작하지 않은 복호화 작업은 취소합니다.
+                    for future in futures.values():
+                        future.cancel()
+
+        # 8. 메모리에 생성된 새 EPUB 파일의 bytearray를 복사 없이 DTO에 담아 반환합니다.
+        return UndrmOutput(decrypted_epub=output_buffer.buf, drm_type="V2")
 
     async def decrypt_async(self, undrm_input: UndrmInput) -> UndrmOutput:
         """
-        동기적인 decrypt 메서드를 별도의 스레드에서 실행하여 비동기적으로 호출합니다.
+        동기적인 decrypt 메서드를 별도의 스레드(또는 DRM_PROCESS_WORKERS > 0이면 별도 프로세스)에서 실행하여 비동기적으로 호출합니다.
+        _DRM_SEM은 CPU가 아니라 동시에 메모리에 올라가는 EPUB 수를 제한하는 용도입니다.
         """
         # async with _DRM_SEM:
         #     return await asyncio.to_thread(self.decrypt, undrm_input)
@@ -202,6 +428,9 @@ class UndrmAdapter:
         await _DRM_SEM.acquire()
         # t1 = time.perf_counter()
         try:
+            if _DRM_PROCESS_WORKERS > 0:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(_get_drm_process_pool(), _decrypt_in_process, undrm_input)
             out = await asyncio.to_thread(self.decrypt, undrm_input)
             return out
         finally:
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+라이선스 조회 결과를 item_id별로 캐시하는 ILicenseService 데코레이터입니다.
+
+같은 item_id에 대한 재시도/재처리 요청은 라이선스 저장소(DB/KMS)를 다시 조회하지 않고
+TTL 동안 메모리에 보관된 키를 사용합니다. 캐시 자체는 lifespan에서 한 번 만들어 `CLIENTS`에 보관하고,
+요청마다 생성되는 서비스 인스턴스들이 이를 공유합니다.
+캐시에 없는 같은 item_id를 여러 요청이 동시에 조회하면, 진행 중인 조회 하나를 함께 기다려 저장소 호출을 한 번으로 합칩니다.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.domain.interfaces import ILicenseService
+
+logger = logging.getLogger(__name__)
+
+
+class LicenseCache:
+    """
+    TTL과 최대 크기를 갖는 LRU 캐시입니다.
+    이벤트 루프 단일 스레드에서만 접근하므로 별도 잠금 없이 사용합니다.
+    """
+    def __init__(self, maxsize: int = 4096, ttl: float = 900.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # item_id별로 진행 중인 저장소 조회 (동시 요청 합치기용)
+        self.inflight: Dict[str, "asyncio.Task[Optional[str]]"] = {}
+
+    def get(self, item_id: str) -> Optional[str]:
+        entry = self._data.get(item_id)
+        if entry is None:
+            return None
+        expires_at, key = entry
+        if expires_at < time.monotonic():
+            del self._data[item_id]
+            return None
+        self._data.move_to_end(item_id)
+        return key
+
+    def put(self, item_id: str, key: str) -> None:
+        self._data[item_id] = (time.monotonic() + self.ttl, key)
+        self._data.move_to_end(item_id)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, item_id: str) -> None:
+        self._data.pop(item_id, None)
+
+
+class CachedLicenseService(ILicenseService):
+    """다른 ILicenseService 구현체를 감싸 조회 결과를 LicenseCache에 보관합니다."""
+    def __init__(self, inner: ILicenseService, cache: LicenseCache):
+        self._inner = inner
+        self._cache = cache
+
+    async def get_license(self, item_id: str) -> Optional[str]:
+        key = self._cache.get(item_id)
+        if key is not None:
+            logger.info(f"[Cache] item_id={item_id} 라이선스 캐시 적중")
+            return key
+
+        task = self._cache.inflight.get(item_id)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(item_id))
+            self._cache.inflight[item_id] = task
+            task.add_done_callback(lambda t: self._on_fetch_done(item_id, t))
+        else:
+            logger.info(f"[Cache] item_id={item_id} 진행 중인 라이선스 조회를 함께 기다립니다.")
+        # 먼저 요청한 쪽이 취소되어도 다른 대기자를 위해 조회는 계속 진행되도록 shield로 감쌉니다.
+        return await asyncio.shield(task)
+
+    async def _fetch(self, item_id: str) -> Optional[str]:
+        key = await self._inner.get_license(item_id)
+        # 조회 실패(None)는 캐시하지 않아 키가 등록되는 즉시 반영되도록 합니다.
+        if key:
+            self._cache.put(item_id, key)
+        return key
+
+    def _on_fetch_done(self, item_id: str, task: "asyncio.Task[Optional[str]]") -> None:
+        if self._cache.inflight.get(item_id) is task:
+            del self._cache.inflight[item_id]
+        # 대기자가 모두 취소된 경우에도 "exception was never retrieved" 경고가 남지 않도록 예외를 소비합니다.
+        if not task.cancelled():
+            task.exception()
+
+    def invalidate(self, item_id: str) -> None:
+        """복호화 실패 등으로 키가 더 이상 유효하지 않을 때 캐시에서 제거합니다. (키 교체 대응)"""
+        self._cache.invalidate(item_id)
+        self._inner.invalidate(item_id)
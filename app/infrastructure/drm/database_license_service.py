@@ -1,41 +1,55 @@
 # database_license_service.py (수정)
 import logging
+from functools import lru_cache
 from typing import Optional
 from sqlalchemy import text, bindparam
+from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine
 from app.domain.interfaces import ILicenseService
 from app.core.exceptions import ExternalServiceError
 
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=8)
+def _license_stmt(table_name: str) -> TextClause:
+    """
+    테이블별 라이선스 조회 쿼리를 한 번만 만들어 재사용합니다.
+    서비스 인스턴스는 요청마다 생성되지만, 같은 statement 객체를 쓰므로 엔진의 컴파일 캐시(compiled cache)에서
+    방언(dialect)별로 컴파일된 결과를 그대로 꺼내 쓰고 요청마다 쿼리를 다시 만들거나 컴파일하지 않습니다.
+    """
+    # 테이블명은 식별자라 바인딩이 불가 → 화이트리스트 검증 권장
+    return text(f"SELECT gkey FROM `{table_name}` WHERE itemId = :item_id").bindparams(
+        bindparam("item_id")
+    )
+
 class DatabaseLicenseService(ILicenseService):
-    def __init__(self, session_factory, table_name: str):
+    def __init__(self, engine: AsyncEngine, table_name: str):
         """
         Args:
-          session_factory: lifespan에서 만든 sessionmaker(AsyncSessionLocal)
+          engine: lifespan에서 만든 공유 AsyncEngine (커넥션 풀 보유)
           table_name: 라이선스 테이블명 (화이트리스트/검증 권장)
         """
-        if not session_factory:
-            raise ValueError("Async session factory가 필요합니다.")
+        if not engine:
+            raise ValueError("AsyncEngine이 필요합니다.")
         if not table_name:
             raise ValueError("데이터베이스 테이블 이름이 필요합니다.")
 
-        self.Session = session_factory
+        self.engine = engine
         self.table_name = table_name
 
-        # 미리 컴파일할 쿼리(바인딩 사용)
-        # 테이블명은 식별자라 바인딩이 불가 → 화이트리스트 검증 권장
-        self._stmt = text(f"SELECT gkey FROM `{self.table_name}` WHERE itemId = :item_id").bindparams(
-            bindparam("item_id")
-        )
+        # 미리 만들어 둔 쿼리(바인딩 사용)를 테이블별로 공유
+        self._stmt = _license_stmt(self.table_name)
         logger.info("DatabaseLicenseService 초기화 완료")
 
     async def get_license(self, item_id: str) -> Optional[str]:
         logger.info(f"[DB] '{self.table_name}'에서 item_id={item_id} 조회")
-        async with self.Session() as session:  # 요청 단위 세션
+        # 단일 SELECT이므로 ORM 세션(identity map/autoflush) 없이 풀에서 커넥션만 빌려 Core로 실행합니다.
+        # (엔진이 autocommit이므로 커넥션 반납 시 ROLLBACK 왕복도 발생하지 않습니다)
+        async with self.engine.connect() as conn:
             try:
-                result = await session.execute(self._stmt, {"item_id": item_id})
+                result = await conn.execute(self._stmt, {"item_id": item_id})
                 return result.scalar_one_or_none()
             except SQLAlchemyError as e:
                 logger.error(f"DB 조회 오류 (item_id={item_id}): {e}")
@@ -1,23 +1,42 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import logging
 from aiobotocore.session import get_session
 import base64
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from botocore.exceptions import ClientError
 from app.core.exceptions import ExternalServiceError
 
 logger = logging.getLogger(__name__)
 
+# (Key ID, 암호문)별 복호화 결과. 같은 암호문의 복호화 결과는 바뀌지 않으므로 프로세스 동안 보관합니다.
+# KmsKeyService는 요청마다 생성되므로 캐시와 진행 중인 호출은 모듈 단위로 공유합니다.
+_plaintext_cache: Dict[Tuple[str, str], str] = {}
+_inflight: Dict[Tuple[str, str], "asyncio.Task[str]"] = {}
+
 class KmsKeyService:
     """
     AWS KMS(Key Management Service)와의 연동을 처리하는 서비스입니다.
     """
-    def __init__(self, aws_profile: Optional[str], region_name: str, key_id: str):
+    def __init__(self, aws_profile: Optional[str], region_name: str, key_id: str, client: Optional[Any] = None):
+        """
+        Args:
+          client: lifespan에서 생성/진입(__aenter__)된 공유 KMS 클라이언트.
+                  없으면 호출마다 세션에서 클라이언트를 만들어 사용합니다.
+        """
         self.key_id = key_id
         self.region_name = region_name
+        self.client = client
         
         # 암호화된 라이선스 키 (테스트용 더미 데이터)
         self.encrypted_license_key_b64 = "ZHVtbXlfZGF0YQ=="
+        # Base64로 인코딩된 암호화 텍스트는 고정값이므로 바이너리로 한 번만 디코딩해 둡니다.
+        self.ciphertext_blob = base64.b64decode(self.encrypted_license_key_b64)
+
+        if client is not None:
+            # 공유 클라이언트가 있으면 세션(자격증명 조회 등)을 만들 필요가 없습니다.
+            self.session = None
+            return
         
         self.session = get_session()
         if aws_profile:
@@ -34,26 +53,46 @@ class KmsKeyService:
         if not self.key_id:
             raise ValueError("KMS Key ID가 설정되지 않았습니다.")
 
+        cache_key = (self.key_id, self.encrypted_license_key_b64)
+        cached = _plaintext_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # 같은 암호문에 대한 KMS 호출은 동시에 하나만 보내고, 나머지 요청은 그 결과를 함께 기다립니다.
+        task = _inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._decrypt_with_kms(item_id))
+            _inflight[cache_key] = task
+            task.add_done_callback(lambda t: _on_decrypt_done(cache_key, t))
+        return await asyncio.shield(task)
+
+    async def _call_decrypt(self, client) -> Dict[str, Any]:
+        return await client.decrypt(
+            KeyId=self.key_id,
+            CiphertextBlob=self.ciphertext_blob
+        )
+
+    async def _decrypt_with_kms(self, item_id: str) -> str:
+        """KMS Decrypt API를 호출하여 암호화된 키를 복호화합니다."""
         logger.info(f"KMS 키 복호화를 시작합니다 (Key ID: {self.key_id}, itemId: {item_id})...")
         
         try:
-            async with self.session.create_client("kms", region_name=self.region_name) as client:
-                # Base64로 인코딩된 암호화 텍스트를 디코딩하여 바이너리로 변환
-                ciphertext_blob = base64.b64decode(self.encrypted_license_key_b64)
-                
-                response = await client.decrypt(
-                    KeyId=self.key_id,
-                    CiphertextBlob=ciphertext_blob
-                )
-                
-                # 복호화된 키는 'Plaintext' 필드에 바이너리로 반환됨
-                decrypted_key_bytes = response['Plaintext']
-                
-                # 문자열 키를 암호화했으므로, UTF-8로 디코딩하여 반환
-                decrypted_key_str = decrypted_key_bytes.decode('utf-8')
-                logger.info("KMS 키 복호화 성공.")
-                
-                return decrypted_key_str
+            if self.client is not None:
+                # 공유 클라이언트는 TLS 연결/자격증명을 재사용하므로 호출마다 클라이언트를 만들지 않습니다.
+                response = await self._call_decrypt(self.client)
+            else:
+                async with self.session.create_client("kms", region_name=self.region_name) as client:
+                    response = await self._call_decrypt(client)
+            
+            # 복호화된 키는 'Plaintext' 필드에 바이너리로 반환됨
+            decrypted_key_bytes = response['Plaintext']
+            
+            # 문자열 키를 암호화했으므로, UTF-8로 디코딩하여 반환
+            decrypted_key_str = decrypted_key_bytes.decode('utf-8')
+            logger.info("KMS 키 복호화 성공.")
+            _plaintext_cache[(self.key_id, self.encrypted_license_key_b64)] = decrypted_key_str
+            
+            return decrypted_key_str
 
         except ClientError as e:
             error_message = f"KMS 키 복호화 중 오류 발생: {e}"
@@ -62,4 +101,12 @@ class KmsKeyService:
         except Exception as e:
             error_message = f"KMS 복호화 중 예상치 못한 오류 발생: {e}"
             logger.error(error_message)
-            raise ExternalServiceError(error_message) from e
\ No newline at end of file
+            raise ExternalServiceError(error_message) from e
+
+
+def _on_decrypt_done(cache_key: Tuple[str, str], task: "asyncio.Task[str]") -> None:
+    if _inflight.get(cache_key) is task:
+        del _inflight[cache_key]
+    # 대기자가 모두 취소된 경우에도 "exception was never retrieved" 경고가 남지 않도록 예외를 소비합니다.
+    if not task.cancelled():
+        task.exception()
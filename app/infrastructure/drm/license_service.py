@@ -13,16 +13,15 @@ class LicenseService(ILicenseService):
     def __init__(self, kms_service: KmsKeyService):
         self.kms_service = kms_service
 
-        async def get_license(self, item_id: str) -> str:
-            """
-            주어진 itemId에 해당하는 라이선스 키를 반환합니다.
-            KMS 서비스를 호출하여 암호화된 키를 복호화합니다.
-            """
-            logger.info(f"KMS를 통해 '{item_id}'의 라이선스 키 조회를 시작합니다.")
-            
-            decrypted_key_str = await self.kms_service.get_decrypted_key(item_id)
-            logger.info(f"'{item_id}'에 대한 라이선스 키를 성공적으로 조회했습니다.")
+    async def get_license(self, item_id: str) -> str:
+        """
+        주어진 itemId에 해당하는 라이선스 키를 반환합니다.
+        KMS 서비스를 호출하여 암호화된 키를 복호화합니다.
+        """
+        logger.info(f"KMS를 통해 '{item_id}'의 라이선스 키 조회를 시작합니다.")
+        
+        decrypted_key_str = await self.kms_service.get_decrypted_key(item_id)
+        logger.info(f"'{item_id}'에 대한 라이선스 키를 성공적으로 조회했습니다.")
 
-            return decrypted_key_str
+        return decrypted_key_str
 
-    
\ No newline at end of file
@@ -1,22 +1,29 @@
 # -*- coding: utf-8 -*-
-import json
+import asyncio
 import logging
-from typing import List
+from typing import Dict, List, Optional
 import math
 import os
+from functools import lru_cache
+
+import httpx
+import orjson
 
 from app.domain.models import LlmInput, LlmStartCandidate, TocItem, FileCharStat
 from app.core.exceptions import LlmApiError, ServerConfigurationError
+from app.utils.langsmith_utils import is_tracing_enabled
 
 # LangChain 및 LangSmith 설정
 try:
     from langchain_openai import ChatOpenAI
+    from langchain_core.messages import HumanMessage, SystemMessage
     from langsmith import traceable
     from langsmith.run_helpers import get_current_run_tree
     LANGCHAIN_INSTALLED = True
 except ImportError:
     LANGCHAIN_INSTALLED = False
     ChatOpenAI = None
+    HumanMessage = SystemMessage = None
     def traceable(*args, **kwargs):
         """LangChain/LangSmith가 없을 때 데코레이터 더미"""
         def decorator(func):
@@ -26,14 +33,74 @@ except ImportError:
     def get_current_run_tree():
         return None
 
-def is_langsmith_available():
-    """LangSmith를 사용할 수 있는지 런타임에 확인합니다."""
-    return LANGCHAIN_INSTALLED and bool(os.getenv("LANGSMITH_API_KEY"))
+# h2가 설치되어 있으면 LLM 호출을 HTTP/2 커넥션 하나에 다중화합니다. (httpx[http2])
+try:
+    import h2  # noqa: F401
+    H2_INSTALLED = True
+except ImportError:
+    H2_INSTALLED = False
 
 logger = logging.getLogger(__name__)
 
+def create_llm_http_client() -> httpx.AsyncClient:
+    """
+    AsyncOpenAI와 ChatOpenAI가 함께 쓰는 httpx 클라이언트를 생성합니다.
+    동시 LLM 호출이 많을 때 요청마다 TCP/TLS 핸드셰이크를 하지 않도록 커넥션 풀을 넉넉히 두고,
+    가능하면 HTTP/2로 여러 요청을 한 커넥션에 실어 보냅니다. (lifespan에서 닫습니다)
+    """
+    from openai import DefaultAsyncHttpxClient
+    return DefaultAsyncHttpxClient(
+        http2=H2_INSTALLED,
+        timeout=httpx.Timeout(20.0, connect=5.0),
+        limits=httpx.Limits(max_connections=256, max_keepalive_connections=128),
+    )
+
+def create_chat_llm(model_name: str, http_async_client: Optional[httpx.AsyncClient] = None):
+    """
+    LangChain ChatOpenAI 클라이언트를 생성합니다.
+    LangChain이 설치되지 않았거나 OpenAI API 키가 없으면 None을 반환합니다.
+    """
+    if not (LANGCHAIN_INSTALLED and os.getenv("OPENAI_API_KEY")):
+        return None
+    return ChatOpenAI(
+        model=model_name,
+        temperature=0.3,
+        http_async_client=http_async_client,
+        model_kwargs={
+            "response_format": {"type": "json_object"}
+        }
+    )
+
+async def warm_up_chat_llm(llm, timeout: float = 5.0) -> None:
+    """
+    모델 정보 조회(models.retrieve)로 ChatOpenAI가 사용하는 커넥션 풀의 TCP/TLS 연결을 미리 맺어 둡니다.
+    첫 요청의 콜드 스타트 지연을 줄이기 위한 것으로, 실패해도 애플리케이션 시작을 막지 않습니다.
+    """
+    if llm is None:
+        return
+    try:
+        await asyncio.wait_for(llm.root_async_client.models.retrieve(llm.model_name), timeout=timeout)
+        logger.info(f"LLM 연결 워밍업 완료 (model: {llm.model_name})")
+    except Exception as e:
+        logger.warning(f"LLM 연결 워밍업 실패 (첫 요청에서 연결합니다): {e}")
+
+@lru_cache(maxsize=8)
+def _system_message(system_prompt: str) -> "SystemMessage":
+    """
+    시스템 프롬프트는 요청마다 같으므로 SystemMessage를 한 번만 만들어 재사용합니다.
+    (LlmClient는 요청마다 생성되므로 인스턴스가 아닌 모듈 단위로 캐시합니다.)
+    """
+    return SystemMessage(content=system_prompt)
+
+
+def _strip_anchor(href: str) -> str:
+    """href에서 앵커(#fragment)를 제외한 파일 경로를 반환합니다. (앵커가 없으면 분할 없이 그대로 반환)"""
+    i = href.find('#')
+    return href if i < 0 else href[:i]
+
+
 class LlmClient:
-    def __init__(self, client, model_name: str, system_prompt: str, user_prompt_template: str):
+    def __init__(self, client, model_name: str, system_prompt: str, user_prompt_template: str, llm=None):
         """
         LangChain 기반 LLM 클라이언트
 
@@ -42,69 +109,81 @@ class LlmClient:
             model_name: 사용할 모델 이름
             system_prompt: 시스템 프롬프트
             user_prompt_template: 사용자 프롬프트 템플릿
+            llm: lifespan에서 생성/워밍업한 공유 ChatOpenAI 클라이언트 (없으면 새로 생성)
         """
         self.legacy_client = client  # 하위 호환성을 위해 유지
         self.model_name = model_name
         self.system_prompt = system_prompt
         self.user_prompt_template = user_prompt_template
 
-        # LangChain ChatOpenAI 클라이언트 생성
-        if LANGCHAIN_INSTALLED and os.getenv("OPENAI_API_KEY"):
-            self.llm = ChatOpenAI(
-                model=model_name,
-                temperature=0.3,
-                model_kwargs={
-                    "response_format": {"type": "json_object"}
-                }
-            )
-            logger.info(f"LangChain ChatOpenAI 클라이언트가 생성되었습니다. (model: {model_name})")
-        else:
-            self.llm = None
+        # LangChain ChatOpenAI 클라이언트 (공유 인스턴스 우선)
+        self.llm = llm if llm is not None else create_chat_llm(model_name)
+        if self.llm is None:
             logger.warning("LangChain이 설치되지 않았거나 OpenAI API 키가 없습니다. LLM 기능이 제한됩니다.")
+        elif llm is None:
+            logger.info(f"LangChain ChatOpenAI 클라이언트가 생성되었습니다. (model: {model_name})")
+
+    def format_input_for_llm(
+        self, toc: List[TocItem], file_stats: List[FileCharStat], use_full_toc_analysis: bool = True,
+        char_counts_map: Optional[Dict[str, int]] = None,
+    ) -> str:
+        """
+        LLM에 전달할 메타데이터를 TOC와 파일 통계를 병합하여 JSON 문자열로 포맷합니다.
+        char_counts_map(LlmInput.char_counts_map)을 넘기면 file_stats로 매핑을 다시 만들지 않습니다.
+        """
+        if char_counts_map is None:
+            char_counts_map = {stat.path: stat.chars for stat in file_stats}
 
-    def format_input_for_llm(self, toc: List[TocItem], file_stats: List[FileCharStat], use_full_toc_analysis: bool = True) -> str:
-        """LLM에 전달할 메타데이터를 TOC와 파일 통계를 병합하여 JSON 문자열로 포맷합니다."""
-        
-        char_counts_map = {stat.path: stat.chars for stat in file_stats}
-        
-        toc_with_chars = []
-        sort = 0
-        for item in toc:
-            path_without_anchor = item.href.split('#')[0]
-            chars = char_counts_map.get(path_without_anchor, 0)
-            sort = sort + 1
-            toc_with_chars.append({
-                "순서": sort, "title": item.title, "href": item.href, "level": item.level, "chars": chars
-            })
-
-        # full_payload가 False일 때 TOC 축약
-        if not use_full_toc_analysis and len(toc_with_chars) >= 7:
-            n = len(toc_with_chars)
+        # full_payload가 False일 때 TOC 축약 (버려질 항목의 dict를 만들지 않도록 먼저 자릅니다)
+        if not use_full_toc_analysis and len(toc) >= 7:
+            n = len(toc)
             limit = max(math.ceil(n / 2), 5)          # 최소 5개 보장
             actual = min(n, limit)                    # 실제로 잘려 나가는 개수
-            toc_with_chars = toc_with_chars[:limit]   # limit가 n보다 커도 안전함
+            toc = toc[:limit]                         # limit가 n보다 커도 안전함
             logger.info(f"TOC가 7개 이상이므로 {actual}개로 축약합니다. (최소 5개 보장)")
 
+        toc_paths = [_strip_anchor(item.href) for item in toc]
+        toc_with_chars = [
+            {
+                "순서": sort, "title": item.title, "href": item.href, "level": item.level,
+                "chars": char_counts_map.get(path, 0),
+            }
+            for sort, (item, path) in enumerate(zip(toc, toc_paths), 1)
+        ]
+        # 목차 항목에 이미 글자 수가 실려 있으므로, file_stats에는 목차가 가리키지 않는 파일만 남겨 프롬프트 토큰을 줄입니다.
+        referenced = set(toc_paths)
+        extra_file_stats = {path: chars for path, chars in char_counts_map.items() if path not in referenced}
+
         metadata = {
-            "task_description": "목차와 각 항목의 글자 수('chars')를 분석하여 실제 내용이 시작되는 첫 번째 항목을 선택하세요.\n목차는 각 장의 표지로 이동 할 수 있으니, file_stats을 추가로 참고하세요.\n입력된 순서가 실제 도서의 순서임을 명심하세요.",
+            "task_description": "목차와 각 항목의 글자 수('chars')를 분석하여 실제 내용이 시작되는 첫 번째 항목을 선택하세요.\n목차는 각 장의 표지로 이동 할 수 있으니, file_stats을 추가로 참고하세요.\nfile_stats에는 목차가 가리키지 않는 본문 파일의 글자 수만 들어 있습니다. (목차가 가리키는 파일의 글자 수는 각 항목의 'chars')\n입력된 순서가 실제 도서의 순서임을 명심하세요.",
             "table_of_contents_with_stats": toc_with_chars,
-            "file_stats": char_counts_map
+            "file_stats": extra_file_stats
         }
-        return json.dumps(metadata, indent=2, ensure_ascii=False)
+        # 들여쓰기 없는 compact JSON으로 직렬화하여 프롬프트 토큰 수와 직렬화 비용을 줄입니다. (한글은 UTF-8 그대로 유지)
+        return orjson.dumps(metadata).decode()
 
     @traceable(
         name="llm_suggest_start_point",
         run_type="llm",
         metadata={"component": "openai_client"}
     )
-    async def suggest_start(self, llm_input: LlmInput, use_full_toc_analysis: bool = True) -> LlmStartCandidate:
+    async def suggest_start(
+        self, llm_input: LlmInput, use_full_toc_analysis: bool = True, user_prompt_content: Optional[str] = None
+    ) -> LlmStartCandidate:
+        """
+        LLM에 본문 시작 파일을 질의합니다.
+        user_prompt_content: 호출자가 format_input_for_llm()으로 이미 만든 입력(예: 디버그 저장용)이 있으면 다시 직렬화하지 않고 사용합니다.
+        """
         if not self.llm:
             raise ServerConfigurationError("LangChain ChatOpenAI 클라이언트가 초기화되지 않았습니다.")
 
-        user_prompt_content = self.format_input_for_llm(llm_input.toc, llm_input.file_char_counts, use_full_toc_analysis)
+        if user_prompt_content is None:
+            user_prompt_content = self.format_input_for_llm(
+                llm_input.toc, llm_input.file_char_counts, use_full_toc_analysis, llm_input.char_counts_map
+            )
 
         # LangSmith 메타데이터 추가
-        if is_langsmith_available():
+        if is_tracing_enabled():
             try:
                 run_tree = get_current_run_tree()
                 if run_tree:
@@ -116,27 +195,26 @@ class LlmClient:
                     })
                     run_tree.add_tags(["epub", "start_point_detection", f"model:{self.model_name}"])
             except Exception as e:
-                logger.warning(f"LangSmith 메타데이터 추가 실패: {e}")
+                logger.warning("LangSmith 메타데이터 추가 실패: %s", e)
 
-        logger.info(f"LangChain ChatOpenAI ({self.model_name}) 호출을 시작합니다...")
+        logger.info("LangChain ChatOpenAI (%s) 호출을 시작합니다...", self.model_name)
 
         try:
             # LangChain을 통한 OpenAI 호출 (자동으로 LangSmith에 트레이싱됨)
-            messages = [
-                ("system", self.system_prompt),
-                ("human", user_prompt_content)
-            ]
+            # 튜플 대신 메시지 객체를 넘겨 LangChain의 메시지 변환을 생략합니다.
+            messages = [_system_message(self.system_prompt), HumanMessage(content=user_prompt_content)]
 
             # ainvoke를 사용하여 비동기 호출
             response = await self.llm.ainvoke(messages)
             response_content = response.content
 
-            logger.info(f"LangChain OpenAI 응답 수신 완료")
+            logger.info("LangChain OpenAI 응답 수신 완료")
 
             if not response_content:
                 raise ValueError("LLM으로부터 빈 응답을 받았습니다.")
 
-            response_data = json.loads(response_content)
+            # orjson은 str/bytes를 모두 그대로 받으므로 별도 decode 없이 파싱합니다.
+            response_data = orjson.loads(response_content)
 
             start_file = response_data.get("file")
             if not start_file:
@@ -150,7 +228,7 @@ class LlmClient:
             )
 
             # LangSmith에 결과 메타데이터 추가
-            if is_langsmith_available():
+            if is_tracing_enabled():
                 try:
                     run_tree = get_current_run_tree()
                     if run_tree:
@@ -165,12 +243,12 @@ class LlmClient:
                         elif result.confidence < 0.5:
                             run_tree.add_tags(["low_confidence"])
                 except Exception as e:
-                    logger.warning(f"LangSmith 결과 메타데이터 추가 실패: {e}")
+                    logger.warning("LangSmith 결과 메타데이터 추가 실패: %s", e)
 
-            logger.info(f"LLM 처리 완료: file={result.file}, confidence={result.confidence}")
+            logger.info("LLM 처리 완료: file=%s, confidence=%s", result.file, result.confidence)
             return result
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"LLM 응답 파싱 실패: {e}\n응답 내용: {response_content if 'response_content' in locals() else 'N/A'}")
             raise LlmApiError("LLM으로부터 유효하지 않은 형식의 응답을 받았습니다.")
         except ValueError as e:
@@ -1,60 +1,205 @@
 # -*- coding: utf-8 -*-
 import logging
-import aioboto3
+import asyncio
 from botocore.exceptions import ClientError
 from app.domain.models import UndrmLog
 from app.domain.interfaces import ILogger
 from app.core.exceptions import ExternalServiceError
-from typing import Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+# create_log의 쓰기는 요청 임계 경로 밖에서 백그라운드로 수행됩니다.
+# 쓰기 완료를 나타내는 Future를 event_id별로 보관하여,
+# update_log가 같은 이벤트의 선행 쓰기를 기다린 뒤 갱신할 수 있게 합니다.
+_pending_creates: Dict[str, "asyncio.Future[None]"] = {}
+
+# BatchWriteItem 한 번에 보낼 수 있는 최대 항목 수와, 배치가 덜 찼을 때 기다리는 최대 시간
+_BATCH_MAX_ITEMS = 25
+_BATCH_FLUSH_INTERVAL = 0.1
+_BATCH_MAX_ATTEMPTS = 5
+
+
+class _PutBatcher:
+    """
+    테이블 하나에 대한 감사 로그 쓰기를 모아 BatchWriteItem으로 보냅니다.
+    25건이 모이거나 첫 항목이 들어온 지 _BATCH_FLUSH_INTERVAL초가 지나면 전송합니다.
+    이벤트 루프 단일 스레드에서만 접근하므로 별도 잠금 없이 사용합니다.
+    """
+    def __init__(self, client, table_name: str):
+        self.client = client
+        self.table_name = table_name
+        self._items: List[Tuple[Dict[str, Any], "asyncio.Future[None]"]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._writes: Set[asyncio.Task] = set()
+
+    def add(self, item: Dict[str, Any]) -> "asyncio.Future[None]":
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        self._items.append((item, done))
+        if len(self._items) >= _BATCH_MAX_ITEMS:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(_BATCH_FLUSH_INTERVAL, self.flush)
+        return done
+
+    def flush(self) -> None:
+        """모인 항목을 즉시 전송하도록 예약합니다."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._items:
+            batch, self._items = self._items[:_BATCH_MAX_ITEMS], self._items[_BATCH_MAX_ITEMS:]
+            task = asyncio.create_task(self._write(batch))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    async def _write(self, batch: List[Tuple[Dict[str, Any], "asyncio.Future[None]"]]) -> None:
+        requests = [{"PutRequest": {"Item": item}} for item, _ in batch]
+        try:
+            for attempt in range(_BATCH_MAX_ATTEMPTS):
+                resp = await self.client.batch_write_item(RequestItems={self.table_name: requests})
+                # 처리량 초과 등으로 일부 항목이 남으면 남은 항목만 백오프 후 재전송합니다.
+                requests = (resp.get("UnprocessedItems") or {}).get(self.table_name) or []
+                if not requests:
+                    break
+                await asyncio.sleep(min(1.0, 0.05 * 2 ** attempt))
+            if requests:
+                logger.error(f"DynamoDB 감사 로그 {len(requests)}건을 기록하지 못했습니다. (재시도 초과)")
+            else:
+                logger.info(f"감사 로그 {len(batch)}건 배치 기록 성공")
+        except Exception:
+            logger.exception(f"DynamoDB 감사 로그 배치 기록 중 예외 ({len(batch)}건)")
+        finally:
+            # 쓰기 실패는 요청 흐름을 막지 않으므로, 성공/실패와 무관하게 대기자를 깨웁니다.
+            for _, done in batch:
+                if not done.done():
+                    done.set_result(None)
+
+
+# DynamoDBLogger는 요청마다 생성되므로, 배치는 (클라이언트, 테이블 이름)별로 모듈 단위에서 공유합니다.
+# 클라이언트를 키에 포함해야 lifespan/open_runtime이 새 클라이언트를 만들었을 때 닫힌 이전 클라이언트로 보내지 않습니다.
+# (배치가 클라이언트를 참조하므로 항목이 남아 있는 동안 id가 재사용되지 않음) drain_pending_logs()가 비웁니다.
+_batchers: Dict[Tuple[int, str], _PutBatcher] = {}
+
+
+def _to_attribute_value(value: Any) -> Dict[str, Any]:
+    """
+    감사 로그 필드 값을 DynamoDB AttributeValue로 직접 변환합니다.
+    리소스(Table) 계층의 범용 TypeSerializer를 거치지 않으므로, UndrmLog처럼 문자열 위주의 작은 항목은 변환 비용이 수 배 줄어듭니다.
+    """
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, (int, float)):
+        return {"N": str(value)}
+    if isinstance(value, dict):
+        return {"M": {k: _to_attribute_value(v) for k, v in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {"L": [_to_attribute_value(v) for v in value]}
+    raise TypeError(f"DynamoDB로 직렬화할 수 없는 값입니다: {type(value)!r}")
+
+
+async def drain_pending_logs(timeout: float = 10.0) -> None:
+    """
+    아직 끝나지 않은 감사 로그 쓰기를 기다립니다. (lifespan 종료 시 클라이언트를 닫기 전에 호출)
+    배치는 곧 닫힐 클라이언트를 참조하므로, 보낸 뒤에는 모두 버려 다음 클라이언트가 새 배치를 만들게 합니다.
+    """
+    # 타이머를 기다리지 않고 모여 있는 배치를 바로 보냅니다.
+    batchers = list(_batchers.values())
+    _batchers.clear()
+    for batcher in batchers:
+        batcher.flush()
+    tasks = list(_pending_creates.values())
+    if tasks:
+        logger.info(f"대기 중인 감사 로그 쓰기 {len(tasks)}건을 마무리합니다...")
+        await asyncio.wait(tasks, timeout=timeout)
+
 class DynamoDBLogger(ILogger):
     """
     AWS DynamoDB를 사용하여 감사 로그를 기록하는 로거 구현체입니다.
-    테이블/리소스는 lifespan에서 싱글턴으로 관리.
+    클라이언트는 lifespan에서 싱글턴으로 관리.
+
+    리소스(Table) 계층 대신 하위 DynamoDB 클라이언트를 직접 사용하여,
+    호출마다 TypeSerializer로 마샬링하지 않고 미리 변환한 AttributeValue를 그대로 보냅니다.
     """
-    def __init__(self, table):
-        self.table = table
-        self.table_name = getattr(table, "name", "<unknown>")
+    def __init__(self, client, table_name: str):
+        self.client = client
+        self.table_name = table_name
         logger.info(f"DynamoDBLogger 초기화 (테이블: {self.table_name})")
 
+    def _batcher(self) -> _PutBatcher:
+        key = (id(self.client), self.table_name)
+        batcher = _batchers.get(key)
+        if batcher is None:
+            batcher = _batchers[key] = _PutBatcher(self.client, self.table_name)
+        return batcher
+
+    @staticmethod
+    def _to_item(log_data: UndrmLog) -> Dict[str, Any]:
+        return {k: _to_attribute_value(v) for k, v in log_data.model_dump().items()}
+
     async def create_log(self, log_data: UndrmLog) -> str:
-        item = log_data.model_dump()
+        """
+        감사 로그를 배치 쓰기 버퍼에 넣고 event_id를 즉시 반환합니다.
+        버퍼는 25건이 모이거나 0.1초가 지나면 BatchWriteItem 한 번으로 기록됩니다.
+        쓰기 실패는 요청 흐름을 막지 않고 에러 로그로만 남습니다.
+        (event_id는 UUID이므로 BatchWriteItem이 지원하지 않는 중복 방지 조건 없이 씁니다.)
+        """
+        event_id = log_data.event_id
+        done = self._batcher().add(self._to_item(log_data))
+        _pending_creates[event_id] = done
+        done.add_done_callback(lambda _: _pending_creates.pop(event_id, None))
+        return event_id
+
+    async def create_log_now(self, log_data: UndrmLog) -> str:
+        """배치를 거치지 않고 조건부 PutItem으로 즉시 기록합니다. (기록 완료까지 기다려야 하는 경우)"""
+        await self._put_log(log_data)
+        return log_data.event_id
+
+    async def _put_log(self, log_data: UndrmLog) -> None:
+        item = self._to_item(log_data)
         try:
             # 중복 삽입 방지: event_id가 없을 때만 쓰기
-            await self.table.put_item(
+            await self.client.put_item(
+                TableName=self.table_name,
                 Item=item,
                 ConditionExpression="attribute_not_exists(event_id)",
             )
             logger.info(f"감사 로그 생성 성공 (Event ID: {log_data.event_id})")
-            return log_data.event_id
         except ClientError as e:
             code = e.response.get("Error", {}).get("Code")
-            # 조건 실패는 멱등성 충족 → 성공으로 간주 가능(원하면 그대로 통과)
+            # 조건 실패는 멱등성 충족 → 성공으로 간주
             if code == "ConditionalCheckFailedException":
                 logger.warning(f"이미 존재하는 로그 (Event ID: {log_data.event_id})")
-                return log_data.event_id
+                return
             msg = e.response.get("Error", {}).get("Message", str(e))
-            logger.error(f"DynamoDB 로그 생성 실패: {msg}")
-            raise ExternalServiceError(f"DynamoDB 로그 생성 실패: {msg}") from e
-        except Exception as e:
-            logger.exception("DynamoDB 로그 생성 중 예외")
-            raise ExternalServiceError(f"DynamoDB 로그 생성 중 예외: {e}") from e
+            logger.error(f"DynamoDB 로그 생성 실패 (Event ID: {log_data.event_id}): {msg}")
+        except Exception:
+            logger.exception(f"DynamoDB 로그 생성 중 예외 (Event ID: {log_data.event_id})")
 
     async def update_log(
         self, event_id: str, status: str, end_time: str, failure_reason: Optional[str] = None
     ):
         update_expression = "SET #status = :status, undrm_end_time = :end_time"
         expr_names = {"#status": "status"}
-        expr_values = {":status": status, ":end_time": end_time}
+        expr_values = {":status": {"S": status}, ":end_time": {"S": end_time}}
         if failure_reason:
             update_expression += ", failure_reason = :reason"
-            expr_values[":reason"] = failure_reason
+            expr_values[":reason"] = {"S": failure_reason}
+
+        pending = _pending_creates.get(event_id)
+        if pending is not None:
+            # 선행 create_log 쓰기가 끝난 뒤에 갱신해야 PROCESSING 상태로 덮어써지지 않습니다.
+            await asyncio.shield(pending)
 
         try:
-            await self.table.update_item(
-                Key={"event_id": event_id},
+            await self.client.update_item(
+                TableName=self.table_name,
+                Key={"event_id": {"S": event_id}},
                 UpdateExpression=update_expression,
                 ExpressionAttributeNames=expr_names,
                 ExpressionAttributeValues=expr_values,
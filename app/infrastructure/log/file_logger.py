@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import logging
 import json
 import os
+from typing import Any, Dict, Optional
 from app.domain.models import UndrmLog
 from app.domain.interfaces import ILogger
 
@@ -10,7 +12,12 @@ logger = logging.getLogger(__name__)
 class FileLogger(ILogger):
     """
     파일 기반 로거의 구현체입니다.
-    로그를 프로젝트 루트의 'logs/' 디렉토리에 JSON 파일로 기록합니다.
+    로그를 프로젝트 루트의 'logs/' 디렉토리에 이벤트별 NDJSON 파일로 기록합니다.
+
+    상태가 바뀔 때마다 파일 전체를 읽고 다시 쓰는 대신 한 줄씩 덧붙이기(append)만 하므로,
+    갱신 비용이 파일 크기와 무관하고 쓰는 도중 중단되어도 앞선 기록이 손상되지 않습니다.
+    최종 상태는 `load_log()`로 줄들을 순서대로 합쳐 복원합니다.
+    파일 I/O는 이벤트 루프를 막지 않도록 스레드에서 수행합니다.
     """
     def __init__(self, log_dir: str = "logs"):
         self.log_dir = log_dir
@@ -19,36 +26,53 @@ class FileLogger(ILogger):
         logger.info(f"FileLogger가 '{self.log_dir}' 디렉토리에 로그를 기록합니다.")
 
     def _get_log_path(self, event_id: str) -> str:
-        return os.path.join(self.log_dir, f"{event_id}.json")
+        return os.path.join(self.log_dir, f"{event_id}.ndjson")
+
+    def _append(self, event_id: str, record: Dict[str, Any]) -> None:
+        with open(self._get_log_path(event_id), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    async def create_log(self, log_data: UndrmLog) -> str:
+        """초기 감사 로그를 NDJSON 파일의 첫 줄로 기록합니다."""
+        return await asyncio.to_thread(self._create_log_sync, log_data)
 
-    def create_log(self, log_data: UndrmLog) -> str:
-        """초기 감사 로그를 JSON 파일로 생성합니다."""
+    async def update_log(self, event_id: str, status: str, end_time: str, failure_reason: str = None):
+        """바뀐 필드만 담은 갱신 이벤트를 한 줄 덧붙입니다."""
+        await asyncio.to_thread(self._update_log_sync, event_id, status, end_time, failure_reason)
+
+    def _create_log_sync(self, log_data: UndrmLog) -> str:
         try:
-            log_path = self._get_log_path(log_data.event_id)
-            with open(log_path, 'w', encoding='utf-8') as f:
-                f.write(log_data.model_dump_json(indent=2))
+            self._append(log_data.event_id, {"event": "create", **log_data.model_dump(mode="json")})
             logger.info(f"--- AUDIT LOG CREATED --- (Event ID: {log_data.event_id})")
             return log_data.event_id
         except IOError as e:
             logger.error(f"파일 로그 생성 실패: {e}")
             return log_data.event_id
 
-    def update_log(self, event_id: str, status: str, end_time: str, failure_reason: str = None):
-        """기존 로그 JSON 파일을 읽어 상태를 업데이트합니다."""
-        log_path = self._get_log_path(event_id)
+    def _update_log_sync(self, event_id: str, status: str, end_time: str, failure_reason: str = None):
+        if not os.path.exists(self._get_log_path(event_id)):
+            logger.error(f"업데이트할 로그 파일을 찾을 수 없습니다: {self._get_log_path(event_id)}")
+            return
+        record = {"event": "update", "status": status, "undrm_end_time": end_time}
+        if failure_reason:
+            record["failure_reason"] = failure_reason
         try:
-            with open(log_path, 'r+', encoding='utf-8') as f:
-                log_data = json.load(f)
-                log_data['status'] = status
-                log_data['undrm_end_time'] = end_time
-                if failure_reason:
-                    log_data['failure_reason'] = failure_reason
-                
-                f.seek(0)
-                f.truncate()
-                json.dump(log_data, f, indent=2)
+            self._append(event_id, record)
             logger.info(f"--- AUDIT LOG UPDATED --- (Event ID: {event_id})")
-        except FileNotFoundError:
-            logger.error(f"업데이트할 로그 파일을 찾을 수 없습니다: {log_path}")
-        except (IOError, json.JSONDecodeError) as e:
+        except IOError as e:
             logger.error(f"파일 로그 업데이트 실패: {e}")
+
+    def load_log(self, event_id: str) -> Optional[Dict[str, Any]]:
+        """기록된 이벤트들을 순서대로 합쳐 로그의 최종 상태를 반환합니다. (파일이 없으면 None)"""
+        state: Dict[str, Any] = {}
+        try:
+            with open(self._get_log_path(event_id), 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    record.pop("event", None)
+                    state.update(record)
+        except FileNotFoundError:
+            return None
+        return state
@@ -1,116 +1,231 @@
 # -*- coding: utf-8 -*-
 import logging
 import asyncio
-import io
+import base64
 import random
 from typing import Optional
 
-from botocore.exceptions import ClientError, EndpointConnectionError, ConnectionClosedError
+from botocore.exceptions import ClientError, ConnectionClosedError
 from app.core.exceptions import EpubFileNotFoundError, ExternalServiceError
 
+# google-crc32c는 SSE4.2/ARMv8 CRC 명령어로 수 GB/s에 CRC32C를 계산합니다. 설치되지 않은 경우 체크섬 검증을 건너뜁니다.
+try:
+    import google_crc32c
+    CRC32C_INSTALLED = True
+except ImportError:
+    CRC32C_INSTALLED = False
+
 logger = logging.getLogger(__name__)
 
 # 서버 전역 동시 S3 다운로드 제한 (머신/네트워크에 맞게 조정)
 _S3_DOWNLOAD_SEMAPHORE = asyncio.Semaphore(8)
 
+# 객체 하나를 나눠 받을 때의 기본 동시 Range GET 수와 구간 크기 하한
+DEFAULT_PARALLEL_READS = 16
+DEFAULT_MIN_PART_SIZE = 1 * 1024 * 1024  # 1MB
+_STREAM_CHUNK_SIZE = 256 * 1024  # 응답 바디를 읽어 bytearray에 옮기는 단위
+
+# 구간 다운로드 재시도 정책
+_MAX_RETRIES = 5
+_MAX_BACKOFF = 10.0
+# 재시도해도 결과가 바뀌지 않는 S3 오류 코드 (즉시 실패)
+_NON_RETRYABLE_CODES = frozenset({"NoSuchKey", "NoSuchBucket", "AccessDenied", "403", "404"})
+
+
+def _should_retry(exc: BaseException) -> bool:
+    """권한 없음/객체 없음 등 영구적인 오류는 False, 네트워크/5xx/스로틀링 등 일시적인 오류는 True를 반환합니다."""
+    if isinstance(exc, ClientError):
+        return exc.response.get("Error", {}).get("Code") not in _NON_RETRYABLE_CODES
+    return True
+
+
+def _backoff_delay(attempt: int) -> float:
+    """지수 백오프 + 지터 (상한 _MAX_BACKOFF초)."""
+    return min(_MAX_BACKOFF, (2 ** attempt) * 0.2 + random.random())
+
+
+def _full_object_crc32c(resp) -> Optional[str]:
+    """
+    응답 헤더의 ChecksumCRC32C가 객체 전체에 대한 값일 때만 반환합니다.
+    멀티파트 업로드의 합성(COMPOSITE) 체크섬("...-N")은 파트별 체크섬의 체크섬이므로 전체 바이트와 대조할 수 없습니다.
+    """
+    checksum = resp.get("ChecksumCRC32C") if resp else None
+    if not checksum or "-" in checksum or resp.get("ChecksumType", "FULL_OBJECT") != "FULL_OBJECT":
+        return None
+    return checksum
+
+
+def _crc32c_b64(data) -> str:
+    """S3 헤더와 같은 형식(빅엔디언 4바이트의 base64)으로 CRC32C를 계산합니다."""
+    return base64.b64encode(google_crc32c.value(data).to_bytes(4, "big")).decode()
+
 class S3Client:
     """
     앱 시작 시 lifespan에서 생성한 싱글톤 aioboto3 S3 클라이언트를 주입받아 사용합니다.
     """
 
-    def __init__(self, s3_client):
+    def __init__(self, s3_client, parallel_reads: int = DEFAULT_PARALLEL_READS,
+                 min_part_size: int = DEFAULT_MIN_PART_SIZE):
         """
         Args:
             s3_client: lifespan에서 __aenter__된 공유 aioboto3 s3 client
+            parallel_reads: 객체 하나를 내려받을 때 동시에 수행할 최대 Range GET 수
+            min_part_size: Range GET 한 번의 최소 구간 크기이자 첫 구간 크기 (boto3 TransferConfig의 multipart_chunksize에 해당)
         """
         self.s3 = s3_client
+        self.parallel_reads = max(1, int(parallel_reads))
+        self.min_part_size = max(1, int(min_part_size))
         logger.info("S3Client가 공유 s3 클라이언트로 초기화되었습니다.")
 
-    async def _head(self, bucket: str, key: str):
+    async def _get_first_part(self, bucket: str, key: str):
+        """
+        첫 구간을 Range GET으로 요청하고, 응답 헤더(Content-Range)에서 객체 전체 크기를 얻습니다.
+        별도의 HEAD 요청 없이 크기 확인과 첫 구간 다운로드를 한 번의 왕복으로 처리합니다.
+
+        Returns:
+            tuple: (첫 구간 응답 또는 빈 객체이면 None, 객체 전체 크기)
+        """
         try:
-            return await self.s3.head_object(Bucket=bucket, Key=key)
+            # 검증할 수 있을 때만 체크섬 헤더를 요청합니다. (Range가 무시되어 전체 객체가 온 경우에만 체크섬이 함께 옵니다)
+            extra = {"ChecksumMode": "ENABLED"} if CRC32C_INSTALLED else {}
+            resp = await self.s3.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{self.min_part_size - 1}", **extra)
         except ClientError as e:
-            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            code = e.response.get("Error", {}).get("Code")
+            if code in ("404", "NoSuchKey"):
                 raise EpubFileNotFoundError(f"S3 버킷 '{bucket}'에서 '{key}' 파일을 찾을 수 없습니다.")
+            if code == "InvalidRange":
+                # 0바이트 객체에는 Range 요청이 416으로 거절됩니다.
+                return None, 0
             raise
+        content_range = resp.get("ContentRange")  # "bytes 0-1048575/3145851"
+        if content_range:
+            return resp, int(content_range.rsplit("/", 1)[1])
+        # Range가 무시되고 전체 객체가 온 경우
+        if resp.get("ContentLength") is not None:
+            return resp, resp["ContentLength"]
+        # 크기 정보가 전혀 없는 응답일 때만 HEAD로 확인합니다.
+        meta = await self.s3.head_object(Bucket=bucket, Key=key)
+        return resp, meta.get("ContentLength") or 0
 
-    async def get_object_bytes(self, bucket: str, key: str) -> bytes:
+    async def get_object_bytes(self, bucket: str, key: str) -> bytearray:
         """
-        견고한 다운로드: Range GET으로 스트리밍 + 재시도/재개.
-        중간에 끊겨도 이어받기 때문에 ContentLengthError/EOF에 강함.
+        견고한 병렬 다운로드: 첫 구간 Range GET의 응답으로 크기를 확인한 뒤, 나머지를 최대 `parallel_reads`개 구간으로 나눠
+        Range GET을 동시에 수행하고 각 구간을 미리 할당한 bytearray의 해당 오프셋에 바로 기록합니다.
+        구간별로 재시도/재개하므로 중간에 끊겨도 이어받기 때문에 ContentLengthError/EOF에 강함.
+        받은 bytearray는 bytes로 복사하지 않고 그대로 반환하여 최대 메모리를 객체 크기 1배로 유지합니다.
+        google-crc32c가 설치되어 있고 객체에 전체 CRC32C가 저장되어 있으면 조립한 버퍼와 대조합니다.
+        Range GET 응답에는 객체 전체 체크섬이 오지 않으므로, 구간 다운로드와 동시에 HeadObject로 받아옵니다.
         """
         logger.info(f"S3 객체 다운로드 시작: s3://{bucket}/{key}")
         async with _S3_DOWNLOAD_SEMAPHORE:
             try:
-                meta = await self._head(bucket, key)
+                first, total = await self._get_first_part(bucket, key)
             except EpubFileNotFoundError:
                 logger.error(f"파일 없음: s3://{bucket}/{key}")
                 raise
             except Exception as e:
-                logger.exception("HEAD 실패")
-                raise ExternalServiceError(f"S3 HEAD 실패: {e}") from e
-
-            total = meta.get("ContentLength")
-            checksum = meta.get("ChecksumSHA256")  # 업로드 시 설정했다면 검증에 활용 가능
-
-            buf = io.BytesIO()
-            pos = 0
-            max_retries = 5
-            chunk_size = 8 * 1024 * 1024  # 8MB
-
-            while pos < total:
-                end = min(pos + chunk_size - 1, total - 1)
-                attempt = 0
-                while True:
-                    try:
-                        resp = await self.s3.get_object(
-                            Bucket=bucket, Key=key, Range=f"bytes={pos}-{end}"
-                        )
-                        async with resp["Body"] as body:
-                            part = await body.read()
-                            if part:
-                                buf.write(part)
-                        pos = buf.tell()
-                        break  # 청크 성공 → 다음 청크로
-                    except ClientError as e:
-                        # 404/403 등 단번에 중단할 에러
-                        if e.response["Error"]["Code"] in ("NoSuchKey", "AccessDenied"):
-                            logger.error(f"S3 접근 오류: {e}")
-                            raise ExternalServiceError(f"S3 접근 오류: {e}") from e
-                        # 그 외는 재시도
-                        attempt += 1
-                        if attempt > max_retries:
-                            logger.exception("S3 청크 재시도 초과")
-                            raise ExternalServiceError(f"S3 청크 재시도 초과: {e}") from e
-                        await asyncio.sleep(min(10, (2 ** attempt) * 0.2 + random.random()))
-                    except (EndpointConnectionError, ConnectionClosedError, asyncio.TimeoutError) as e:
-                        attempt += 1
-                        if attempt > max_retries:
-                            logger.exception("네트워크/타임아웃 재시도 초과")
-                            raise ExternalServiceError(f"S3 네트워크 오류: {e}") from e
-                        await asyncio.sleep(min(10, (2 ** attempt) * 0.2 + random.random()))
-                    except Exception as e:
-                        attempt += 1
-                        if attempt > max_retries:
-                            logger.exception("예상치 못한 예외 재시도 초과")
-                            raise ExternalServiceError(f"S3 다운로드 실패: {e}") from e
-                        await asyncio.sleep(min(10, (2 ** attempt) * 0.2 + random.random()))
-
-            data = buf.getvalue()
-
-            # 길이 검증 (헤더 약속과 실제 바이트가 맞는지)
-            if total is not None and len(data) != total:
-                logger.error(f"길이 불일치: expected={total}, got={len(data)}")
-                raise ExternalServiceError(
-                    f"S3 다운로드 길이 불일치 (expected={total}, got={len(data)})"
-                )
+                logger.exception("첫 구간 GET 실패")
+                raise ExternalServiceError(f"S3 GET 실패: {e}") from e
+
+            buf = bytearray(total)
+            mv = memoryview(buf)
 
-            # (옵션) 체크섬 검증 – 업로드 시 ChecksumSHA256 사용했다면 여기에 대조
-            # if checksum:
-            #     import base64, hashlib
-            #     got = base64.b64encode(hashlib.sha256(data).digest()).decode()
-            #     if got != checksum:
-            #         raise ExternalServiceError("S3 체크섬 불일치")
+            # 첫 구간 이후의 나머지를 parallel_reads개로 나누되, 너무 작은 구간은 요청 오버헤드만 늘리므로 하한을 둡니다.
+            first_end = min(total, self.min_part_size)
+            rest = total - first_end
+            part_size = max(self.min_part_size, -(-rest // self.parallel_reads)) if rest else 0
+            ranges = [(pos, min(pos + part_size, total)) for pos in range(first_end, total, part_size or 1)]
+            expected_crc32c = _full_object_crc32c(first) if CRC32C_INSTALLED else None
 
-            logger.info(f"S3 객체 다운로드 완료: {len(data)} bytes")
-            return data
+            tasks = [
+                asyncio.ensure_future(self._read_first_part_into(first, mv[:first_end], bucket, key)),
+                *(asyncio.ensure_future(self._get_range_into(mv[start:end], bucket, key, start)) for start, end in ranges),
+            ]
+            checksum_task = None
+            if CRC32C_INSTALLED and expected_crc32c is None and total:
+                checksum_task = asyncio.ensure_future(self._head_full_object_crc32c(bucket, key))
+                tasks.append(checksum_task)
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                # 한 구간이 실패하면 나머지 구간의 재시도/기록을 멈추고, 실제로 끝난 뒤에 예외를 전달합니다.
+                # (호출자가 실패를 받은 뒤에 buf에 쓰거나 S3에 재요청하지 않도록)
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            finally:
+                mv.release()
+
+            if checksum_task is not None:
+                expected_crc32c = checksum_task.result()
+            if expected_crc32c is not None:
+                actual = _crc32c_b64(buf)
+                if actual != expected_crc32c:
+                    logger.error(f"S3 체크섬 불일치: s3://{bucket}/{key} (expected={expected_crc32c}, actual={actual})")
+                    raise ExternalServiceError("S3 객체 CRC32C 체크섬이 일치하지 않습니다.")
+
+            logger.info(f"S3 객체 다운로드 완료: {total} bytes ({len(ranges) + (1 if total else 0)}개 구간)")
+            return buf
+
+    async def _head_full_object_crc32c(self, bucket: str, key: str) -> Optional[str]:
+        """
+        HeadObject(ChecksumMode=ENABLED)로 객체 전체의 CRC32C를 조회합니다.
+        체크섬 검증은 부가 기능이므로, 조회에 실패하면 경고만 남기고 None(검증 생략)을 반환합니다.
+        """
+        try:
+            meta = await self.s3.head_object(Bucket=bucket, Key=key, ChecksumMode="ENABLED")
+        except Exception as e:
+            logger.warning(f"S3 체크섬 조회 실패, 검증을 건너뜁니다: s3://{bucket}/{key} ({e})")
+            return None
+        return _full_object_crc32c(meta)
+
+    async def _read_first_part_into(self, resp, out: memoryview, bucket: str, key: str) -> None:
+        """이미 받은 첫 구간 응답의 바디를 `out`에 기록합니다. 중간에 끊기면 남은 부분을 이어받습니다."""
+        if resp is None:
+            return
+        size = len(out)
+        written = 0
+        try:
+            async with resp["Body"] as body:
+                async for part in body.iter_chunks(_STREAM_CHUNK_SIZE):
+                    n = min(len(part), size - written)
+                    out[written:written + n] = part[:n]
+                    written += n
+        except Exception as e:
+            logger.warning(f"S3 첫 구간 수신 중단, 이어받기: {e}")
+        if written < size:
+            await self._get_range_into(out[written:], bucket, key, written)
+
+    async def _get_range_into(self, out: memoryview, bucket: str, key: str, start: int) -> None:
+        """
+        [start, start + len(out)) 구간을 Range GET으로 받아 `out`에 직접 기록합니다.
+        실패 시 이미 받은 위치부터 이어서 재시도합니다.
+        """
+        size = len(out)
+        written = 0
+        attempt = 0
+
+        while written < size:
+            try:
+                resp = await self.s3.get_object(
+                    Bucket=bucket, Key=key, Range=f"bytes={start + written}-{start + size - 1}"
+                )
+                async with resp["Body"] as body:
+                    async for part in body.iter_chunks(_STREAM_CHUNK_SIZE):
+                        n = min(len(part), size - written)
+                        out[written:written + n] = part[:n]
+                        written += n
+                if written < size:
+                    # 헤더 약속보다 짧게 끝난 응답 → 남은 구간을 재요청
+                    raise ConnectionClosedError(endpoint_url=f"s3://{bucket}/{key}")
+            except Exception as e:
+                # 404/403 등 재시도해도 소용없는 에러는 대기 없이 바로 중단
+                if not _should_retry(e):
+                    logger.error(f"S3 접근 오류: {e}")
+                    raise ExternalServiceError(f"S3 접근 오류: {e}") from e
+                attempt += 1
+                if attempt > _MAX_RETRIES:
+                    logger.exception("S3 구간 다운로드 재시도 초과")
+                    raise ExternalServiceError(f"S3 다운로드 실패: {e}") from e
+                await asyncio.sleep(_backoff_delay(attempt))
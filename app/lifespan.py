@@ -1,22 +1,62 @@
 # -*- coding: utf-8 -*-
-import os
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
 import logging
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
 from fastapi import FastAPI
 import aioboto3
-from botocore.config import Config
+import anyio.to_thread
+from aiobotocore.config import AioConfig
 from openai import AsyncOpenAI
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
-from app.clients import clients
-from app.dependencies import get_config
+from app.clients import CLIENTS
+from app.config import get_config
+from app.infrastructure.aws_http import KeepAliveAIOHTTPSession
+from app.infrastructure.db_pool import enable_idle_ping
+from app.infrastructure.log.dynamodb_logger import drain_pending_logs
+from app.infrastructure.drm.cached_license_service import LicenseCache
+from app.infrastructure.drm.adapter import shutdown_drm_process_pool
+from app.application.find_start_point.decision_cache import DecisionCache
+from app.infrastructure.llm.openai_client import create_chat_llm, create_llm_http_client, warm_up_chat_llm
+from app.utils.langsmith_utils import feedback_worker
 
 logger = logging.getLogger(__name__)
 
+
+async def _gather_settled(*aws) -> list:
+    """
+    모든 작업이 끝날 때까지 기다린 뒤, 실패한 작업이 있으면 첫 번째 예외를 다시 발생시킵니다.
+    공유 AsyncExitStack에 컨텍스트를 등록하는 작업들을 함께 실행할 때 사용합니다.
+    그냥 gather하면 하나가 실패하는 즉시 스택이 닫히고, 남은 작업이 닫힌 스택에 등록한 리소스는 정리되지 않습니다.
+    """
+    results = await asyncio.gather(*aws, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+async def _prewarm_db_pool(engine: AsyncEngine, size: int) -> None:
+    """
+    풀 크기만큼의 커넥션을 동시에 열어 둔 뒤 한꺼번에 반납하여 풀을 미리 채웁니다.
+    첫 요청들이 TCP/인증 핸드셰이크 비용을 순서대로 치르지 않도록 시작 시점에 처리합니다.
+    DB에 연결할 수 없어도 앱 시작을 막지 않고, 이후 요청에서 지연 생성되도록 둡니다.
+    """
+    async def _probe(stack: AsyncExitStack) -> None:
+        conn = await stack.enter_async_context(engine.connect())
+        await conn.execute(text("SELECT 1"))
+
+    try:
+        # 모든 커넥션을 동시에 보유해야 같은 커넥션이 재사용되지 않고 풀이 size개로 채워집니다.
+        async with AsyncExitStack() as stack:
+            await _gather_settled(*(_probe(stack) for _ in range(size)))
+        logger.info(f"DB 커넥션 풀을 미리 채웠습니다: {size}개")
+    except Exception as e:
+        logger.warning(f"DB 커넥션 풀 사전 준비 실패 (첫 요청 시 생성됩니다): {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -27,13 +67,18 @@ async def lifespan(app: FastAPI):
     # --- 애플리케이션 시작 시 실행 ---
     logger.info("애플리케이션 시작... 공유 클라이언트를 생성합니다.")
     
+    # Secrets Manager 조회와 프롬프트 로딩은 여기서 한 번만 수행하고, 요청 처리 중에는 app.state에서 재사용합니다.
     config = get_config()
+    app.state.config = config
 
     # DRM 및 분석용 스레드풀 제한 (asyncio.to_thread()의 default executor)
     loop = asyncio.get_running_loop()
-    epub_threads = int(getattr(config, "EPUB_THREADS", max(10, (os.cpu_count() or 2)*3)))
+    epub_threads = config.EPUB_THREADS
     epub_executor = ThreadPoolExecutor(max_workers=epub_threads, thread_name_prefix="epub")
     loop.set_default_executor(epub_executor)
+    # Starlette의 동기(def) 엔드포인트/의존성은 default executor가 아니라 anyio 스레드 한도(기본 40)를 따르므로 함께 맞춥니다.
+    # EPUB 처리 코드는 이 두 풀만 사용하고 요청 안에서 별도 풀을 중첩 생성하지 않습니다. (스레드 전환만 늘어남)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = epub_threads
     logger.info(f"EPUB 전용 스레드풀 초기화: max_workers={epub_threads}")
     
     # aioboto3 세션 생성
@@ -48,74 +93,136 @@ async def lifespan(app: FastAPI):
         boto_session = aioboto3.Session(region_name=config.AWS_REGION)
 
     # botocore s3 Config
-    s3_cfg = Config(
+    # tcp_keepalive는 aiobotocore가 소켓에 적용하지 않으므로 KeepAliveAIOHTTPSession으로 직접 적용합니다.
+    s3_cfg = AioConfig(
+        http_session_cls=KeepAliveAIOHTTPSession,
         region_name=config.AWS_REGION,
-        max_pool_connections=int(getattr(config, "S3_MAX_POOL", 128)),
-        retries={"mode": "adaptive", "max_attempts": int(getattr(config, "S3_MAX_ATTEMPTS", 8))},
-        connect_timeout=int(getattr(config, "S3_CONNECT_TIMEOUT", 5)),
-        read_timeout=int(getattr(config, "S3_READ_TIMEOUT", 120)),
+        # 책 한 권을 여러 Range GET으로 나눠 받으므로 동시 요청 수에 맞춰 넉넉하게 둡니다.
+        max_pool_connections=config.S3_MAX_POOL,
+        retries={"mode": "adaptive", "max_attempts": config.S3_MAX_ATTEMPTS},
+        connect_timeout=config.S3_CONNECT_TIMEOUT,
+        read_timeout=config.S3_READ_TIMEOUT,
         tcp_keepalive=True,
     )
-    # 싱글톤 S3 클라이언트 열기 (컨텍스트 진입)
-    s3_client_cm = boto_session.client("s3", config=s3_cfg)
-    s3_client = await s3_client_cm.__aenter__()
-    clients["boto_session"] = boto_session
-    clients["s3_client"] = s3_client
-    logger.info("공유 aioboto3 세션이 성공적으로 생성되었습니다.")
-    logger.info("공유 S3 클라이언트가 성공적으로 생성되었습니다.")
-    
     # botocore 다이나모DB Config
-    ddb_cfg = Config(
+    ddb_cfg = AioConfig(
+        http_session_cls=KeepAliveAIOHTTPSession,
         region_name=config.AWS_REGION,
-        max_pool_connections=int(getattr(config, "DDB_MAX_POOL", 64)),
-        retries={"mode": "adaptive", "max_attempts": int(getattr(config, "DDB_MAX_ATTEMPTS", 8))},
-        connect_timeout=int(getattr(config, "DDB_CONNECT_TIMEOUT", 5)),
-        read_timeout=int(getattr(config, "DDB_READ_TIMEOUT", 10)),
+        max_pool_connections=config.DDB_MAX_POOL,
+        retries={"mode": "adaptive", "max_attempts": config.DDB_MAX_ATTEMPTS},
+        connect_timeout=config.DDB_CONNECT_TIMEOUT,
+        read_timeout=config.DDB_READ_TIMEOUT,
         tcp_keepalive=True,
     )
-    # 리소스 컨텍스트를 lifespan에서 열고 닫기
-    dynamodb_cm = boto_session.resource("dynamodb", config=ddb_cfg)
-    dynamodb = await dynamodb_cm.__aenter__()
-    clients["dynamodb_table"] = await dynamodb.Table(config.DYNAMODB_LOG_TABLE_NAME)
-    logger.info("공유 dynamoDB 클라이언트가 성공적으로 생성되었습니다.")
-
-    # DSN 보정: pymysql -> aiomysql (이미 하신 로직과 동일)
-    dsn = config.DB_CONNECTION_STRING.replace('mysql+pymysql', 'mysql+aiomysql')
-    # 커넥션 풀/헬스체크/재활용
-    engine = create_async_engine(
-        dsn,
-        pool_size=int(getattr(config, "DB_POOL_SIZE", 10)),
-        max_overflow=int(getattr(config, "DB_MAX_OVERFLOW", 20)),
-        pool_timeout=int(getattr(config, "DB_POOL_TIMEOUT", 2)),
-        pool_recycle=int(getattr(config, "DB_POOL_RECYCLE", 1800)),  # 30분
-        pool_pre_ping=True,  # 죽은 커넥션 즉시 감지
-        connect_args={
-            "connect_timeout": int(getattr(config, "DB_CONNECT_TIMEOUT", 3)),  # ✅ TCP connect 빠른 실패
-            # "ssl": ssl_context  # (필요 시) RDS SSL 강제
-        },
-    )
-    AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
-    clients["db_engine"] = engine
-    clients["db_sessionmaker"] = AsyncSessionLocal
-    logger.info("공유 db_engine 클라이언트가 성공적으로 생성되었습니다.")
+    # 모든 컨텍스트를 하나의 AsyncExitStack으로 관리합니다.
+    # 종료 시에는 등록의 역순으로 정리되며, 시작 도중 실패해도 이미 연 리소스는 닫힙니다.
+    async with AsyncExitStack() as stack:
+        stack.callback(CLIENTS.clear)
+        stack.callback(shutdown_drm_process_pool)
+        CLIENTS.boto_session = boto_session
+        logger.info("공유 aioboto3 세션이 성공적으로 생성되었습니다.")
 
-    # AsyncOpenAI 클라이언트 생성
-    if config.OPENAI_API_KEY:
-        openai_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY, max_retries=2, timeout=20.0)
-        clients["openai_client"] = openai_client
-        logger.info("공유 AsyncOpenAI 클라이언트가 생성되었습니다.")
-    else:
-        clients["openai_client"] = None
-        logger.warning("OpenAI API 키가 없어 AsyncOpenAI 클라이언트를 생성하지 않았습니다.")
+        # 서로 독립적인 클라이언트 초기화를 동시에 수행하여, 시작 시간을 각 단계의 합이 아닌 최댓값으로 줄입니다.
+        async def _open_s3():
+            # 싱글톤 S3 클라이언트 열기 (컨텍스트 진입)
+            CLIENTS.s3_client = await stack.enter_async_context(boto_session.client("s3", config=s3_cfg))
+            logger.info("공유 S3 클라이언트가 성공적으로 생성되었습니다.")
+
+        async def _open_kms():
+            # KMS 키를 쓰는 경우에만 공유 KMS 클라이언트를 열어 둡니다. (요청마다 TLS/자격증명 설정 생략)
+            if config.KMS_KEY_ID:
+                CLIENTS.kms_client = await stack.enter_async_context(
+                    boto_session.client("kms", config=AioConfig(
+                        http_session_cls=KeepAliveAIOHTTPSession, region_name=config.AWS_REGION, tcp_keepalive=True,
+                    ))
+                )
+                logger.info("공유 KMS 클라이언트가 성공적으로 생성되었습니다.")
+
+        async def _open_dynamodb():
+            # 리소스(Table) 대신 하위 클라이언트를 lifespan에서 열고 닫기
+            CLIENTS.dynamodb_client = await stack.enter_async_context(
+                boto_session.client("dynamodb", config=ddb_cfg)
+            )
+            # 클라이언트를 닫기 전에 대기 중인 감사 로그 쓰기를 먼저 마무리합니다.
+            stack.push_async_callback(drain_pending_logs)
+            logger.info("공유 dynamoDB 클라이언트가 성공적으로 생성되었습니다.")
+
+        async def _open_db_engine():
+            # DSN 보정: pymysql -> aiomysql (이미 하신 로직과 동일)
+            dsn = config.DB_CONNECTION_STRING.replace('mysql+pymysql', 'mysql+aiomysql')
+            # 커넥션 풀/헬스체크/재활용
+            engine = create_async_engine(
+                dsn,
+                pool_size=config.DB_POOL_SIZE,
+                max_overflow=config.DB_MAX_OVERFLOW,
+                pool_timeout=config.DB_POOL_TIMEOUT,
+                pool_recycle=config.DB_POOL_RECYCLE,  # 30분
+                # 최근에 쓴 커넥션부터 재사용(LIFO)하여 부하가 낮을 때 소수의 커넥션만 따뜻하게 유지합니다.
+                # 오래 쉬는 커넥션은 pool_recycle로 교체됩니다.
+                pool_use_lifo=True,
+                # 체크아웃마다 왕복 1회가 추가되므로 기본은 끄고, 오래 쉬었던 커넥션만 핑합니다. (enable_idle_ping)
+                pool_pre_ping=config.DB_POOL_PRE_PING,
+                # 이 엔진은 단건 SELECT(라이선스 조회)만 수행하므로 ORM 세션/트랜잭션 없이 autocommit으로 실행하고,
+                # 풀 반납 시의 ROLLBACK 왕복도 생략합니다.
+                isolation_level="AUTOCOMMIT",
+                skip_autocommit_rollback=True,
+                connect_args={
+                    "connect_timeout": config.DB_CONNECT_TIMEOUT,  # ✅ TCP connect 빠른 실패
+                    # "ssl": ssl_context  # (필요 시) RDS SSL 강제
+                },
+            )
+            if not config.DB_POOL_PRE_PING and config.DB_POOL_PING_IDLE > 0:
+                enable_idle_ping(engine, config.DB_POOL_PING_IDLE)
+            stack.push_async_callback(engine.dispose)
+            CLIENTS.db_engine = engine
+            logger.info("공유 db_engine 클라이언트가 성공적으로 생성되었습니다.")
+            if config.DB_POOL_PREWARM:
+                await _prewarm_db_pool(engine, config.DB_POOL_SIZE)
+
+        async def _open_llm():
+            # AsyncOpenAI와 ChatOpenAI가 하나의 커넥션 풀(가능하면 HTTP/2)을 공유합니다.
+            llm_http_client = await stack.enter_async_context(create_llm_http_client())
+
+            # AsyncOpenAI 클라이언트 생성
+            if config.OPENAI_API_KEY:
+                CLIENTS.openai_client = AsyncOpenAI(
+                    api_key=config.OPENAI_API_KEY, http_client=llm_http_client, max_retries=2, timeout=20.0
+                )
+                logger.info("공유 AsyncOpenAI 클라이언트가 생성되었습니다.")
+            else:
+                CLIENTS.openai_client = None
+                logger.warning("OpenAI API 키가 없어 AsyncOpenAI 클라이언트를 생성하지 않았습니다.")
+
+            # 요청마다 ChatOpenAI를 만들지 않도록 공유 인스턴스를 만들고, 첫 요청 전에 연결을 미리 맺어 둡니다.
+            chat_llm = create_chat_llm(config.OPENAI_MODEL_NAME, http_async_client=llm_http_client)
+            CLIENTS.chat_llm = chat_llm
+            if chat_llm is not None:
+                logger.info(f"공유 LangChain ChatOpenAI 클라이언트가 생성되었습니다. (model: {config.OPENAI_MODEL_NAME})")
+                await warm_up_chat_llm(chat_llm)
+
+        # 하나가 실패해도 나머지가 모두 끝난 뒤에 스택이 닫히도록 모든 작업의 완료를 기다립니다.
+        await _gather_settled(_open_s3(), _open_kms(), _open_dynamodb(), _open_db_engine(), _open_llm())
+
+        # LangSmith 피드백은 요청 경로에서 블로킹 HTTP 호출 없이 큐에 넣고, 백그라운드 작업이 모아서 전송합니다.
+        await stack.enter_async_context(feedback_worker())
+
+        # item_id별 라이선스 키 캐시 (요청마다 생성되는 라이선스 서비스들이 공유)
+        CLIENTS.license_cache = LicenseCache(
+            maxsize=config.LICENSE_CACHE_MAXSIZE,
+            ttl=config.LICENSE_CACHE_TTL,
+        )
+
+        # (itemId, 내용 해시)별 시작점 결정 캐시 (재검사 요청의 분석/LLM 호출 생략)
+        CLIENTS.decision_cache = DecisionCache(
+            maxsize=config.DECISION_CACHE_MAXSIZE,
+            ttl=config.DECISION_CACHE_TTL,
+        )
+
+        yield
+
+        # --- 애플리케이션 종료 시 실행 ---
+        logger.info("애플리케이션 종료... 리소스를 정리합니다.")
+        # await CLIENTS.openai_client.close() # 필요 시 종료 처리
 
-    yield
-    
-    # --- 애플리케이션 종료 시 실행 ---
-    logger.info("애플리케이션 종료... 리소스를 정리합니다.")
-    # await clients["openai_client"].close() # 필요 시 종료 처리
-    await s3_client_cm.__aexit__(None, None, None)
-    await dynamodb_cm.__aexit__(None, None, None)
-    await engine.dispose()
-    clients.clear()
     logger.info("공유 클라이언트가 정리되었습니다.")
@@ -3,58 +3,203 @@
 LangSmith 유틸리티 함수 및 데코레이터
 """
 import os
+import asyncio
 import logging
-from functools import wraps
-from typing import Optional, Dict, Any, Callable, List
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from importlib.util import find_spec
+from itertools import islice
+from typing import TYPE_CHECKING, Optional, Dict, Any, Callable, List
 
 logger = logging.getLogger(__name__)
 
+__all__ = [
+    "LANGSMITH_INSTALLED",
+    "traceable",
+    "get_current_run_tree",
+    "get_langsmith_client",
+    "is_langsmith_available",
+    "is_tracing_enabled",
+    "feedback_worker",
+    "add_langsmith_metadata",
+    "add_langsmith_tags",
+    "log_langsmith_feedback",
+    "create_dataset",
+    "add_example_to_dataset",
+    "get_run_url",
+    "log_error_to_langsmith",
+    "run_evaluation",
+    "create_accuracy_evaluator",
+    "create_confidence_evaluator",
+    "create_latency_evaluator",
+    "create_output_format_evaluator",
+    "get_evaluation_results",
+    "calculate_aggregate_metrics",
+]
+
 # LangSmith 가용성 확인
-try:
-    from langsmith import traceable, Client, evaluate
-    from langsmith.run_helpers import get_current_run_tree
-    from langsmith.evaluation import EvaluationResult
+# langsmith 패키지는 import에만 수백 ms가 들어 워커 콜드 스타트를 늘리므로,
+# 설치 여부만 find_spec으로 확인하고 실제 import는 처음 쓰는 시점으로 미룹니다.
+LANGSMITH_INSTALLED = find_spec("langsmith") is not None
+
+if TYPE_CHECKING:
     from langsmith.schemas import Example, Run
-    LANGSMITH_INSTALLED = True
-except ImportError:
-    LANGSMITH_INSTALLED = False
-
-    def traceable(*args, **kwargs):
-        """LangSmith가 없을 때 데코레이터 더미"""
-        def decorator(func):
-            return func
-        return decorator
-
-    def get_current_run_tree():
-        """LangSmith가 없을 때 더미 함수"""
+
+
+def traceable(*args, **kwargs):
+    """langsmith.traceable을 지연 import하여 적용합니다. (LangSmith가 없으면 원래 함수를 그대로 반환)"""
+    if LANGSMITH_INSTALLED:
+        from langsmith import traceable as _traceable
+        return _traceable(*args, **kwargs)
+
+    def decorator(func):
+        return func
+    return decorator
+
+
+def get_current_run_tree():
+    """현재 실행 중인 LangSmith Run 트리를 반환합니다. (LangSmith가 없으면 None)"""
+    if not LANGSMITH_INSTALLED:
         return None
+    from langsmith.run_helpers import get_current_run_tree as _get_current_run_tree
+    return _get_current_run_tree()
 
 
 # LangSmith 클라이언트는 lazy initialization
 _langsmith_client = None
 
 def get_langsmith_client():
-    """LangSmith 클라이언트를 반환합니다. (lazy initialization)"""
+    """
+    LangSmith 클라이언트를 반환합니다. (lazy initialization)
+    Client를 만드는 유일한 경로이므로 프로세스당 한 번만 생성됩니다.
+    """
     global _langsmith_client
 
-    if not LANGSMITH_INSTALLED:
-        return None
-
-    if not os.getenv("LANGSMITH_API_KEY"):
+    if not is_langsmith_available():
         return None
 
     if _langsmith_client is None:
+        from langsmith import Client
         _langsmith_client = Client()
         logger.info("LangSmith 클라이언트가 초기화되었습니다.")
 
     return _langsmith_client
 
 
+@lru_cache(maxsize=1)
 def is_langsmith_available():
-    """LangSmith를 사용할 수 있는지 확인합니다."""
+    """
+    LangSmith를 사용할 수 있는지 확인합니다.
+    설치 여부와 API 키는 시작 이후 바뀌지 않으므로, 첫 호출 결과를 캐시하여 비활성 경로를 분기 한 번으로 끝냅니다.
+    (.env는 get_config()에서 로드되므로 import 시점이 아닌 첫 호출 시점에 판단합니다.)
+    """
     return LANGSMITH_INSTALLED and bool(os.getenv("LANGSMITH_API_KEY"))
 
 
+@lru_cache(maxsize=1)
+def is_tracing_enabled():
+    """
+    LangSmith 트레이싱이 켜져 있는지 확인합니다. (LANGSMITH_TRACING_V2=true일 때만)
+    요청마다 환경변수를 다시 읽지 않도록 첫 호출 결과를 캐시합니다.
+    """
+    return is_langsmith_available() and os.getenv("LANGSMITH_TRACING_V2", "false").lower() == "true"
+
+
+# 피드백 전송 큐: lifespan에서 feedback_worker()로 시작하며, 시작되지 않았으면(스크립트 등) 즉시 동기 전송합니다.
+_FEEDBACK_QUEUE_MAXSIZE = 1000
+_FEEDBACK_BATCH_SIZE = 50
+_feedback_queue: Optional["asyncio.Queue[Dict[str, Any]]"] = None
+_feedback_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _send_feedback(feedback_kwargs: Dict[str, Any]) -> None:
+    """피드백 한 건을 LangSmith로 전송합니다. (블로킹 HTTP 호출)"""
+    client = get_langsmith_client()
+    if not client:
+        return
+    try:
+        client.create_feedback(**feedback_kwargs)
+        logger.info("LangSmith 피드백 기록 완료: %s=%s", feedback_kwargs['key'], feedback_kwargs['score'])
+    except Exception as e:
+        logger.warning("LangSmith 피드백 기록 실패: %s", e)
+
+
+def _send_feedback_batch(batch: List[Dict[str, Any]]) -> None:
+    for feedback_kwargs in batch:
+        _send_feedback(feedback_kwargs)
+
+
+def _submit_feedback(feedback_kwargs: Dict[str, Any]) -> None:
+    """
+    피드백을 백그라운드 큐에 넣습니다. 요청 경로에서는 블로킹 HTTP 호출을 하지 않습니다.
+    큐가 가득 차면 요청을 막지 않도록 해당 피드백은 버립니다.
+    """
+    queue, loop = _feedback_queue, _feedback_loop
+    if queue is None:
+        _send_feedback(feedback_kwargs)
+        return
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        # 동기(def) 핸들러의 워커 스레드에서 호출된 경우: asyncio.Queue는 스레드 안전하지 않으므로 루프에 넘깁니다.
+        loop.call_soon_threadsafe(_enqueue_feedback, queue, feedback_kwargs)
+        return
+    _enqueue_feedback(queue, feedback_kwargs)
+
+
+def _enqueue_feedback(queue: "asyncio.Queue[Dict[str, Any]]", feedback_kwargs: Dict[str, Any]) -> None:
+    try:
+        queue.put_nowait(feedback_kwargs)
+    except asyncio.QueueFull:
+        logger.warning("LangSmith 피드백 큐가 가득 차 피드백을 버립니다: %s", feedback_kwargs['key'])
+
+
+async def _drain_feedback(queue: "asyncio.Queue[Dict[str, Any]]") -> None:
+    """큐에 쌓인 피드백을 최대 _FEEDBACK_BATCH_SIZE건씩 모아 스레드에서 전송합니다."""
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < _FEEDBACK_BATCH_SIZE:
+            try:
+                batch.append(queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        try:
+            await asyncio.to_thread(_send_feedback_batch, batch)
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+
+@asynccontextmanager
+async def feedback_worker(drain_timeout: float = 10.0):
+    """
+    LangSmith 피드백 전송 작업을 백그라운드에서 수행합니다. (lifespan에서 진입)
+    종료 시 남은 피드백을 최대 drain_timeout초 동안 보낸 뒤 작업을 취소합니다.
+    """
+    global _feedback_queue, _feedback_loop
+    if not is_langsmith_available():
+        yield
+        return
+
+    queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=_FEEDBACK_QUEUE_MAXSIZE)
+    task = asyncio.create_task(_drain_feedback(queue))
+    _feedback_queue, _feedback_loop = queue, asyncio.get_running_loop()
+    try:
+        yield
+    finally:
+        _feedback_queue = _feedback_loop = None
+        try:
+            await asyncio.wait_for(queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("전송하지 못한 LangSmith 피드백 %s건을 버립니다.", queue.qsize())
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
 def add_langsmith_metadata(metadata: Dict[str, Any]) -> None:
     """
     현재 실행 중인 LangSmith trace에 메타데이터를 추가합니다.
@@ -71,7 +216,7 @@ def add_langsmith_metadata(metadata: Dict[str, Any]) -> None:
             for key, value in metadata.items():
                 run_tree.add_metadata({key: value})
     except Exception as e:
-        logger.warning(f"LangSmith 메타데이터 추가 실패: {e}")
+        logger.warning("LangSmith 메타데이터 추가 실패: %s", e)
 
 
 def add_langsmith_tags(tags: list[str]) -> None:
@@ -89,7 +234,7 @@ def add_langsmith_tags(tags: list[str]) -> None:
         if run_tree:
             run_tree.add_tags(tags)
     except Exception as e:
-        logger.warning(f"LangSmith 태그 추가 실패: {e}")
+        logger.warning("LangSmith 태그 추가 실패: %s", e)
 
 
 def log_langsmith_feedback(
@@ -101,6 +246,7 @@ def log_langsmith_feedback(
 ) -> None:
     """
     LangSmith에 피드백을 기록합니다.
+    feedback_worker()가 실행 중이면 큐에 넣고 바로 반환하며, 전송은 백그라운드에서 모아서 수행됩니다.
 
     Args:
         run_id: LangSmith run ID
@@ -109,33 +255,27 @@ def log_langsmith_feedback(
         comment: 추가 코멘트
         correction: 수정된 올바른 출력값 (선택사항)
     """
-    client = get_langsmith_client()
-    if not client:
+    if not is_langsmith_available():
         return
 
-    try:
-        feedback_kwargs = {
-            "run_id": run_id,
-            "key": key,
-            "score": score,
-        }
-        if comment:
-            feedback_kwargs["comment"] = comment
-        if correction:
-            feedback_kwargs["correction"] = correction
-
-        client.create_feedback(**feedback_kwargs)
-        logger.info(f"LangSmith 피드백 기록 완료: {key}={score}")
-    except Exception as e:
-        logger.warning(f"LangSmith 피드백 기록 실패: {e}")
+    feedback_kwargs = {
+        "run_id": run_id,
+        "key": key,
+        "score": score,
+    }
+    if comment:
+        feedback_kwargs["comment"] = comment
+    if correction:
+        feedback_kwargs["correction"] = correction
+    _submit_feedback(feedback_kwargs)
 
 
-def create_dataset(
+async def create_dataset(
     dataset_name: str,
     description: Optional[str] = None
 ) -> Optional[str]:
     """
-    LangSmith 데이터셋을 생성합니다.
+    LangSmith 데이터셋을 생성합니다. (동기 SDK 호출은 스레드에서 수행)
 
     Args:
         dataset_name: 데이터셋 이름
@@ -149,25 +289,26 @@ def create_dataset(
         return None
 
     try:
-        dataset = client.create_dataset(
+        dataset = await asyncio.to_thread(
+            client.create_dataset,
             dataset_name=dataset_name,
             description=description
         )
-        logger.info(f"LangSmith 데이터셋 생성 완료: {dataset_name} (ID: {dataset.id})")
+        logger.info("LangSmith 데이터셋 생성 완료: %s (ID: %s)", dataset_name, dataset.id)
         return str(dataset.id)
     except Exception as e:
-        logger.warning(f"LangSmith 데이터셋 생성 실패: {e}")
+        logger.warning("LangSmith 데이터셋 생성 실패: %s", e)
         return None
 
 
-def add_example_to_dataset(
+async def add_example_to_dataset(
     dataset_name: str,
     inputs: Dict[str, Any],
     outputs: Dict[str, Any],
     metadata: Optional[Dict[str, Any]] = None
 ) -> bool:
     """
-    데이터셋에 예제를 추가합니다.
+    데이터셋에 예제를 추가합니다. (동기 SDK 호출은 스레드에서 수행)
 
     Args:
         dataset_name: 데이터셋 이름
@@ -183,16 +324,17 @@ def add_example_to_dataset(
         return False
 
     try:
-        client.create_example(
+        await asyncio.to_thread(
+            client.create_example,
             inputs=inputs,
             outputs=outputs,
             dataset_name=dataset_name,
             metadata=metadata
         )
-        logger.info(f"LangSmith 데이터셋에 예제 추가 완료: {dataset_name}")
+        logger.info("LangSmith 데이터셋에 예제 추가 완료: %s", dataset_name)
         return True
     except Exception as e:
-        logger.warning(f"LangSmith 예제 추가 실패: {e}")
+        logger.warning("LangSmith 예제 추가 실패: %s", e)
         return False
 
 
@@ -214,7 +356,7 @@ def get_run_url(run_id: str) -> Optional[str]:
         project_name = os.getenv("LANGSMITH_PROJECT", "ai-epub-api")
         return f"https://smith.langchain.com/o/default/projects/{project_name}/r/{run_id}"
     except Exception as e:
-        logger.warning(f"LangSmith URL 생성 실패: {e}")
+        logger.warning("LangSmith URL 생성 실패: %s", e)
         return None
 
 
@@ -224,39 +366,44 @@ def log_error_to_langsmith(
     context: Optional[Dict[str, Any]] = None
 ) -> None:
     """
-    에러를 LangSmith에 피드백으로 기록합니다.
+    에러를 LangSmith에 피드백으로 기록합니다. (log_langsmith_feedback과 같이 백그라운드 큐로 전송)
 
     Args:
         run_id: LangSmith run ID
         error: 발생한 예외
         context: 에러 발생 컨텍스트
     """
-    client = get_langsmith_client()
-    if not client:
+    if not is_langsmith_available():
         return
 
-    try:
-        error_info = {
-            "error_type": type(error).__name__,
-            "error_message": str(error),
-        }
-        if context:
-            error_info.update(context)
-
-        client.create_feedback(
-            run_id=run_id,
-            key="error",
-            score=0.0,
-            comment=f"Error: {type(error).__name__} - {str(error)}",
-            correction=error_info
-        )
-        logger.info(f"LangSmith에 에러 기록 완료: {type(error).__name__}")
-    except Exception as e:
-        logger.warning(f"LangSmith 에러 기록 실패: {e}")
+    error_info = {
+        "error_type": type(error).__name__,
+        "error_message": str(error),
+    }
+    if context:
+        error_info.update(context)
+
+    _submit_feedback({
+        "run_id": run_id,
+        "key": "error",
+        "score": 0.0,
+        "comment": f"Error: {type(error).__name__} - {str(error)}",
+        "correction": error_info,
+    })
 
 
 # ==================== 평가(Evaluation) 함수들 ====================
 
+def _run_duration_seconds(run: "Run") -> Optional[float]:
+    """
+    Run의 실행 시간(초)을 반환합니다. 시작/종료 시각이 없으면 None.
+    datetime 차이의 total_seconds()는 timestamp() 두 번을 빼는 것보다 약 3배 빠릅니다. (naive datetime은 지역 시간 변환까지 수행)
+    """
+    if not run.end_time or not run.start_time:
+        return None
+    return (run.end_time - run.start_time).total_seconds()
+
+
 def run_evaluation(
     dataset_name: str,
     target_function: Callable,
@@ -305,10 +452,10 @@ def run_evaluation(
             metadata=metadata
         )
 
-        logger.info(f"평가 완료: {dataset_name}")
+        logger.info("평가 완료: %s", dataset_name)
         return results
     except Exception as e:
-        logger.warning(f"평가 실행 실패: {e}")
+        logger.warning("평가 실행 실패: %s", e)
         return None
 
 
@@ -326,25 +473,22 @@ def create_accuracy_evaluator(expected_key: str = "file") -> Callable:
         >>> accuracy_eval = create_accuracy_evaluator("file")
         >>> result = accuracy_eval(run, example)
     """
-    def accuracy_evaluator(run: Run, example: Example) -> Dict[str, Any]:
+    def accuracy_evaluator(run: "Run", example: "Example") -> Dict[str, Any]:
         """실제 출력과 예상 출력을 비교하여 정확도를 계산합니다."""
-        try:
-            if not run.outputs:
-                return {"key": "accuracy", "score": 0.0, "comment": "출력 없음"}
-
-            predicted = run.outputs.get(expected_key)
-            expected = example.outputs.get(expected_key) if example.outputs else None
-
-            if predicted == expected:
-                return {"key": "accuracy", "score": 1.0}
-            else:
-                return {
-                    "key": "accuracy",
-                    "score": 0.0,
-                    "comment": f"예상: {expected}, 실제: {predicted}"
-                }
-        except Exception as e:
-            return {"key": "accuracy", "score": 0.0, "comment": f"평가 오류: {str(e)}"}
+        # dict 조회만 하므로 예외 처리 없이 출력 유무만 확인합니다.
+        if not run.outputs:
+            return {"key": "accuracy", "score": 0.0, "comment": "출력 없음"}
+
+        predicted = run.outputs.get(expected_key)
+        expected = example.outputs.get(expected_key) if example.outputs else None
+
+        if predicted == expected:
+            return {"key": "accuracy", "score": 1.0}
+        return {
+            "key": "accuracy",
+            "score": 0.0,
+            "comment": f"예상: {expected}, 실제: {predicted}"
+        }
 
     return accuracy_evaluator
 
@@ -367,7 +511,10 @@ def create_confidence_evaluator(
         >>> confidence_eval = create_confidence_evaluator(min_threshold=0.8)
         >>> result = confidence_eval(run, example)
     """
-    def confidence_evaluator(run: Run, example: Example) -> Dict[str, Any]:
+    # 호출마다 바뀌지 않는 부분은 평가자를 만들 때 한 번만 계산합니다.
+    low_comment_suffix = f" (최소: {min_threshold})"
+
+    def confidence_evaluator(run: "Run", example: "Example") -> Dict[str, Any]:
         """출력의 신뢰도를 평가합니다."""
         try:
             if not run.outputs:
@@ -385,7 +532,7 @@ def create_confidence_evaluator(
                 return {
                     "key": "confidence_check",
                     "score": 0.0,
-                    "comment": f"낮은 신뢰도: {confidence:.2f} (최소: {min_threshold})"
+                    "comment": f"낮은 신뢰도: {confidence:.2f}{low_comment_suffix}"
                 }
         except Exception as e:
             return {"key": "confidence_check", "score": 0.0, "comment": f"평가 오류: {str(e)}"}
@@ -407,25 +554,25 @@ def create_latency_evaluator(max_seconds: float = 5.0) -> Callable:
         >>> latency_eval = create_latency_evaluator(max_seconds=3.0)
         >>> result = latency_eval(run, example)
     """
-    def latency_evaluator(run: Run, example: Example) -> Dict[str, Any]:
-        """실행 시간을 평가합니다."""
-        try:
-            if not run.end_time or not run.start_time:
-                return {"key": "latency", "score": 0.0, "comment": "시간 정보 없음"}
+    # 호출마다 바뀌지 않는 부분은 평가자를 만들 때 한 번만 계산합니다.
+    inv_max_seconds = 1.0 / max_seconds if max_seconds > 0 else float("inf")
+    over_comment_suffix = f"초 (최대: {max_seconds}초)"
 
-            duration = (run.end_time - run.start_time).total_seconds()
+    def latency_evaluator(run: "Run", example: "Example") -> Dict[str, Any]:
+        """실행 시간을 평가합니다."""
+        duration = _run_duration_seconds(run)
+        if duration is None:
+            return {"key": "latency", "score": 0.0, "comment": "시간 정보 없음"}
 
-            if duration <= max_seconds:
-                score = 1.0
-                comment = f"지연시간: {duration:.2f}초"
-            else:
-                # 초과한 만큼 점수 감점 (최소 0.0)
-                score = max(0.0, 1.0 - (duration - max_seconds) / max_seconds)
-                comment = f"높은 지연시간: {duration:.2f}초 (최대: {max_seconds}초)"
+        if duration <= max_seconds:
+            score = 1.0
+            comment = f"지연시간: {duration:.2f}초"
+        else:
+            # 초과한 만큼 점수 감점 (최소 0.0): 1 - (d - m) / m = 2 - d / m
+            score = max(0.0, 2.0 - duration * inv_max_seconds)
+            comment = f"높은 지연시간: {duration:.2f}{over_comment_suffix}"
 
-            return {"key": "latency", "score": score, "comment": comment}
-        except Exception as e:
-            return {"key": "latency", "score": 0.0, "comment": f"평가 오류: {str(e)}"}
+        return {"key": "latency", "score": score, "comment": comment}
 
     return latency_evaluator
 
@@ -444,34 +591,38 @@ def create_output_format_evaluator(required_keys: List[str]) -> Callable:
         >>> format_eval = create_output_format_evaluator(["file", "anchor", "confidence"])
         >>> result = format_eval(run, example)
     """
-    def format_evaluator(run: Run, example: Example) -> Dict[str, Any]:
-        """출력이 필수 키를 모두 포함하는지 확인합니다."""
-        try:
-            if not run.outputs:
-                return {"key": "format_check", "score": 0.0, "comment": "출력 없음"}
-
-            missing_keys = [key for key in required_keys if key not in run.outputs]
+    # 호출자가 나중에 리스트를 수정해도 평가 기준이 바뀌지 않도록 튜플로 고정하고,
+    # 누락 여부는 frozenset 차집합 한 번(C 수준 해시 조회)으로 판단합니다.
+    required_keys = tuple(required_keys)
+    required_set = frozenset(required_keys)
 
-            if not missing_keys:
-                return {"key": "format_check", "score": 1.0, "comment": "모든 필수 키 존재"}
-            else:
-                return {
-                    "key": "format_check",
-                    "score": 0.0,
-                    "comment": f"누락된 키: {', '.join(missing_keys)}"
-                }
-        except Exception as e:
-            return {"key": "format_check", "score": 0.0, "comment": f"평가 오류: {str(e)}"}
+    def format_evaluator(run: "Run", example: "Example") -> Dict[str, Any]:
+        """출력이 필수 키를 모두 포함하는지 확인합니다."""
+        if not run.outputs:
+            return {"key": "format_check", "score": 0.0, "comment": "출력 없음"}
+
+        missing = required_set.difference(run.outputs)
+        if not missing:
+            return {"key": "format_check", "score": 1.0, "comment": "모든 필수 키 존재"}
+
+        # 실패한 경우에만 원래 순서대로 누락 키 목록을 만듭니다.
+        missing_keys = [key for key in required_keys if key in missing]
+        return {
+            "key": "format_check",
+            "score": 0.0,
+            "comment": f"누락된 키: {', '.join(missing_keys)}"
+        }
 
     return format_evaluator
 
 
-def get_evaluation_results(
+async def get_evaluation_results(
     experiment_name: Optional[str] = None,
     limit: int = 10
 ) -> Optional[List[Dict[str, Any]]]:
     """
     평가 결과를 조회합니다.
+    run 목록을 받은 뒤, 모든 run의 피드백을 list_feedback 한 번으로 받아 run별로 묶습니다. (run마다 왕복하지 않음)
 
     Args:
         experiment_name: 실험 이름 (None이면 최근 실험)
@@ -481,7 +632,7 @@ def get_evaluation_results(
         평가 결과 리스트 또는 None
 
     Example:
-        >>> results = get_evaluation_results(experiment_name="epub_v1_20231201", limit=5)
+        >>> results = await get_evaluation_results(experiment_name="epub_v1_20231201", limit=5)
         >>> for result in results:
         ...     print(f"정확도: {result['accuracy']}, 신뢰도: {result['confidence']}")
     """
@@ -489,38 +640,47 @@ def get_evaluation_results(
     if not client:
         return None
 
-    try:
+    def _list_runs() -> list:
         # LangSmith API를 통해 실험 결과 조회
         project_name = os.getenv("LANGSMITH_PROJECT", "ai-epub-api")
 
-        # 실험별 run 조회
+        # 실험별 run 조회 (SDK는 페이지를 지연 로딩하므로 스레드 안에서 필요한 만큼만 받아 둡니다)
         runs = client.list_runs(
             project_name=project_name,
             execution_order=1,
             filter=f'eq(name, "{experiment_name}")' if experiment_name else None
         )
+        return list(islice(runs, limit))
 
-        results = []
-        for i, run in enumerate(runs):
-            if i >= limit:
-                break
+    def _feedback_scores_by_run(run_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        by_run: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        if run_ids:
+            for fb in client.list_feedback(run_ids=run_ids):
+                by_run[str(fb.run_id)][fb.key] = fb.score
+        return by_run
 
-            # 피드백 정보 수집
-            feedbacks = client.list_feedback(run_ids=[str(run.id)])
-            feedback_scores = {fb.key: fb.score for fb in feedbacks}
+    try:
+        runs = await asyncio.to_thread(_list_runs)
+        run_ids = [str(run.id) for run in runs]
+
+        # 피드백 정보 수집
+        feedback_scores = await asyncio.to_thread(_feedback_scores_by_run, run_ids)
 
+        results = []
+        for run, run_id in zip(runs, run_ids):
+            duration = _run_duration_seconds(run)
             results.append({
-                "run_id": str(run.id),
+                "run_id": run_id,
                 "inputs": run.inputs,
                 "outputs": run.outputs,
-                "feedback_scores": feedback_scores,
-                "latency_ms": (run.end_time - run.start_time).total_seconds() * 1000 if run.end_time and run.start_time else None
+                "feedback_scores": feedback_scores.get(run_id, {}),
+                "latency_ms": duration * 1000 if duration is not None else None
             })
 
-        logger.info(f"평가 결과 {len(results)}개 조회 완료")
+        logger.info("평가 결과 %s개 조회 완료", len(results))
         return results
     except Exception as e:
-        logger.warning(f"평가 결과 조회 실패: {e}")
+        logger.warning("평가 결과 조회 실패: %s", e)
         return None
 
 
@@ -537,7 +697,7 @@ def calculate_aggregate_metrics(
         집계 메트릭 딕셔너리 (평균 정확도, 평균 신뢰도, 평균 지연시간 등)
 
     Example:
-        >>> results = get_evaluation_results(limit=100)
+        >>> results = await get_evaluation_results(limit=100)
         >>> metrics = calculate_aggregate_metrics(results)
         >>> print(f"평균 정확도: {metrics['avg_accuracy']:.2%}")
     """
@@ -545,32 +705,41 @@ def calculate_aggregate_metrics(
         return {}
 
     try:
-        metrics: Dict[str, List[float]] = {}
+        # 키별 [개수, 합계, 최솟값, 최댓값]을 한 번의 순회로 누적합니다. (점수 목록을 따로 모으지 않음)
+        stats: Dict[str, List[float]] = {}
+
+        def accumulate(key: str, value: float) -> None:
+            entry = stats.get(key)
+            if entry is None:
+                stats[key] = [1, value, value, value]
+                return
+            entry[0] += 1
+            entry[1] += value
+            if value < entry[2]:
+                entry[2] = value
+            elif value > entry[3]:
+                entry[3] = value
 
-        # 모든 피드백 점수 수집
         for result in evaluation_results:
-            feedback_scores = result.get("feedback_scores", {})
-            for key, score in feedback_scores.items():
-                if key not in metrics:
-                    metrics[key] = []
-                metrics[key].append(score)
+            # 모든 피드백 점수 수집 (점수 없는 피드백은 제외)
+            for key, score in result.get("feedback_scores", {}).items():
+                if score is not None:
+                    accumulate(key, score)
 
             # 지연시간 추가
-            if result.get("latency_ms") is not None:
-                if "latency_ms" not in metrics:
-                    metrics["latency_ms"] = []
-                metrics["latency_ms"].append(result["latency_ms"])
+            latency_ms = result.get("latency_ms")
+            if latency_ms is not None:
+                accumulate("latency_ms", latency_ms)
 
         # 평균 계산
         aggregates = {}
-        for key, values in metrics.items():
-            if values:
-                aggregates[f"avg_{key}"] = sum(values) / len(values)
-                aggregates[f"min_{key}"] = min(values)
-                aggregates[f"max_{key}"] = max(values)
+        for key, (count, total, lo, hi) in stats.items():
+            aggregates[f"avg_{key}"] = total / count
+            aggregates[f"min_{key}"] = lo
+            aggregates[f"max_{key}"] = hi
 
-        logger.info(f"집계 메트릭 계산 완료: {len(aggregates)} 항목")
+        logger.info("집계 메트릭 계산 완료: %s 항목", len(aggregates))
         return aggregates
     except Exception as e:
-        logger.warning(f"집계 메트릭 계산 실패: {e}")
+        logger.warning("집계 메트릭 계산 실패: %s", e)
         return {}
\ No newline at end of file
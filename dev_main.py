@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 # dev_main.py  (개발용으로만 사용)
+import os
+import sys
+
 import uvicorn
 
 if __name__ == "__main__":
@@ -7,6 +10,11 @@ if __name__ == "__main__":
         "app.api.endpoints:app",
         host="0.0.0.0",
         port=18000,
-        reload=True,     # 개발: 코드 변경 자동 반영
-        workers=1
+        # 개발: DEV_RELOAD=1(true/yes)일 때만 코드 변경 자동 반영 (파일 감시 프로세스가 성능 측정을 왜곡하므로 기본은 끔)
+        reload=os.getenv("DEV_RELOAD", "").lower() in ("1", "true", "yes"),
+        # "auto"는 설치가 빠져도 조용히 asyncio/h11로 내려가므로 명시적으로 고정합니다. (uvloop는 Windows 미지원)
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=int(os.getenv("UVICORN_WORKERS", "1")),
+        log_level="info",
     )
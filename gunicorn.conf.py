@@ -1,37 +1,134 @@
 # gunicorn.conf.py
-import os, tempfile
+import os
 
-bind = os.getenv("GUNICORN_BIND", "0.0.0.0:18000")
-workers = int(os.getenv("GUNICORN_WORKERS", "2"))         # t3.medium → 2
-worker_class = "uvicorn.workers.UvicornWorker"
+# 설정 파일 로드 시 한 번만 읽습니다. (os.environ은 이미 파싱된 매핑이므로 getenv 호출을 반복하지 않음)
+_ENV = dict(os.environ)
 
-graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
-timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
-keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
 
-backlog = int(os.getenv("GUNICORN_BACKLOG", "2048"))
-max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))          # 누수 방지
-max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+def _env_int(name: str, default: int) -> int:
+    return int(_ENV.get(name, default))
 
-loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
-accesslog = os.getenv("GUNICORN_ACCESSLOG", "-")  # '-'=stdout
-errorlog = os.getenv("GUNICORN_ERRORLOG", "-")
+
+def _somaxconn(default: int = 2048) -> int:
+    """커널의 listen 대기열 상한(net.core.somaxconn)을 읽습니다. (읽을 수 없으면 default)"""
+    try:
+        with open("/proc/sys/net/core/somaxconn") as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return default
+
+
+# 실행 대상 앱은 이 파일에서만 지정합니다. (systemd/README 모두 `gunicorn -c gunicorn.conf.py`로 실행)
+wsgi_app = "app.api.endpoints:app"
+bind = _ENV.get("GUNICORN_BIND", "0.0.0.0:18000")
+# UvicornWorker는 워커 하나가 이벤트 루프 하나로 동시 요청을 처리하고 CPU 작업은 워커별 스레드풀로 넘기므로,
+# 동기 워커용 권장값(2 × 코어 + 1) 대신 코어당 워커 1개를 기본으로 합니다. (t3.medium → 2)
+workers = _env_int("GUNICORN_WORKERS", os.cpu_count() or 1)
+worker_class = "uvicorn.workers.UvicornWorker"   # loop/http="auto": requirements의 uvloop + httptools를 자동 사용
+# ps/top에서 이 서비스의 마스터/워커를 구분할 수 있도록 프로세스 이름을 붙입니다. (setproctitle 설치 시 적용)
+proc_name = _ENV.get("GUNICORN_PROC_NAME", "epub-ai")
+
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+timeout = _env_int("GUNICORN_TIMEOUT", 60)
+keepalive = _env_int("GUNICORN_KEEPALIVE", 5)
+
+# listen 대기열은 커널이 somaxconn으로 잘라내므로, 기본값은 최소 2048에서 커널 상한까지 사용합니다.
+# (순간적으로 몰린 연결이 accept 전에 버려지지 않도록; UvicornWorker도 이 값을 그대로 사용)
+backlog = _env_int("GUNICORN_BACKLOG", max(2048, _somaxconn()))
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 2000)          # 누수 방지
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 200)
+
+loglevel = _ENV.get("GUNICORN_LOGLEVEL", "info")
+accesslog = _ENV.get("GUNICORN_ACCESSLOG", "-")  # '-'=stdout
+errorlog = _ENV.get("GUNICORN_ERRORLOG", "-")
 capture_output = True
 
-# Linux면 /dev/shm, 기타면 /tmp
-worker_tmp_dir = os.getenv("GUNICORN_WORKER_TMP_DIR") or (
-    "/dev/shm" if os.path.exists("/dev/shm") else tempfile.gettempdir()
-)
+# 지정하면 gunicorn.workers / gunicorn.requests / 응답 시간 등의 메트릭을 StatsD로 보냅니다. (예: "127.0.0.1:8125")
+statsd_host = _ENV.get("GUNICORN_STATSD_HOST") or None
+statsd_prefix = _ENV.get("GUNICORN_STATSD_PREFIX", proc_name)
 
-# Worker가 fork된 직후 Config를 로드하여 환경변수 설정
-def post_fork(server, worker):
-    """Worker가 fork된 후 Config를 로드하여 LangSmith 환경변수를 설정합니다."""
+# stdout/stderr로 내보낼 때는 요청마다 write(2)를 하지 않도록 큐 + 백그라운드 스레드로 모아서 씁니다.
+# 8192건이 차거나, ERROR 이상이 오거나, 5초 동안 새 로그가 없으면 한 번에 씁니다. (GUNICORN_BUFFERED_LOG=0이면 끔)
+if accesslog == "-" and errorlog == "-" and _ENV.get("GUNICORN_BUFFERED_LOG", "1") != "0":
+    _BUFFERED_HANDLER = {
+        "()": "app.core.buffered_logging.BufferedLogHandler",
+        "capacity": 8192,
+        "flush_interval": 5.0,
+    }
+    logconfig_dict = {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "root": {"level": "INFO", "handlers": []},
+        "loggers": {
+            "gunicorn.error": {"level": loglevel.upper(), "handlers": ["error_console"], "propagate": True, "qualname": "gunicorn.error"},
+            "gunicorn.access": {"level": "INFO", "handlers": ["console"], "propagate": True, "qualname": "gunicorn.access"},
+        },
+        "handlers": {
+            "console": {**_BUFFERED_HANDLER, "formatter": "access", "stream": "ext://sys.stdout"},
+            "error_console": {**_BUFFERED_HANDLER, "formatter": "generic", "stream": "ext://sys.stderr"},
+        },
+        "formatters": {
+            "access": {"format": "%(message)s", "class": "logging.Formatter"},
+            "generic": {
+                "format": "%(asctime)s [%(process)d] [%(levelname)s] %(message)s",
+                "datefmt": "[%Y-%m-%d %H:%M:%S %z]",
+                "class": "logging.Formatter",
+            },
+        },
+    }
+
+
+def _default_worker_tmp_dir() -> str:
+    """Linux면 /dev/shm, 기타면 시스템 임시 폴더 (tempfile은 /dev/shm이 없을 때만 import)"""
+    if os.path.isdir("/dev/shm"):
+        return "/dev/shm"
+    import tempfile
+    return tempfile.gettempdir()
+
+
+worker_tmp_dir = _ENV.get("GUNICORN_WORKER_TMP_DIR") or _default_worker_tmp_dir()
+
+# 앱을 마스터에서 한 번만 import한 뒤 fork하여, import/Config 로드 비용을 워커 수만큼 반복하지 않고 메모리를 CoW로 공유합니다.
+# (GUNICORN_PRELOAD=0이면 워커마다 앱을 로드하며, 이 경우 코드 변경이 워커 재시작만으로 반영됩니다.)
+preload_app = _ENV.get("GUNICORN_PRELOAD", "1") != "0"
+
+if preload_app:
+    # 앱 모듈 중 import 시점에 환경 변수를 읽는 곳이 있으므로, 마스터가 앱을 import하기 전에 .env를 먼저 반영합니다.
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def when_ready(server):
+    """마스터가 워커를 띄우기 전에 Config를 한 번 로드합니다. (워커는 fork로 캐시된 Config와 환경변수를 물려받음)"""
     from app.config import get_config
     config = get_config()
+    server.log.info(f"Config 로드 완료 (LANGSMITH_API_KEY: {'SET' if config.LANGSMITH_API_KEY else 'NOT SET'})")
+
+
+def post_fork(server, worker):
+    """
+    fork된 워커의 LangSmith 환경변수 상태를 기록합니다. (Config는 마스터에서 이미 로드됨)
+    LANGSMITH_TRACING_V2가 명시적으로 "true"가 아니면 LangChain 트레이서를 꺼서 LLM 호출마다의 트레이싱 훅을 생략합니다.
+    """
+    env = os.environ
+    pid = worker.pid
+    tracing = env.get("LANGSMITH_TRACING_V2", "").lower() == "true"
+    if not tracing:
+        env["LANGCHAIN_TRACING_V2"] = "false"
+    # 판정 결과를 워커에 남겨 두어 이후에는 환경변수를 다시 파싱하지 않습니다.
+    worker.langsmith_tracing = tracing
+    worker.log.info(f"Worker {pid}: LANGSMITH_API_KEY (env): {'SET' if env.get('LANGSMITH_API_KEY') else 'NOT SET'}")
+    worker.log.info(f"Worker {pid}: LANGSMITH_TRACING_V2 (env): {env.get('LANGSMITH_TRACING_V2')}")
+    worker.log.info(f"Worker {pid}: LANGSMITH_PROJECT (env): {env.get('LANGSMITH_PROJECT')}")
+
+
+def worker_exit(server, worker):
+    """워커 종료 직전 버퍼에 남은 로그를 씁니다."""
+    from app.core.buffered_logging import stop_buffered_logging
+    stop_buffered_logging()
+
 
-    # 환경변수 확인 및 로깅
-    worker.log.info(f"Worker {worker.pid}: Config 로드 완료")
-    worker.log.info(f"Worker {worker.pid}: LANGSMITH_API_KEY: {'SET' if config.LANGSMITH_API_KEY else 'NOT SET'}")
-    worker.log.info(f"Worker {worker.pid}: LANGSMITH_API_KEY (env): {'SET' if os.getenv('LANGSMITH_API_KEY') else 'NOT SET'}")
-    worker.log.info(f"Worker {worker.pid}: LANGSMITH_TRACING_V2 (env): {os.getenv('LANGSMITH_TRACING_V2')}")
-    worker.log.info(f"Worker {worker.pid}: LANGSMITH_PROJECT (env): {os.getenv('LANGSMITH_PROJECT')}")
\ No newline at end of file
+def on_exit(server):
+    """마스터 종료 직전 버퍼에 남은 로그를 씁니다."""
+    from app.core.buffered_logging import stop_buffered_logging
+    stop_buffered_logging()
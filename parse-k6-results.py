@@ -3,23 +3,57 @@
 """
 k6 summary.json 파일을 읽어서 원하는 형식의 JSON으로 변환
 """
-import json
 import sys
 from pathlib import Path
 
+import orjson
+
+try:
+    import ijson
+    IJSON_INSTALLED = True
+except ImportError:
+    IJSON_INSTALLED = False
+
+# 결과에 쓰는 메트릭 (이름 → values)
+WANTED_METRICS = frozenset({
+    'http_reqs',
+    'http_req_duration{expected_response:true}',
+    'http_req_failed{endpoint:tenant_only}',
+    'dropped_iterations',
+})
+
+
+def _load_metric_values(summary_path):
+    """
+    summary.json에서 WANTED_METRICS의 values만 읽어 {메트릭 이름: values} 딕셔너리로 반환합니다.
+    ijson이 설치되어 있으면 파일 전체를 메모리에 올리지 않고 metrics 항목을 순서대로 읽다가,
+    필요한 메트릭을 모두 찾으면 바로 멈춥니다.
+    """
+    found = {}
+    with open(summary_path, 'rb') as f:
+        if IJSON_INSTALLED:
+            for name, metric in ijson.kvitems(f, 'metrics', use_float=True):
+                if name in WANTED_METRICS:
+                    found[name] = metric.get('values', {})
+                    if len(found) == len(WANTED_METRICS):
+                        break
+        else:
+            metrics = orjson.loads(f.read()).get('metrics', {})
+            for name in WANTED_METRICS & metrics.keys():
+                found[name] = metrics[name].get('values', {})
+    return found
+
+
 def parse_k6_summary(summary_path):
     """summary.json을 파싱하여 원하는 형식으로 변환"""
 
-    with open(summary_path, 'r') as f:
-        data = json.load(f)
-
-    metrics = data.get('metrics', {})
+    metrics = _load_metric_values(summary_path)
 
     # 필요한 메트릭 추출
-    http_reqs = metrics.get('http_reqs', {}).get('values', {})
-    http_req_duration = metrics.get('http_req_duration{expected_response:true}', {}).get('values', {})
-    http_req_failed = metrics.get('http_req_failed{endpoint:tenant_only}', {}).get('values', {})
-    dropped_iterations = metrics.get('dropped_iterations', {}).get('values', {})
+    http_reqs = metrics.get('http_reqs', {})
+    http_req_duration = metrics.get('http_req_duration{expected_response:true}', {})
+    http_req_failed = metrics.get('http_req_failed{endpoint:tenant_only}', {})
+    dropped_iterations = metrics.get('dropped_iterations', {})
 
     # 실패율 계산
     total_requests = http_reqs.get('count', 0)
@@ -57,12 +91,13 @@ def main():
     result = parse_k6_summary(summary_path)
 
     # JSON 출력
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    output = orjson.dumps(result, option=orjson.OPT_INDENT_2)
+    print(output.decode())
 
     # 결과 파일로도 저장
     output_path = Path(summary_path).parent / "k6_result_formatted.json"
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    with open(output_path, 'wb') as f:
+        f.write(output)
 
     print(f"\n✅ 결과 저장: {output_path}")
 
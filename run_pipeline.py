@@ -1,76 +1,77 @@
 # -*- coding: utf-8 -*-
 import asyncio
-import json
 import argparse
 import os
+import sys
 import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional
 
 # ── 외부/플랫폼
 import aioboto3
+import orjson
 from botocore.config import Config
 from openai import AsyncOpenAI
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
 
 # ── 도메인/인프라
 from app.domain.models import UndrmInput, UndrmLog, LlmInput, DecideInput
 from app.infrastructure.storage.s3_client import S3Client          # (변경) s3_client 핸들 주입 버전
-from app.infrastructure.log.dynamodb_logger import DynamoDBLogger  # (변경) Table 핸들 주입 버전
+from app.infrastructure.log.dynamodb_logger import DynamoDBLogger, drain_pending_logs  # (변경) 클라이언트 핸들 주입 버전
 from app.infrastructure.llm.openai_client import LlmClient
-from app.infrastructure.drm.database_license_service import DatabaseLicenseService  # (변경) session_factory 주입
+from app.infrastructure.drm.database_license_service import DatabaseLicenseService  # (변경) AsyncEngine 주입
+from app.infrastructure.drm.adapter import UndrmAdapter
+from app.infrastructure.db_pool import enable_idle_ping
 from app.dependencies import (
     get_undrm_adapter, get_ebook_analyzer, get_start_point_detector, get_epub_parser
 )
-from app.config import get_config
+from app.config import Config as AppConfig, get_config
+from app.core.buffer_utils import wipe_buffer
 
-async def main():
-    """
-    메인 파이프라인 실행 스크립트.
-    FastAPI Depends 없이 수동으로 의존성을 주입해 실행합니다.
-    """
-    # ── CLI 인자
-    parser = argparse.ArgumentParser(description="EPUB 본문 시작점 탐지 파이프라인을 실행합니다.")
-    parser.add_argument("--save-decrypted", action="store_true",
-                        help="복호화된 EPUB 파일을 '.sample/output.epub'으로 저장합니다.")
-    parser.add_argument("--output", type=str, default="./.sample/output.json",
-                        help="최종 결과를 저장할 JSON 파일 이름.")
-    args = parser.parse_args()
+def _write_bytes(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
 
-    undrm_adapter = get_undrm_adapter()
 
-    # ── 옵션: 복호화된 샘플 파일만 생성하고 종료
-    if args.save_decrypted:
-        print("[INFO] 테스트용으로 복호화된 EPUB 파일을 생성합니다...")
-        sample_dir = ".sample"
-        epub_path = os.path.join(sample_dir, "364721831.EPUB")
-        key_path = os.path.join(sample_dir, "key.txt")
+async def _timed(name: str, coro):
+    """코루틴을 실행하고 소요 시간을 [TIMER]로 출력합니다. (동시에 실행되는 단계별 시간 측정용)"""
+    step_start_time = time.time()
+    try:
+        return await coro
+    finally:
+        print(f"[TIMER] {name} took {time.time() - step_start_time:.2f} seconds.")
 
-        with open(epub_path, "rb") as f:
-            encrypted_epub_bytes = f.read()
-        with open(key_path, "r") as f:
-            license_key = f.read().strip()
 
-        undrm_input = UndrmInput(
-            encrypted_epub=encrypted_epub_bytes,
-            license_key=license_key,
-            grant_id="save-decrypted",
-            tenant_id="test",
-        )
-        undrm_output = undrm_adapter.decrypt(undrm_input)
+# 샘플 입력 (--serve가 아닐 때 처리하는 작업, --serve의 작업에서 빠진 필드의 기본값)
+SAMPLE_JOB: Dict[str, str] = {
+    "s3_bucket": "ai-data-research",
+    "s3_key": "AI-EPUB-API/1143778_1722965_v2.epub",
+    "tenant_id": "test-tenant",
+    "itemId": "312392359",  # 테스트용
+}
 
-        output_path = os.path.join(".sample", "output.epub")
-        with open(output_path, "wb") as f:
-            f.write(undrm_output.decrypted_epub)
-        print(f"[SUCCESS] 복호화된 EPUB 파일이 '{output_path}'에 저장되었습니다.")
-        return
 
-    # ───────────────────────────────────────────────────────────────────────────
-    # 수동 lifespan: 공유 리소스(세션/클라이언트/엔진) 준비
-    # ───────────────────────────────────────────────────────────────────────────
-    print("[INFO] 본문 시작점 탐지 파이프라인을 시작합니다...")
-    config = get_config()
+@dataclass
+class PipelineRuntime:
+    """여러 작업이 공유하는 클라이언트/서비스 묶음 (프로세스당 한 번 생성)"""
+    s3: S3Client
+    db_logger: DynamoDBLogger
+    license_service: DatabaseLicenseService
+    undrm_adapter: UndrmAdapter
+    analyzer: Any
+    llm_client: LlmClient
+    start_point_detector: Any
+
 
+@asynccontextmanager
+async def open_runtime(config: AppConfig) -> AsyncIterator[PipelineRuntime]:
+    """
+    수동 lifespan: 공유 리소스(세션/클라이언트/엔진)를 한 번 열고, 블록을 벗어날 때 한꺼번에 정리합니다.
+    --serve 모드에서는 여러 EPUB이 같은 커넥션 풀을 재사용하므로 두 번째 작업부터 TLS/커넥션 수립 비용이 없습니다.
+    """
     # aioboto3 세션
     if config.AWS_PROFILE_NAME:
         boto_session = aioboto3.Session(
@@ -82,85 +83,95 @@ async def main():
     # S3/DynamoDB 공통: botocore 설정
     s3_cfg = Config(
         region_name=config.AWS_REGION,
-        max_pool_connections=int(getattr(config, "S3_MAX_POOL", 128)),
-        retries={"mode": "adaptive", "max_attempts": int(getattr(config, "S3_MAX_ATTEMPTS", 8))},
-        connect_timeout=int(getattr(config, "S3_CONNECT_TIMEOUT", 5)),
-        read_timeout=int(getattr(config, "S3_READ_TIMEOUT", 120)),
+        max_pool_connections=config.S3_MAX_POOL,
+        retries={"mode": "adaptive", "max_attempts": config.S3_MAX_ATTEMPTS},
+        connect_timeout=config.S3_CONNECT_TIMEOUT,
+        read_timeout=config.S3_READ_TIMEOUT,
         tcp_keepalive=True,
     )
     ddb_cfg = Config(
         region_name=config.AWS_REGION,
-        max_pool_connections=int(getattr(config, "DDB_MAX_POOL", 64)),
-        retries={"mode": "adaptive", "max_attempts": int(getattr(config, "DDB_MAX_ATTEMPTS", 8))},
-        connect_timeout=int(getattr(config, "DDB_CONNECT_TIMEOUT", 5)),
-        read_timeout=int(getattr(config, "DDB_READ_TIMEOUT", 10)),
+        max_pool_connections=config.DDB_MAX_POOL,
+        retries={"mode": "adaptive", "max_attempts": config.DDB_MAX_ATTEMPTS},
+        connect_timeout=config.DDB_CONNECT_TIMEOUT,
+        read_timeout=config.DDB_READ_TIMEOUT,
         tcp_keepalive=True,
     )
 
-    # S3/DynamoDB 리소스 컨텍스트 진입
-    s3_client_cm = boto_session.client("s3", config=s3_cfg)
-    dynamodb_cm = boto_session.resource("dynamodb", config=ddb_cfg)
-    s3_client = await s3_client_cm.__aenter__()
-    dynamodb = await dynamodb_cm.__aenter__()
-    ddb_table = await dynamodb.Table(config.DYNAMODB_LOG_TABLE_NAME)
-
-    # OpenAI
-    openai_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY, max_retries=2, timeout=20.0)
-
-    # DB 엔진/세션팩토리(싱글턴) — pymysql → aiomysql 자동 전환
-    dsn = config.DB_CONNECTION_STRING.replace("mysql+pymysql", "mysql+aiomysql")
-    engine = create_async_engine(
-        dsn,
-        pool_size=int(getattr(config, "DB_POOL_SIZE", 10)),
-        max_overflow=int(getattr(config, "DB_MAX_OVERFLOW", 20)),
-        pool_recycle=int(getattr(config, "DB_POOL_RECYCLE", 1800)),
-        pool_pre_ping=True,
-    )
-    SessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
-
-    # ── 애플리케이션 서비스 인스턴스 구성 (수동 주입)
-    s3 = S3Client(s3_client=s3_client)                 # (변경) 세션이 아니라 s3_client 핸들
-    db_logger = DynamoDBLogger(table=ddb_table)        # (변경) 세션이 아니라 Table 핸들
-    license_service = DatabaseLicenseService(          # (변경) 직접 주입
-        session_factory=SessionLocal,
-        table_name=config.DB_TABLE_NAME,
-    )
+    async with AsyncExitStack() as stack:
+        # S3/DynamoDB 클라이언트 컨텍스트 진입 (종료 시 역순으로 정리)
+        s3_client = await stack.enter_async_context(boto_session.client("s3", config=s3_cfg))
+        dynamodb_client = await stack.enter_async_context(boto_session.client("dynamodb", config=ddb_cfg))
+        # DynamoDB 클라이언트를 닫기 전에 배치로 모인 감사 로그를 먼저 기록합니다.
+        stack.push_async_callback(drain_pending_logs)
+
+        # OpenAI
+        openai_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY, max_retries=2, timeout=20.0)
+        stack.push_async_callback(openai_client.close)
+
+        # DB 엔진(싱글턴) — pymysql → aiomysql 자동 전환
+        dsn = config.DB_CONNECTION_STRING.replace("mysql+pymysql", "mysql+aiomysql")
+        engine = create_async_engine(
+            dsn,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_recycle=config.DB_POOL_RECYCLE,
+            pool_use_lifo=True,
+            pool_pre_ping=config.DB_POOL_PRE_PING,
+            isolation_level="AUTOCOMMIT",      # 단건 SELECT만 수행 → 반납 시 ROLLBACK 왕복 생략
+            skip_autocommit_rollback=True,
+        )
+        if not config.DB_POOL_PRE_PING and config.DB_POOL_PING_IDLE > 0:
+            enable_idle_ping(engine, config.DB_POOL_PING_IDLE)
+        stack.push_async_callback(engine.dispose)
+
+        # ── 애플리케이션 서비스 인스턴스 구성 (수동 주입)
+        epub_parser = get_epub_parser()
+        yield PipelineRuntime(
+            # 객체를 여러 Range GET으로 나눠 동시에 받아 하나의 버퍼에 모읍니다. (API의 get_s3_client와 같은 설정)
+            s3=S3Client(
+                s3_client=s3_client,                          # (변경) 세션이 아니라 s3_client 핸들
+                parallel_reads=config.S3_PARALLEL_READS,
+                min_part_size=config.S3_MIN_PART_SIZE,
+            ),
+            db_logger=DynamoDBLogger(client=dynamodb_client, table_name=config.DYNAMODB_LOG_TABLE_NAME),
+            license_service=DatabaseLicenseService(          # (변경) 직접 주입
+                engine=engine,
+                table_name=config.DB_TABLE_NAME,
+            ),
+            undrm_adapter=get_undrm_adapter(),
+            analyzer=get_ebook_analyzer(epub_parser),
+            llm_client=LlmClient(
+                client=openai_client,
+                model_name=config.OPENAI_MODEL_NAME,
+                system_prompt=config.SYSTEM_PROMPT,
+                user_prompt_template=config.USER_PROMPT_TEMPLATE,
+            ),
+            start_point_detector=get_start_point_detector(),
+        )
 
-    epub_parser = get_epub_parser()
-    analyzer = get_ebook_analyzer(epub_parser)
-    llm_client = LlmClient(
-        client=openai_client,
-        model_name=config.OPENAI_MODEL_NAME,
-        system_prompt=config.SYSTEM_PROMPT,
-        user_prompt_template=config.USER_PROMPT_TEMPLATE,
-    )
-    start_point_detector = get_start_point_detector()
 
-    # ───────────────────────────────────────────────────────────────────────────
-    # 파이프라인 실행
-    # ───────────────────────────────────────────────────────────────────────────
+async def run_job(
+    rt: PipelineRuntime, s3_bucket: str, s3_key: str, tenant_id: str, itemId: str,
+    output_path: Optional[str] = None, debug_dump: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """EPUB 한 권에 대해 파이프라인을 실행하고 결과를 반환합니다. (실패 시 None)"""
     decrypted_epub = None
     event_id = None
+    log_task = None
     try:
-        # 샘플 입력
-        s3_bucket = "ai-data-research"
-        s3_key = "AI-EPUB-API/1143778_1722965_v2.epub"
-        tenant_id = "test-tenant"
-        itemId = "312392359"  # 테스트용
-
         total_start_time = time.time()
 
-        # 1) S3에서 암호화 EPUB 수신 (레질리언트 Range 다운로드)
-        step_start_time = time.time()
-        encrypted_epub = await s3.get_object_bytes(bucket=s3_bucket, key=s3_key)
-        print(f"[TIMER] S3 get_object_bytes took {time.time() - step_start_time:.2f} seconds.")
-
-        # 2) 라이선스 키 조회
+        # 1) S3에서 암호화 EPUB 수신 (레질리언트 Range 다운로드) + 2) 라이선스 키 조회
+        # 서로 의존하지 않으므로 동시에 수행합니다. (UndrmPipeline과 동일)
         step_start_time = time.time()
-        license_key = await license_service.get_license(itemId)
+        encrypted_epub, license_key = await asyncio.gather(
+            _timed("S3 get_object_bytes", rt.s3.get_object_bytes(bucket=s3_bucket, key=s3_key)),
+            _timed("license_service.get_license", rt.license_service.get_license(itemId)),
+        )
         if not license_key:
             raise Exception(f"'{itemId}'에 대한 라이선스 키를 찾을 수 없습니다.")
-        print(f"[TIMER] license_service.get_license took {time.time() - step_start_time:.2f} seconds.")
+        print(f"[TIMER] S3 + license (concurrent) took {time.time() - step_start_time:.2f} seconds.")
 
         # 3) DRM 해제 시작 + 로그(Processing)
         undrm_input = UndrmInput(
@@ -173,8 +184,11 @@ async def main():
 
         try:
             step_start_time = time.time()
-            output = await undrm_adapter.decrypt_async(undrm_input)
+            output = await rt.undrm_adapter.decrypt_async(undrm_input)
             print(f"[TIMER] undrm_adapter.decrypt_async took {time.time() - step_start_time:.2f} seconds.")
+            # 암호화된 원본은 더 이상 쓰지 않으므로 바로 지웁니다. (DRM이 없는 EPUB은 원본을 그대로 반환하므로 제외)
+            if output.decrypted_epub is not encrypted_epub:
+                wipe_buffer(encrypted_epub)
 
             log_entry = UndrmLog(
                 tenant_id=tenant_id,
@@ -188,7 +202,10 @@ async def main():
                 undrm_start_time=start_time.isoformat(),
                 undrm_end_time=None,          # (일관성) end_time 대신 undrm_end_time 사용
             )
-            event_id = await db_logger.create_log(log_entry)
+            # 분석은 event_id가 필요 없으므로 PROCESSING 로그 쓰기를 기다리지 않고 바로 분석을 시작합니다.
+            # (event_id는 UndrmLog 생성 시 정해지며, 갱신 전에 log_task를 기다립니다)
+            log_task = asyncio.create_task(rt.db_logger.create_log(log_entry))
+            event_id = log_entry.event_id
             decrypted_epub = output.decrypted_epub
 
         except Exception as e:
@@ -205,27 +222,30 @@ async def main():
                 undrm_start_time=start_time.isoformat(),
                 undrm_end_time=datetime.now(timezone.utc).isoformat(),
             )
-            await db_logger.create_log(fail_entry)
+            await rt.db_logger.create_log(fail_entry)
             raise Exception(f"EPUB 복호화 실패: {e}") from e
 
         # 4) 분석 → LLM → 결정
         step_start_time = time.time()
-        analysis = await analyzer.analyze_async(decrypted_epub)
+        analysis = await rt.analyzer.analyze_async(decrypted_epub)
         print(f"[TIMER] analyzer.analyze_async took {time.time() - step_start_time:.2f} seconds.")
         llm_input = LlmInput(toc=analysis.toc, file_char_counts=analysis.file_char_counts)
 
-        # (디버그) LLM 입력 저장
-        llm_input_json_str = llm_client.format_input_for_llm(llm_input.toc, llm_input.file_char_counts)
-        os.makedirs("./.sample", exist_ok=True)
-        with open("./.sample/llm_input.json", "w", encoding="utf-8") as f:
-            f.write(llm_input_json_str)
+        # (디버그) LLM 입력 저장: --debug-dump일 때만 포맷/저장하며, 파일 쓰기는 이벤트 루프를 막지 않도록 스레드에서 수행
+        # 저장한 문자열은 suggest_start에 그대로 넘겨 같은 입력을 두 번 직렬화하지 않습니다.
+        llm_input_json_str = None
+        if debug_dump:
+            llm_input_json_str = rt.llm_client.format_input_for_llm(
+                llm_input.toc, llm_input.file_char_counts, char_counts_map=llm_input.char_counts_map
+            )
+            await asyncio.to_thread(_write_bytes, "./.sample/llm_input.json", llm_input_json_str.encode("utf-8"))
 
         step_start_time = time.time()
-        llm_candidate = await llm_client.suggest_start(llm_input)
+        llm_candidate = await rt.llm_client.suggest_start(llm_input, user_prompt_content=llm_input_json_str)
         print(f"[TIMER] llm_client.suggest_start took {time.time() - step_start_time:.2f} seconds.")
-        
+
         step_start_time = time.time()
-        decision = start_point_detector.decide(
+        decision = rt.start_point_detector.decide(
             DecideInput(
                 toc=analysis.toc,
                 file_char_counts=analysis.file_char_counts,
@@ -236,46 +256,125 @@ async def main():
         result = {"start_point": decision.model_dump()}
 
         # 5) 결과 저장
-        step_start_time = time.time()
-        os.makedirs(os.path.dirname(args.output), exist_ok=True)
-        with open(args.output, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
-        print(f"[TIMER] Result saving took {time.time() - step_start_time:.2f} seconds.")
-
-        print(f"\n[SUCCESS] 파이프라인 실행 완료. 결과가 '{args.output}' 파일에 저장되었습니다.")
-        print(json.dumps(result, indent=2, ensure_ascii=False))
+        if output_path:
+            step_start_time = time.time()
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            result_json = orjson.dumps(result, option=orjson.OPT_INDENT_2)
+            with open(output_path, "wb") as f:
+                f.write(result_json)
+            print(f"[TIMER] Result saving took {time.time() - step_start_time:.2f} seconds.")
+
+            print(f"\n[SUCCESS] 파이프라인 실행 완료. 결과가 '{output_path}' 파일에 저장되었습니다.")
+            print(result_json.decode())
         print(f"[TIMER] Total execution time: {time.time() - total_start_time:.2f} seconds.")
 
     except Exception as e:
         print(f"\n[ERROR] 파이프라인 실행 중 오류가 발생했습니다: {e}")
         if event_id:
+            await log_task
             # (변경된 로거) update_log는 undrm_end_time을 end_time 파라미터로 받음
-            await db_logger.update_log(
+            await rt.db_logger.update_log(
                 event_id=event_id,
                 status="FAILURE",
                 end_time=datetime.now(timezone.utc).isoformat(),
                 failure_reason=str(e),
             )
-    finally:
-        # 성공/실패 모두 종료시간 기록 (성공 케이스)
-        if event_id:
-            await db_logger.update_log(
+        return None
+    else:
+        # 종료시간 기록 (성공 케이스)
+        # 파이프라인의 except 밖에서 기록하여, 로그 쓰기 실패가 성공한 실행을 FAILURE로 덮어쓰지 않도록 합니다.
+        try:
+            await log_task
+            await rt.db_logger.update_log(
                 event_id=event_id,
                 status="SUCCESS",
                 end_time=datetime.now(timezone.utc).isoformat(),
             )
-
+        except Exception as e:
+            print(f"[WARN] 성공 로그 기록에 실패했습니다: {e}")
+        return result
+    finally:
+        # del만으로는 다른 참조(output 등)가 남아 있어 해제되지 않으므로, bytearray를 0으로 덮어쓰고 비웁니다.
         if decrypted_epub:
-            del decrypted_epub
+            wipe_buffer(decrypted_epub)
             print("\n[INFO] 복호화된 EPUB 데이터가 메모리에서 해제되었습니다.")
 
-        # 리소스 정리
-        await s3_client_cm.__aexit__(None, None, None)
-        await dynamodb_cm.__aexit__(None, None, None)
-        await engine.dispose()
-        # OpenAI는 별도 close 불필요(필요 시 aiohttp 세션을 직접 닫는 구현 추가)
-        # await openai_client.close()
+
+async def serve(rt: PipelineRuntime, debug_dump: bool = False) -> None:
+    """
+    표준 입력에서 한 줄에 하나씩 JSON 작업을 읽어 같은 런타임으로 차례로 처리합니다.
+    작업 예: {"s3_bucket": "...", "s3_key": "...", "tenant_id": "...", "itemId": "..."} (빠진 필드는 SAMPLE_JOB 값 사용)
+    작업마다 {"job": ..., "result": ...} 한 줄을 표준 출력에 씁니다. (실패 시 result는 null)
+    """
+    while True:
+        line = await asyncio.to_thread(sys.stdin.readline)
+        if not line:
+            break
+        if not line.strip():
+            continue
+        try:
+            job = {**SAMPLE_JOB, **orjson.loads(line)}
+        except orjson.JSONDecodeError as e:
+            print(f"[ERROR] 작업을 해석할 수 없습니다: {e}")
+            continue
+        result = await run_job(rt, **job, debug_dump=debug_dump)
+        print(orjson.dumps({"job": job, "result": result}).decode(), flush=True)
+
+
+async def main():
+    """
+    메인 파이프라인 실행 스크립트.
+    FastAPI Depends 없이 수동으로 의존성을 주입해 실행합니다.
+    """
+    # ── CLI 인자
+    parser = argparse.ArgumentParser(description="EPUB 본문 시작점 탐지 파이프라인을 실행합니다.")
+    parser.add_argument("--save-decrypted", action="store_true",
+                        help="복호화된 EPUB 파일을 '.sample/output.epub'으로 저장합니다.")
+    parser.add_argument("--output", type=str, default="./.sample/output.json",
+                        help="최종 결과를 저장할 JSON 파일 이름.")
+    parser.add_argument("--debug-dump", action="store_true",
+                        help="LLM 입력을 '.sample/llm_input.json'으로 저장합니다.")
+    parser.add_argument("--serve", action="store_true",
+                        help="표준 입력에서 JSON 작업을 한 줄씩 읽어, 클라이언트를 재사용하며 여러 EPUB을 처리합니다.")
+    args = parser.parse_args()
+
+    undrm_adapter = get_undrm_adapter()
+
+    # ── 옵션: 복호화된 샘플 파일만 생성하고 종료
+    if args.save_decrypted:
+        print("[INFO] 테스트용으로 복호화된 EPUB 파일을 생성합니다...")
+        sample_dir = ".sample"
+        epub_path = os.path.join(sample_dir, "364721831.EPUB")
+        key_path = os.path.join(sample_dir, "key.txt")
+
+        with open(epub_path, "rb") as f:
+            encrypted_epub_bytes = f.read()
+        with open(key_path, "r") as f:
+            license_key = f.read().strip()
+
+        undrm_input = UndrmInput(
+            encrypted_epub=encrypted_epub_bytes,
+            license_key=license_key,
+            grant_id="save-decrypted",
+            tenant_id="test",
+        )
+        undrm_output = undrm_adapter.decrypt(undrm_input)
+
+        output_path = os.path.join(".sample", "output.epub")
+        with open(output_path, "wb") as f:
+            f.write(undrm_output.decrypted_epub)
+        print(f"[SUCCESS] 복호화된 EPUB 파일이 '{output_path}'에 저장되었습니다.")
+        return
+
+    print("[INFO] 본문 시작점 탐지 파이프라인을 시작합니다...")
+    config = get_config()
+
+    async with open_runtime(config) as rt:
+        if args.serve:
+            await serve(rt, debug_dump=args.debug_dump)
+        else:
+            await run_job(rt, **SAMPLE_JOB, output_path=args.output, debug_dump=args.debug_dump)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
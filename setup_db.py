@@ -7,6 +7,13 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 테스트용 샘플 라이선스 (필요한 항목의 주석을 해제)
+SAMPLE_LICENSES = [
+    {"itemId": "1234567890", "gkey": "7JU0Sq/GabYj1ebnrwAE0yAA130UbeMN4KoWrjgB3XQ="},
+    # {"itemId": "312392359", "gkey": "YrFzzaODMptznN0fczs2YJsG77AW8o5X3ZzYfV5OtlY="},
+    # {"itemId": "42961314", "gkey": "JGefA4S0IBq8x+v/6SbyN2YtgsGbB7VLsziitmKQ4f4="},
+]
+
 def setup_database():
     """
     테스트용 데이터베이스 테이블을 생성하고 초기 데이터를 삽입합니다.
@@ -51,24 +58,18 @@ def setup_database():
             logger.info("`ai-epub-api-test` 테이블이 성공적으로 생성되었습니다.")
 
             # 3. 샘플 데이터 삽입 (중복 방지)
-            item_id = "1234567890"
-            license_key = "7JU0Sq/GabYj1ebnrwAE0yAA130UbeMN4KoWrjgB3XQ="
-            # item_id = "312392359"
-            # license_key = "YrFzzaODMptznN0fczs2YJsG77AW8o5X3ZzYfV5OtlY="
-            # item_id = "42961314"
-            # license_key = "JGefA4S0IBq8x+v/6SbyN2YtgsGbB7VLsziitmKQ4f4="
-            
-            # 기존 데이터 확인
-            check_query = text("SELECT COUNT(*) FROM `ai-epub-api-test` WHERE itemId = :itemId")
-            result = connection.execute(check_query, {"itemId": item_id}).scalar()
-
-            if result == 0:
-                insert_query = text("""
-                INSERT INTO `ai-epub-api-test` (itemId, gkey) VALUES (:itemId, :gkey)
-                """)
-                connection.execute(insert_query, {"itemId": item_id, "gkey": license_key})
-                connection.commit()
-                logger.info("샘플 라이선스 키 데이터가 성공적으로 삽입되었습니다.")
+            # itemId의 UNIQUE 제약을 이용해 조회 없이 한 번에 삽입하고, 이미 있는 행은 그대로 둡니다.
+            # 여러 행은 executemany 한 번으로 보냅니다.
+            insert_query = text("""
+            INSERT INTO `ai-epub-api-test` (itemId, gkey) VALUES (:itemId, :gkey)
+            ON DUPLICATE KEY UPDATE id = id
+            """)
+            result = connection.execute(insert_query, SAMPLE_LICENSES)
+            connection.commit()
+            # ON DUPLICATE KEY UPDATE에서 값이 바뀌지 않은 기존 행은 영향받은 행 수에 포함되지 않습니다.
+            inserted = result.rowcount
+            if inserted > 0:
+                logger.info(f"샘플 라이선스 키 데이터 {inserted}건이 성공적으로 삽입되었습니다.")
             else:
                 logger.info("샘플 데이터가 이미 존재합니다. 삽입을 건너뜁니다.")
 
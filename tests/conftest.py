@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+공용 pytest 설정입니다.
+
+DRM 복호화처럼 비싼 결과물은 테스트마다 다시 만들지 않습니다.
+- 메모리 결과물: scope="session" 픽스처로 한 번만 만들고 공유합니다. (예: sample_decrypted_epub)
+- 디스크 결과물: tmp_path_factory로 세션 템플릿 디렉터리를 한 번 만들고,
+  테스트별 픽스처에서 shutil.copytree(template, tmp_path / ...)로 복사해 씁니다. (예: decrypted_epub_dir)
+  복사본만 수정하고 템플릿은 건드리지 않아야 테스트끼리 격리됩니다.
+"""
+import pytest
+
+
+def pytest_collection_modifyitems(config, items):
+    """`-m`으로 integration 마커를 직접 선택하지 않으면 integration 테스트를 건너뜁니다."""
+    markexpr = config.getoption("markexpr") or ""
+    if "integration" in markexpr and "not integration" not in markexpr:
+        return
+    skip_integration = pytest.mark.skip(reason="통합 테스트는 -m integration으로 실행합니다.")
+    for item in items:
+        if "integration" in item.keywords:
+            item.add_marker(skip_integration)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import pytest
-from fastapi.testclient import TestClient
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
 from unittest.mock import MagicMock, AsyncMock
 
 from app.api.endpoints import app
@@ -11,28 +12,32 @@ from app.dependencies import (
     get_db_logger,
 )
 from app.application.shared.pipeline import UndrmPipeline
-from app.domain.models import UndrmPipelineOutput, LlmStartCandidate, DecideOutput
+from app.domain.models import UndrmPipelineOutput, LlmStartCandidate, DecideOutput, UndrmLog
 
 # --- Mock Fixtures (가짜 객체 설정) ---
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_pipeline():
     """UndrmPipeline의 가짜(Mock) 객체를 생성합니다."""
     pipeline = MagicMock(spec=UndrmPipeline)
     pipeline.run = AsyncMock(return_value=UndrmPipelineOutput(
         decrypted_epub=b"fake epub data",
-        event_id="api-test-event"
+        log_entry=UndrmLog(
+            event_id="api-test-event", tenant_id="test-tenant", itemId="12345", grant_id="N/A",
+            s3_bucket="test-bucket", s3_key="test-key.epub", reason="find_start_point",
+            status="PROCESSING", undrm_start_time="2024-01-01T00:00:00+00:00",
+        ),
     ))
     return pipeline
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_analyzer():
     """EbookAnalyzer의 가짜(Mock) 객체를 생성합니다."""
     analyzer = MagicMock()
     analyzer.analyze_async = AsyncMock()
     return analyzer
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_llm_client():
     """LlmClient의 가짜(Mock) 객체를 생성합니다."""
     llm = MagicMock()
@@ -40,7 +45,7 @@ def mock_llm_client():
     llm.suggest_start = AsyncMock(return_value=LlmStartCandidate(file="test.xhtml"))
     return llm
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_detector():
     """StartPointDetector의 가짜(Mock) 객체를 생성합니다."""
     detector = MagicMock()
@@ -51,7 +56,7 @@ def mock_detector():
     )
     return detector
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_db_logger():
     """ILogger의 가짜(Mock) 객체를 생성합니다."""
     logger = MagicMock()
@@ -59,13 +64,18 @@ def mock_db_logger():
     logger.update_log = AsyncMock()
     return logger
 
-# --- 의존성이 교체된 TestClient Fixture ---
+@pytest.fixture(autouse=True)
+def reset_mocks(mock_pipeline, mock_analyzer, mock_llm_client, mock_detector, mock_db_logger):
+    """모듈 단위로 공유하는 Mock의 호출 기록을 테스트마다 초기화합니다. (반환값 설정은 유지)"""
+    yield
+    for mock in (mock_pipeline, mock_analyzer, mock_llm_client, mock_detector, mock_db_logger):
+        mock.reset_mock()
 
-@pytest.fixture
-def client(mock_pipeline, mock_analyzer, mock_llm_client, mock_detector, mock_db_logger):
-    """
-    모든 외부 의존성이 가짜 객체(Mock)로 교체된 TestClient를 제공합니다.
-    """
+# --- 의존성이 교체된 AsyncClient Fixture ---
+
+@pytest.fixture(scope="module")
+def overridden_app(mock_pipeline, mock_analyzer, mock_llm_client, mock_detector, mock_db_logger):
+    """모든 외부 의존성을 가짜 객체(Mock)로 교체한 앱을 모듈 단위로 제공합니다."""
     app.dependency_overrides = {
         UndrmPipeline: lambda: mock_pipeline,
         get_ebook_analyzer: lambda: mock_analyzer,
@@ -73,16 +83,23 @@ def client(mock_pipeline, mock_analyzer, mock_llm_client, mock_detector, mock_db
         get_start_point_detector: lambda: mock_detector,
         get_db_logger: lambda: mock_db_logger,
     }
-    
-    with TestClient(app) as test_client:
-        yield test_client
-    
-    # 테스트가 끝난 후 교체된 의존성을 원래대로 되돌립니다.
+    yield app
+    # 모듈의 테스트가 모두 끝난 후 교체된 의존성을 원래대로 되돌립니다.
     app.dependency_overrides.clear()
 
+@pytest_asyncio.fixture
+async def client(overridden_app):
+    """
+    ASGI 앱을 직접 호출하는 비동기 클라이언트를 제공합니다.
+    의존성이 모두 교체되어 있으므로 lifespan(AWS/DB/LLM 클라이언트 생성)은 실행하지 않으며,
+    스레드를 거치는 TestClient와 달리 테스트의 이벤트 루프에서 바로 요청을 처리합니다.
+    """
+    async with AsyncClient(transport=ASGITransport(app=overridden_app), base_url="http://test") as ac:
+        yield ac
+
 # --- API 테스트 ---
 
-def test_inspect_epub_success(client):
+async def test_inspect_epub_success(client):
     """
     /v1/epub/inspect 엔드포인트의 정상적인 성공 경로를 테스트합니다.
     """
@@ -93,14 +110,14 @@ def test_inspect_epub_success(client):
         "purpose": "find_start_point",
         "tenant_id": "api-test-tenant"
     }
-    response = client.post("/v1/epub/inspect", json=request_payload)
+    response = await client.post("/v1/epub/inspect", json=request_payload)
     
     assert response.status_code == 200
     response_data = response.json()
     assert response_data["source"]["bucket"] == "test-bucket"
     assert response_data["start"]["start_file"] == "OEBPS/Text/chapter1.xhtml"
 
-def test_inspect_epub_invalid_purpose(client):
+async def test_inspect_epub_invalid_purpose(client):
     """
     지원하지 않는 'purpose'로 요청했을 때의 응답을 테스트합니다.
     """
@@ -111,12 +128,12 @@ def test_inspect_epub_invalid_purpose(client):
         "purpose": "unsupported_purpose",
         "tenant_id": "api-test-tenant"
     }
-    response = client.post("/v1/epub/inspect", json=request_payload)
+    response = await client.post("/v1/epub/inspect", json=request_payload)
     
     assert response.status_code == 400
     assert "지원하지 않는 목적입니다" in response.json()["detail"]
 
-def test_inspect_epub_missing_field(client):
+async def test_inspect_epub_missing_field(client):
     """
     필수 필드가 누락된 요청에 대한 응답을 테스트합니다.
     """
@@ -126,7 +143,56 @@ def test_inspect_epub_missing_field(client):
         "purpose": "find_start_point",
         "tenant_id": "api-test-tenant"
     }
-    response = client.post("/v1/epub/inspect", json=request_payload)
+    response = await client.post("/v1/epub/inspect", json=request_payload)
     
     assert response.status_code == 422
-    assert "s3_key" in response.json()["detail"][0]["loc"]
\ No newline at end of file
+    assert "s3_key" in response.json()["detail"][0]["loc"]
+# --- Lifespan 테스트 ---
+
+async def test_lifespan_closes_every_client_when_one_opener_fails(mocker):
+    """
+    시작 중 클라이언트 하나의 초기화가 실패해도, 그보다 늦게 열린 나머지 클라이언트까지 모두 닫히는지 테스트합니다.
+    """
+    import asyncio
+    from contextlib import asynccontextmanager
+    from app.lifespan import lifespan
+
+    config = MagicMock(
+        AWS_PROFILE_NAME=None, AWS_REGION="ap-northeast-2", EPUB_THREADS=2, KMS_KEY_ID="test-key",
+        S3_MAX_POOL=10, S3_MAX_ATTEMPTS=3, S3_CONNECT_TIMEOUT=1, S3_READ_TIMEOUT=1,
+        DDB_MAX_POOL=10, DDB_MAX_ATTEMPTS=3, DDB_CONNECT_TIMEOUT=1, DDB_READ_TIMEOUT=1,
+        DB_CONNECTION_STRING="mysql+pymysql://user:pw@localhost/db", DB_POOL_PRE_PING=True,
+        DB_POOL_PREWARM=False, OPENAI_API_KEY=None,
+    )
+    mocker.patch("app.lifespan.get_config", return_value=config)
+    mocker.patch.object(asyncio.get_running_loop(), "set_default_executor")
+    mocker.patch("app.lifespan.anyio.to_thread.current_default_thread_limiter")
+
+    exited = []
+
+    def slow_context(name):
+        @asynccontextmanager
+        async def _open():
+            await asyncio.sleep(0.01)  # 실패보다 늦게 열리는 클라이언트
+            try:
+                yield MagicMock()
+            finally:
+                exited.append(name)
+        return _open()
+
+    @asynccontextmanager
+    async def failing_dynamodb():
+        raise ConnectionError("dynamodb unavailable")
+        yield
+
+    session = mocker.patch("app.lifespan.aioboto3.Session").return_value
+    session.client.side_effect = lambda name, config: failing_dynamodb() if name == "dynamodb" else slow_context(name)
+    engine = MagicMock(dispose=AsyncMock(side_effect=lambda: exited.append("db_engine")))
+    mocker.patch("app.lifespan.create_async_engine", return_value=engine)
+    mocker.patch("app.lifespan.create_llm_http_client", side_effect=lambda: slow_context("llm_http"))
+    mocker.patch("app.lifespan.create_chat_llm", return_value=None)
+
+    with pytest.raises(ConnectionError):
+        async with lifespan(app):
+            pass
+    assert sorted(exited) == ["db_engine", "kms", "llm_http", "s3"]
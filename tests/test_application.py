@@ -10,7 +10,25 @@ from app.domain.interfaces import ILogger
 from app.application.shared.pipeline import UndrmPipeline
 from app.domain.models import (
     AnalyzeOutput, TocItem, FileCharStat, LlmStartCandidate, 
-    UndrmPipelineOutput, DecideOutput
+    UndrmPipelineOutput, DecideOutput, UndrmLog
+)
+
+# --- Mock 반환값 템플릿 ---
+# 유스케이스는 반환값을 변경하지 않으므로(log_entry.finished()는 새 객체 반환) 모듈에서 한 번만 만들어 공유합니다.
+
+_ANALYZE_OUT = AnalyzeOutput(
+    toc=[TocItem(title="Chapter 1", href="ch1.xhtml", level=1)],
+    file_char_counts=[FileCharStat(path="ch1.xhtml", chars=2000, has_text=True)],
+)
+_LLM_OUT = LlmStartCandidate(file="ch1.xhtml", rationale="LLM thinks this is the start.", confidence=0.9)
+_DECIDE_OUT = DecideOutput(start_file="ch1.xhtml", confidence=0.95, rationale="Detector confirmed.")
+_PIPE_OUT = UndrmPipelineOutput(
+    decrypted_epub=b"decrypted epub data",
+    log_entry=UndrmLog(
+        event_id="test-event-id", tenant_id="test-tenant", itemId="12345", grant_id="N/A",
+        s3_bucket="test-bucket", s3_key="test-key.epub", reason="test",
+        status="PROCESSING", undrm_start_time="2024-01-01T00:00:00+00:00",
+    ),
 )
 
 # --- 의존성 Mocking을 위한 Fixtures ---
@@ -19,10 +37,7 @@ from app.domain.models import (
 def mock_analyzer():
     """EbookAnalyzer의 가짜 객체를 생성합니다."""
     analyzer = MagicMock(spec=EbookAnalyzer)
-    analyzer.analyze_async = AsyncMock(return_value=AnalyzeOutput(
-        toc=[TocItem(title="Chapter 1", href="ch1.xhtml", level=1)],
-        file_char_counts=[FileCharStat(path="ch1.xhtml", chars=2000, has_text=True)],
-    ))
+    analyzer.analyze_async = AsyncMock(return_value=_ANALYZE_OUT)
     return analyzer
 
 @pytest.fixture
@@ -30,9 +45,8 @@ def mock_llm_client():
     """LlmClient의 가짜 객체를 생성합니다."""
     llm_client = MagicMock(spec=LlmClient)
     llm_client.client = MagicMock()  # 'client' 속성 추가
-    llm_client.suggest_start = AsyncMock(return_value=LlmStartCandidate(
-        file="ch1.xhtml", rationale="LLM thinks this is the start.", confidence=0.9
-    ))
+    llm_client.llm = MagicMock()  # 'llm'(ChatOpenAI) 속성 추가 (유스케이스가 초기화 여부를 확인함)
+    llm_client.suggest_start = AsyncMock(return_value=_LLM_OUT)
     return llm_client
 
 from app.application.extract_hashtags.services import HashtagExtractor
@@ -42,9 +56,7 @@ from app.application.extract_hashtags.services import HashtagExtractor
 def mock_detector():
     """StartPointDetector의 가짜 객체를 생성합니다."""
     detector = MagicMock(spec=StartPointDetector)
-    detector.decide.return_value = DecideOutput(
-        start_file="ch1.xhtml", confidence=0.95, rationale="Detector confirmed."
-    )
+    detector.decide.return_value = _DECIDE_OUT
     return detector
 
 @pytest.fixture
@@ -59,6 +71,7 @@ def mock_extractor():
 def mock_db_logger():
     """ILogger의 가짜 객체를 생성합니다."""
     logger = MagicMock(spec=ILogger)
+    logger.create_log = AsyncMock()
     logger.update_log = AsyncMock()
     return logger
 
@@ -66,25 +79,15 @@ def mock_db_logger():
 def mock_pipeline():
     """비동기 run 메서드를 가진 UndrmPipeline의 가짜 객체를 생성합니다."""
     pipeline = MagicMock(spec=UndrmPipeline)
-    pipeline.run = AsyncMock(return_value=UndrmPipelineOutput(
-        decrypted_epub=b"decrypted epub data",
-        event_id="test-event-id"
-    ))
+    pipeline.run = AsyncMock(return_value=_PIPE_OUT)
     return pipeline
 
 # --- find_start_point 유스케이스 테스트 ---
 
-@pytest.mark.asyncio
-async def test_find_start_point_use_case_success(
-    mock_analyzer, mock_llm_client, mock_detector, mock_db_logger, mock_pipeline
-):
-    """
-    find_start_point 유스케이스의 성공적인 실행을 테스트합니다.
-    모든 의존성이 올바르게 호출되고 유효한 결과가 반환되는지 검증합니다.
-    """
-    # --- 준비 (Arrange) ---
-    # 유스케이스에 전달할 입력 파라미터
-    params = {
+@pytest.fixture
+def fsp_params(mock_analyzer, mock_llm_client, mock_detector, mock_db_logger, mock_pipeline):
+    """find_start_point 유스케이스에 전달할 입력 파라미터를 생성합니다."""
+    return {
         "s3_bucket": "test-bucket",
         "s3_key": "test-key.epub",
         "tenant_id": "test-tenant",
@@ -97,72 +100,45 @@ async def test_find_start_point_use_case_success(
         "pipeline": mock_pipeline,
     }
 
-    # --- 실행 (Act) ---
-    result = await find_start_point(**params)
+async def test_find_start_point_reuses_cached_decision(fsp_params, mock_analyzer, mock_llm_client, mock_db_logger):
+    """같은 책(itemId + 내용 해시)을 다시 검사하면 분석/LLM 호출 없이 캐시된 결정을 반환하는지 테스트합니다."""
+    from app.application.find_start_point.decision_cache import DecisionCache
 
-    # --- 검증 (Assert) ---
-    # 1. 파이프라인이 올바른 인자와 함께 호출되었는지 확인
-    mock_pipeline.run.assert_called_once_with(
-        s3_bucket="test-bucket",
-        s3_key="test-key.epub",
-        tenant_id="test-tenant",
-        itemId="12345",
-        reason="find_start_point"
-    )
+    cache = DecisionCache(maxsize=8, ttl=60)
+    params = {**fsp_params, "decision_cache": cache}
 
-    # 2. 핵심 로직(analyze, suggest, decide)이 호출되었는지 확인
-    mock_analyzer.analyze_async.assert_called_once_with(b"decrypted epub data")
-    mock_llm_client.suggest_start.assert_called_once()
-    mock_detector.decide.assert_called_once()
+    first = await find_start_point(**params)
+    second = await find_start_point(**params)
 
-    # 3. 최종 로그가 업데이트되었는지 확인
-    mock_db_logger.update_log.assert_called()
-    # 최종 상태가 "SUCCESS"인지 확인
-    assert mock_db_logger.update_log.call_args.kwargs['status'] == "SUCCESS"
+    assert second == first
+    mock_analyzer.analyze_async.assert_called_once()
+    mock_llm_client.suggest_start.assert_called_once()
+    # 캐시 적중 시에도 요청마다 SUCCESS 로그는 기록되어야 함
+    assert [c.args[0].status for c in mock_db_logger.create_log.call_args_list] == ["SUCCESS", "SUCCESS"]
 
-    # 4. 결과 형식이 올바른지 확인
-    assert "start_point" in result
-    assert result["start_point"]["start_file"] == "ch1.xhtml"
-    assert result["start_point"]["confidence"] == 0.95
+    # 분석 옵션이 다르면 별도의 결정으로 취급
+    await find_start_point(**{**params, "use_full_toc_analysis": True})
+    assert mock_analyzer.analyze_async.call_count == 2
 
-@pytest.mark.asyncio
-async def test_find_start_point_raises_missing_toc_error(
-    mock_analyzer, mock_llm_client, mock_detector, mock_db_logger, mock_pipeline
-):
+async def test_find_start_point_raises_missing_toc_error(fsp_params, mock_analyzer, mock_db_logger):
     """
     분석기(analyzer)에서 MissingTocError가 발생했을 때 유스케이스가 이를 올바르게 처리하는지 테스트합니다.
     """
     # --- 준비 (Arrange) ---
     from app.domain.errors import MissingTocError
     mock_analyzer.analyze_async.side_effect = MissingTocError("TOC not found")
-    
-    params = {
-        "s3_bucket": "test-bucket",
-        "s3_key": "test-key.epub",
-        "tenant_id": "test-tenant",
-        "itemId": "12345",
-        "use_full_toc_analysis": False,
-        "analyzer": mock_analyzer,
-        "llm_client": mock_llm_client,
-        "detector": mock_detector,
-        "db_logger": mock_db_logger,
-        "pipeline": mock_pipeline,
-    }
 
     # --- 실행 및 검증 (Act & Assert) ---
     with pytest.raises(MissingTocError, match="TOC not found"):
-        await find_start_point(**params)
+        await find_start_point(**fsp_params)
 
     # 실패가 로그에 기록되었는지 확인
-    mock_db_logger.update_log.assert_called_once()
-    assert mock_db_logger.update_log.call_args.kwargs['status'] == "FAILURE"
-    assert "TOC not found" in mock_db_logger.update_log.call_args.kwargs['failure_reason']
+    mock_db_logger.create_log.assert_called_once()
+    assert mock_db_logger.create_log.call_args.args[0].status == "FAILURE"
+    assert "TOC not found" in mock_db_logger.create_log.call_args.args[0].failure_reason
 
 
-@pytest.mark.asyncio
-async def test_find_start_point_use_case_handles_exception(
-    mock_analyzer, mock_llm_client, mock_detector, mock_db_logger, mock_pipeline
-):
+async def test_find_start_point_use_case_handles_exception(fsp_params, mock_analyzer, mock_db_logger):
     """
     의존성에서 예외가 발생했을 때 유스케이스가 이를 올바르게 처리하고
     실패를 기록하는지 테스트합니다.
@@ -170,41 +146,39 @@ async def test_find_start_point_use_case_handles_exception(
     # --- 준비 (Arrange) ---
     # 분석 단계에서 실패를 시뮬레이션
     mock_analyzer.analyze_async.side_effect = ValueError("EPUB parsing failed")
-    
-    params = {
-        "s3_bucket": "test-bucket",
-        "s3_key": "test-key.epub",
-        "tenant_id": "test-tenant",
-        "itemId": "12345",
-        "use_full_toc_analysis": False,
-        "analyzer": mock_analyzer,
-        "llm_client": mock_llm_client,
-        "detector": mock_detector,
-        "db_logger": mock_db_logger,
-        "pipeline": mock_pipeline,
-    }
 
     # --- 실행 및 검증 (Act & Assert) ---
     with pytest.raises(ValueError, match="EPUB parsing failed"):
-        await find_start_point(**params)
+        await find_start_point(**fsp_params)
 
     # 실패가 로그에 기록되었는지 확인
-    mock_db_logger.update_log.assert_called()
+    mock_db_logger.create_log.assert_called()
     # 최종 상태가 "FAILURE"인지 확인
-    assert mock_db_logger.update_log.call_args.kwargs['status'] == "FAILURE"
-    assert "EPUB parsing failed" in mock_db_logger.update_log.call_args.kwargs['failure_reason']
+    assert mock_db_logger.create_log.call_args.args[0].status == "FAILURE"
+    assert "EPUB parsing failed" in mock_db_logger.create_log.call_args.args[0].failure_reason
 
 
-# --- extract_hashtags 유스케이스 테스트 ---
+# --- 유스케이스 공통 성공 경로 테스트 ---
+
+def _check_find_start_point(result, params):
+    # 핵심 로직(analyze, suggest, decide)이 호출되었는지 확인
+    params["analyzer"].analyze_async.assert_called_once_with(b"decrypted epub data")
+    params["llm_client"].suggest_start.assert_called_once()
+    params["detector"].decide.assert_called_once()
+    assert result["start_point"]["start_file"] == "ch1.xhtml"
+    assert result["start_point"]["confidence"] == 0.95
+
+def _check_extract_hashtags(result, params):
+    # 핵심 로직(extract_async)이 호출되었는지 확인
+    params["extractor"].extract_async.assert_called_once_with(b"decrypted epub data")
+    assert result["hashtags"] == ["#ebook", "#test", "#sample"]
+
+@pytest.fixture(params=["find_start_point", "extract_hashtags"])
+def use_case_runner(request, fsp_params, mock_extractor, mock_db_logger, mock_pipeline):
+    """(reason, 유스케이스 함수, 입력 파라미터, 유스케이스별 검증 함수)를 반환합니다."""
+    if request.param == "find_start_point":
+        return request.param, find_start_point, fsp_params, _check_find_start_point
 
-@pytest.mark.asyncio
-async def test_extract_hashtags_use_case_success(
-    mock_extractor, mock_db_logger, mock_pipeline
-):
-    """
-    extract_hashtags 유스케이스의 성공적인 실행을 테스트합니다.
-    """
-    # --- 준비 (Arrange) ---
     from app.application.extract_hashtags.use_case import extract_hashtags
     params = {
         "s3_bucket": "test-bucket",
@@ -215,9 +189,17 @@ async def test_extract_hashtags_use_case_success(
         "extractor": mock_extractor,
         "db_logger": mock_db_logger,
     }
+    return request.param, extract_hashtags, params, _check_extract_hashtags
+
+async def test_use_case_success(use_case_runner, mock_db_logger, mock_pipeline):
+    """
+    유스케이스의 성공적인 실행을 테스트합니다.
+    모든 의존성이 올바르게 호출되고 유효한 결과가 반환되는지 검증합니다.
+    """
+    reason, use_case, params, check = use_case_runner
 
     # --- 실행 (Act) ---
-    result = await extract_hashtags(**params)
+    result = await use_case(**params)
 
     # --- 검증 (Assert) ---
     # 1. 파이프라인이 올바른 인자와 함께 호출되었는지 확인
@@ -225,17 +207,60 @@ async def test_extract_hashtags_use_case_success(
         s3_bucket="test-bucket",
         s3_key="test-key.epub",
         tenant_id="test-tenant",
-        itemId="54321",
-        reason="extract_hashtags"
+        itemId=params["itemId"],
+        reason=reason
     )
 
-    # 2. 핵심 로직(extract_async)이 호출되었는지 확인
-    mock_extractor.extract_async.assert_called_once_with(b"decrypted epub data")
-
-    # 3. 최종 로그가 업데이트되었는지 확인
-    mock_db_logger.update_log.assert_called()
-    assert mock_db_logger.update_log.call_args.kwargs['status'] == "SUCCESS"
-
-    # 4. 결과 형식이 올바른지 확인
-    assert "hashtags" in result
-    assert result["hashtags"] == ["#ebook", "#test", "#sample"]
+    # 2. 최종 상태("SUCCESS")의 로그가 한 번만 기록되었는지 확인
+    mock_db_logger.create_log.assert_called_once()
+    mock_db_logger.update_log.assert_not_called()
+    assert mock_db_logger.create_log.call_args.args[0].status == "SUCCESS"
+    assert mock_db_logger.create_log.call_args.args[0].event_id == "test-event-id"
+
+    # 3. 유스케이스별 핵심 로직과 결과 형식 확인
+    check(result, params)
+
+
+# --- EbookAnalyzer 테스트 ---
+
+def _build_epub_bytes() -> bytes:
+    """목차(NCX)와 본문 2개를 가진 최소 EPUB 바이트를 생성합니다."""
+    import io
+    import zipfile
+    files = {
+        "META-INF/container.xml": (
+            '<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+            '<rootfiles><rootfile full-path="OEBPS/content.opf"/></rootfiles></container>'
+        ),
+        "OEBPS/content.opf": (
+            '<package version="2.0" xmlns="http://www.idpf.org/2007/opf"><manifest>'
+            '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>'
+            '<item id="ch1" href="ch1.xhtml" media-type="application/xhtml+xml"/>'
+            '<item id="ch2" href="ch2.xhtml" media-type="application/xhtml+xml"/>'
+            '</manifest><spine toc="ncx"><itemref idref="ch1"/><itemref idref="ch2"/></spine></package>'
+        ),
+        "OEBPS/toc.ncx": (
+            '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/"><navMap>'
+            '<navPoint><navLabel><text>Chapter 1</text></navLabel><content src="ch1.xhtml"/></navPoint>'
+            '</navMap></ncx>'
+        ),
+        "OEBPS/ch1.xhtml": "<html><body><p>Hello</p></body></html>",
+        "OEBPS/ch2.xhtml": "<html><body><p>Second chapter</p></body></html>",
+    }
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for path, content in files.items():
+            zf.writestr(path, content)
+    return buf.getvalue()
+
+async def test_analyze_async_matches_sync_analyze():
+    """스레드 팬아웃 방식의 analyze_async가 동기 analyze와 동일한 결과를 내는지 테스트합니다."""
+    from app.core.epub_parser import EpubParser
+    analyzer = EbookAnalyzer(EpubParser())
+    epub_bytes = _build_epub_bytes()
+
+    result = await analyzer.analyze_async(epub_bytes)
+
+    assert result == analyzer.analyze(epub_bytes)
+    assert [stat.path for stat in result.file_char_counts] == ["OEBPS/ch1.xhtml", "OEBPS/ch2.xhtml"]
+    assert result.file_char_counts[1].chars == len("Second chapter")
@@ -2,12 +2,13 @@
 import pytest
 import zipfile
 import io
+from typing import NamedTuple
 from app.core.epub_parser import EpubParser
 from app.domain.models import TocItem
 
 # --- 테스트 데이터 ---
 
-CONTAINER_XML = """<?xml version="1.0"?>
+CONTAINER_XML = b"""<?xml version="1.0"?>
 <container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
   <rootfiles>
     <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
@@ -15,7 +16,7 @@ CONTAINER_XML = """<?xml version="1.0"?>
 </container>
 """
 
-OPF_EPUB2 = """<?xml version="1.0"?>
+OPF_EPUB2 = b"""<?xml version="1.0"?>
 <package version="2.0" xmlns="http://www.idpf.org/2007/opf" unique-identifier="book-id">
   <metadata/>
   <manifest>
@@ -30,7 +31,7 @@ OPF_EPUB2 = """<?xml version="1.0"?>
 </package>
 """
 
-TOC_NCX = """<?xml version="1.0"?>
+TOC_NCX = b"""<?xml version="1.0"?>
 <ncx version="2005-1" xmlns="http://www.daisy.org/z3986/2005/ncx/">
   <head/>
   <docTitle><text>Test Book</text></docTitle>
@@ -51,7 +52,7 @@ TOC_NCX = """<?xml version="1.0"?>
 </ncx>
 """
 
-OPF_EPUB3 = """<?xml version="1.0"?>
+OPF_EPUB3 = b"""<?xml version="1.0"?>
 <package version="3.0" xmlns="http://www.idpf.org/2007/opf" unique-identifier="book-id">
   <metadata/>
   <manifest>
@@ -66,7 +67,7 @@ OPF_EPUB3 = """<?xml version="1.0"?>
 </package>
 """
 
-NAV_XHTML = """<?xml version="1.0" encoding="UTF-8"?>
+NAV_XHTML = b"""<?xml version="1.0" encoding="UTF-8"?>
 <html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops">
 <head><title>Navigation</title></head>
 <body>
@@ -85,7 +86,17 @@ NAV_XHTML = """<?xml version="1.0" encoding="UTF-8"?>
 </html>
 """
 
+# 가상 EPUB2/EPUB3 모두 같은 목차를 가지므로 기대값을 한 번만 만듭니다.
+EXPECTED_TOC = [
+    TocItem(title="Cover", href="OEBPS/cover.xhtml", level=1),
+    TocItem(title="Chapter 1", href="OEBPS/chapter1.xhtml", level=1),
+    TocItem(title="Section 1.1", href="OEBPS/chapter1.xhtml#sec1", level=2),
+]
+
 HTML_CONTENT = "<html><head><title>Test</title></head><body><p>Hello, <b>world</b>!</p></body></html>"
+HTML_CONTENT_BYTES = HTML_CONTENT.encode("utf-8")
+# get_plain_text(HTML_CONTENT_BYTES)의 정규화된 기대값 (요소 주변 공백 차이는 " !" → "!"로 맞춤)
+EXPECTED_PLAIN = "Test Hello, world!"
 
 # --- Fixtures ---
 
@@ -94,33 +105,82 @@ def parser():
     """EpubParser의 새 인스턴스를 반환합니다."""
     return EpubParser()
 
-def create_mock_epub(files):
-    """파일 경로와 내용을 담은 딕셔너리로부터 메모리 내 zip 파일을 생성합니다."""
+def create_mock_epub_bytes(files):
+    """파일 경로와 내용을 담은 딕셔너리로부터 메모리 내 zip 파일의 바이트를 생성합니다."""
     zip_buffer = io.BytesIO()
     with zipfile.ZipFile(zip_buffer, "w") as zf:
         for path, content in files.items():
             zf.writestr(path, content)
-    zip_buffer.seek(0)
-    return zipfile.ZipFile(zip_buffer, "r")
+    return zip_buffer.getvalue()
 
-@pytest.fixture
-def mock_epub2_zip():
-    """EPUB 2 버전에 맞는 가상 EPUB 파일을 생성합니다."""
-    return create_mock_epub({
+def create_mock_epub(files):
+    """파일 경로와 내용을 담은 딕셔너리로부터 메모리 내 zip 파일을 생성합니다."""
+    return zipfile.ZipFile(io.BytesIO(create_mock_epub_bytes(files)), "r")
+
+# ZIP 압축은 세션에서 한 번만 하고, 테스트마다 같은 바이트 위에 새 ZipFile 핸들을 엽니다.
+@pytest.fixture(scope="session")
+def _epub2_bytes():
+    return create_mock_epub_bytes({
         "META-INF/container.xml": CONTAINER_XML,
         "OEBPS/content.opf": OPF_EPUB2,
         "OEBPS/toc.ncx": TOC_NCX,
     })
 
-@pytest.fixture
-def mock_epub3_zip():
-    """EPUB 3 버전에 맞는 가상 EPUB 파일을 생성합니다."""
-    return create_mock_epub({
+@pytest.fixture(scope="session")
+def _epub3_bytes():
+    return create_mock_epub_bytes({
         "META-INF/container.xml": CONTAINER_XML,
         "OEBPS/content.opf": OPF_EPUB3,
         "OEBPS/nav.xhtml": NAV_XHTML,
     })
 
+@pytest.fixture(scope="session")
+def _no_toc_epub_bytes():
+    # manifest에 NCX나 NAV 항목이 없는 EPUB
+    no_toc_opf = OPF_EPUB2.replace(b'<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>', b'')
+    return create_mock_epub_bytes({
+        "META-INF/container.xml": CONTAINER_XML,
+        "OEBPS/content.opf": no_toc_opf,
+    })
+
+@pytest.fixture
+def mock_epub2_zip(_epub2_bytes):
+    """EPUB 2 버전에 맞는 가상 EPUB 파일을 엽니다."""
+    return zipfile.ZipFile(io.BytesIO(_epub2_bytes), "r")
+
+@pytest.fixture
+def mock_epub3_zip(_epub3_bytes):
+    """EPUB 3 버전에 맞는 가상 EPUB 파일을 엽니다."""
+    return zipfile.ZipFile(io.BytesIO(_epub3_bytes), "r")
+
+class ParsedEpub(NamedTuple):
+    zip: zipfile.ZipFile
+    opf_path: str
+    manifest: dict
+    spine_props: dict
+
+def _parse_mock_epub(epub_bytes):
+    """OPF를 읽고 파싱하여 목차 파싱에 필요한 입력을 만듭니다."""
+    parser = EpubParser()
+    zf = zipfile.ZipFile(io.BytesIO(epub_bytes), "r")
+    opf_path = parser._find_opf_path(zf)
+    manifest, (spine_ids, spine_props) = parser._parse_opf_bytes(parser._zip_read(zf, opf_path))
+    return ParsedEpub(zf, opf_path, manifest, spine_props)
+
+# container.xml과 OPF 파싱은 모듈에서 한 번만 하고, 각 테스트는 목차 파싱만 검증합니다.
+@pytest.fixture(scope="module")
+def parsed_epub2(_epub2_bytes):
+    return _parse_mock_epub(_epub2_bytes)
+
+@pytest.fixture(scope="module")
+def parsed_epub3(_epub3_bytes):
+    return _parse_mock_epub(_epub3_bytes)
+
+@pytest.fixture
+def parsed_epub(request):
+    """parametrize(indirect=True)의 값("epub2"/"epub3")에 맞는 파싱된 가상 EPUB을 반환합니다."""
+    return request.getfixturevalue(f"parsed_{request.param}")
+
 # --- 테스트들 ---
 
 def test_find_opf_path(parser, mock_epub2_zip):
@@ -128,48 +188,70 @@ def test_find_opf_path(parser, mock_epub2_zip):
     path = parser._find_opf_path(mock_epub2_zip)
     assert path == "OEBPS/content.opf"
 
-def test_get_toc_from_ncx(parser, mock_epub2_zip):
-    """EPUB 2의 toc.ncx 파일 파싱을 테스트합니다."""
-    opf_path = "OEBPS/content.opf"
-    opf_bytes = parser._zip_read(mock_epub2_zip, opf_path)
-    manifest, (spine_ids, spine_props) = parser._parse_opf_bytes(opf_bytes)
+@pytest.mark.parametrize("parsed_epub", ["epub2", "epub3"], indirect=True)
+def test_get_toc_from_stream(parser, parsed_epub):
+    """EPUB 2의 toc.ncx와 EPUB 3의 nav.xhtml 목차 파싱을 테스트합니다."""
+    p = parsed_epub
+    toc = parser.get_toc_from_stream(p.zip, p.opf_path, p.manifest, p.spine_props)
     
-    toc = parser.get_toc_from_stream(mock_epub2_zip, opf_path, manifest, spine_props)
-    
-    assert len(toc) == 3
-    assert toc[0] == TocItem(title="Cover", href="OEBPS/cover.xhtml", level=1)
-    assert toc[1] == TocItem(title="Chapter 1", href="OEBPS/chapter1.xhtml", level=1)
-    assert toc[2] == TocItem(title="Section 1.1", href="OEBPS/chapter1.xhtml#sec1", level=2)
+    assert toc == EXPECTED_TOC
 
-def test_get_toc_from_nav(parser, mock_epub3_zip):
-    """EPUB 3의 nav.xhtml 파일 파싱을 테스트합니다."""
-    opf_path = "OEBPS/content.opf"
-    opf_bytes = parser._zip_read(mock_epub3_zip, opf_path)
-    manifest, (spine_ids, spine_props) = parser._parse_opf_bytes(opf_bytes)
-    
-    toc = parser.get_toc_from_stream(mock_epub3_zip, opf_path, manifest, spine_props)
-    
-    assert len(toc) == 3
-    assert toc[0] == TocItem(title="Cover", href="OEBPS/cover.xhtml", level=1)
-    assert toc[1] == TocItem(title="Chapter 1", href="OEBPS/chapter1.xhtml", level=1)
-    assert toc[2] == TocItem(title="Section 1.1", href="OEBPS/chapter1.xhtml#sec1", level=2)
+def test_parse_toc_nav_xhtml_reads_only_toc_nav(parser):
+    """nav.xhtml에서 epub:type="toc"인 nav만 읽고, 중첩 목록과 앵커를 보존하는지 테스트합니다."""
+    nav_xhtml = """<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops">
+<body>
+  <nav epub:type="landmarks"><ol><li><a href="cover.xhtml">Cover</a></li></ol></nav>
+  <nav epub:type="toc">
+    <ol>
+      <li><a href="Text/chapter1.xhtml"> Chapter <b>1</b> </a>
+        <ol><li><a href="Text/chapter1.xhtml#sec1">Section 1.1</a></li></ol>
+      </li>
+      <li><span>No link</span></li>
+    </ol>
+  </nav>
+</body>
+</html>"""
+    toc = parser._parse_toc_nav_xhtml(nav_xhtml.encode("utf-8"), "OEBPS/nav.xhtml")
+    assert toc == [
+        TocItem(title="Chapter 1", href="OEBPS/Text/chapter1.xhtml", level=1),
+        TocItem(title="Section 1.1", href="OEBPS/Text/chapter1.xhtml#sec1", level=2),
+    ]
+    assert parser._parse_toc_nav_xhtml(b"", "OEBPS/nav.xhtml") == []
+
+def test_zip_read_falls_back_to_normalized_entry_names(parser):
+    """ZIP 엔트리 이름이 비표준(./, 역슬래시)으로 기록되어 있어도 정규화된 경로로 읽을 수 있는지 테스트합니다."""
+    mock_zip = create_mock_epub({
+        "./OEBPS/Text/chapter 1.xhtml": "<p>one</p>",
+        "OEBPS\\Text\\chapter2.xhtml": "<p>two</p>",
+    })
+    assert parser._normalize_zip_path("OEBPS/Text/chapter1.xhtml") == "OEBPS/Text/chapter1.xhtml"
+    assert parser._zip_read(mock_zip, "OEBPS/Text/chapter%201.xhtml") == b"<p>one</p>"
+    assert parser._zip_read(mock_zip, "OEBPS/Text/../Text/chapter2.xhtml") == b"<p>two</p>"
+    with pytest.raises(KeyError):
+        parser._zip_read(mock_zip, "OEBPS/Text/missing.xhtml")
 
 def test_get_plain_text(parser):
     """HTML을 일반 텍스트로 변환하는 기능을 테스트합니다."""
-    text = parser.get_plain_text(HTML_CONTENT.encode('utf-8'))
     # lxml의 text_content()는 <title>을 포함한 모든 태그의 텍스트를 추출하며,
     # 요소 주변에 공백을 추가할 수 있습니다.
-    expected_text = "Test Hello, world !"
-    assert text.strip().replace(" !", "!") == expected_text.strip().replace(" !", "!")
+    got = parser.get_plain_text(HTML_CONTENT_BYTES).replace(" !", "!").strip()
+    assert got == EXPECTED_PLAIN
+
+def test_get_plain_text_lxml_fallback_matches_selectolax(parser, monkeypatch):
+    """selectolax가 없을 때 사용하는 lxml 경로가 같은 텍스트를 반환하고, 인코딩 선언이 없는 UTF-8 문서도 처리하는지 테스트합니다."""
+    from app.core import epub_parser
 
-def test_get_toc_returns_empty_list_if_no_toc_file(parser):
+    content = HTML_CONTENT_BYTES
+    expected = parser.get_plain_text(content)
+    monkeypatch.setattr(epub_parser, "SELECTOLAX_INSTALLED", False)
+    assert parser.get_plain_text(content) == expected
+    assert parser.get_plain_text("<p>본문 <script>x()</script>텍스트</p>".encode("utf-8")) == "본문 텍스트"
+    assert parser.get_plain_text(b"") == ""
+
+def test_get_toc_returns_empty_list_if_no_toc_file(parser, _no_toc_epub_bytes):
     """목차(TOC) 파일이 없을 때 빈 리스트를 반환하는지 테스트합니다."""
-    # manifest에 NCX나 NAV 항목이 없는 EPUB 생성
-    no_toc_opf = OPF_EPUB2.replace('<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>', '')
-    mock_zip = create_mock_epub({
-        "META-INF/container.xml": CONTAINER_XML,
-        "OEBPS/content.opf": no_toc_opf,
-    })
+    mock_zip = zipfile.ZipFile(io.BytesIO(_no_toc_epub_bytes), "r")
     
     opf_path = "OEBPS/content.opf"
     opf_bytes = parser._zip_read(mock_zip, opf_path)
@@ -178,3 +260,147 @@ def test_get_toc_returns_empty_list_if_no_toc_file(parser):
     toc = parser.get_toc_from_stream(mock_zip, opf_path, manifest, spine_props)
     
     assert toc == []
+
+@pytest.mark.parametrize("use_libdeflate", [True, False])
+def test_fast_zip_reads_same_bytes_as_zipfile(monkeypatch, use_libdeflate):
+    """FastZip이 STORED/DEFLATED 엔트리를 zipfile과 동일하게 읽는지 테스트합니다. (libdeflate/zlib 경로 모두)"""
+    from app.core import fast_zip
+    from app.core.fast_zip import FastZip
+
+    if use_libdeflate and not fast_zip.DEFLATE_INSTALLED:
+        pytest.skip("deflate 패키지가 설치되어 있지 않습니다.")
+    monkeypatch.setattr(fast_zip, "DEFLATE_INSTALLED", use_libdeflate)
+
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w") as zf:
+        zf.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        zf.writestr("OEBPS/본문.xhtml", HTML_CONTENT * 50, compress_type=zipfile.ZIP_DEFLATED)
+    data = zip_buffer.getvalue()
+
+    with FastZip(memoryview(data)) as fz, zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert fz.namelist() == zf.namelist()
+        for name in zf.namelist():
+            content = fz.read(name)
+            assert type(content) is bytes
+            assert content == zf.read(name)
+        with pytest.raises(KeyError):
+            fz.read("missing.xhtml")
+
+def test_open_zip_falls_back_to_zipfile_for_lzma_entries(parser):
+    """FastZip이 지원하지 않는 압축 방식(LZMA) 엔트리가 있으면 open_zip이 표준 zipfile로 여는지 테스트합니다."""
+    from app.core.fast_zip import FastZip, UnsupportedZipError, open_zip
+
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w") as zf:
+        zf.writestr("META-INF/container.xml", CONTAINER_XML)
+        zf.writestr("OEBPS/content.opf", OPF_EPUB2, compress_type=zipfile.ZIP_LZMA)
+        zf.writestr("OEBPS/toc.ncx", TOC_NCX, compress_type=zipfile.ZIP_BZIP2)
+    data = zip_buffer.getvalue()
+
+    with pytest.raises(UnsupportedZipError):
+        FastZip(data)
+
+    with open_zip(memoryview(data)) as zf:
+        assert isinstance(zf, zipfile.ZipFile)
+        info = parser.load_spine_info(zf)
+        assert info.opf_path == "OEBPS/content.opf"
+        assert parser.get_toc_from_stream(zf, info.opf_path, info.manifest, info.spine_props) == EXPECTED_TOC
+
+    # STORED/DEFLATED만 있는 아카이브는 FastZip으로 엶
+    with open_zip(create_mock_epub_bytes({"a.txt": b"a"})) as zf:
+        assert isinstance(zf, FastZip)
+
+def test_load_spine_info_is_cached_by_archive_fingerprint(parser, _epub2_bytes):
+    """같은 EPUB을 다시 열면 OPF 파싱 결과를 캐시에서 재사용하는지 테스트합니다."""
+    from app.core.fast_zip import FastZip
+
+    data = _epub2_bytes
+
+    with FastZip(data) as first, FastZip(bytearray(data)) as second:
+        assert first.fingerprint == second.fingerprint
+        info = parser.load_spine_info(first)
+        assert info.opf_path == "OEBPS/content.opf"
+        assert parser.load_spine_info(second) is info
+
+def test_utc_iso_now_matches_datetime_isoformat():
+    """utc_iso_now가 datetime.isoformat()과 같은 형식/시각의 문자열을 반환하는지 테스트합니다."""
+    from datetime import datetime, timezone
+    from app.core.time_utils import utc_iso_now
+
+    before = datetime.now(timezone.utc)
+    stamp = utc_iso_now()
+    after = datetime.now(timezone.utc)
+
+    parsed = datetime.fromisoformat(stamp)
+    assert stamp.endswith("+00:00")
+    assert before <= parsed <= after
+
+def test_buffered_log_handler_writes_on_stop_and_error():
+    """BufferedLogHandler가 INFO는 모아 두었다가 stop()에서, ERROR는 즉시 stream에 쓰는지 테스트합니다."""
+    import logging
+    import time
+    from app.core.buffered_logging import BufferedLogHandler
+
+    stream = io.StringIO()
+    handler = BufferedLogHandler(stream=stream, capacity=100, flush_interval=60.0)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    log = logging.getLogger("test_buffered_log_handler")
+    log.propagate = False
+    log.addHandler(handler)
+    try:
+        log.warning("first %s", 1)
+        time.sleep(0.05)
+        assert stream.getvalue() == ""
+
+        log.error("second")
+        deadline = time.monotonic() + 2.0
+        while "second" not in stream.getvalue() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert stream.getvalue() == "WARNING first 1\nERROR second\n"
+
+        log.warning("third")
+    finally:
+        log.removeHandler(handler)
+        handler.close()
+    assert stream.getvalue().endswith("WARNING third\n")
+
+def test_buffered_log_handler_flushes_within_interval_under_steady_logging():
+    """flush_interval보다 짧은 간격으로 로그가 계속 들어와도 약 flush_interval 안에 stream에 쓰는지 테스트합니다."""
+    import logging
+    import time
+    from app.core.buffered_logging import BufferedLogHandler
+
+    stream = io.StringIO()
+    handler = BufferedLogHandler(stream=stream, capacity=100, flush_interval=0.2)
+    log = logging.getLogger("test_buffered_log_handler_steady")
+    log.propagate = False
+    log.addHandler(handler)
+    try:
+        start = time.monotonic()
+        written_at = None
+        while time.monotonic() - start < 1.0:
+            log.warning("tick")
+            if written_at is None and stream.getvalue():
+                written_at = time.monotonic() - start
+            time.sleep(0.02)
+    finally:
+        log.removeHandler(handler)
+        handler.close()
+    assert written_at is not None and written_at < 0.4
+
+def test_wipe_buffer_zeroes_shared_bytearray():
+    """wipe_buffer가 다른 참조가 남아 있는 bytearray도 0으로 덮어쓰고, bytes는 건드리지 않는지 테스트합니다."""
+    from app.core.buffer_utils import wipe_buffer
+
+    buf = bytearray(b"secret epub data")
+    view = memoryview(buf)
+    assert wipe_buffer(buf) is True
+    # memoryview가 남아 있으면 clear()는 실패하지만 내용은 이미 지워져 있어야 합니다.
+    assert bytes(view) == b"\x00" * len(b"secret epub data")
+    view.release()
+
+    other = bytearray(b"data")
+    assert wipe_buffer(other) is True
+    assert other == bytearray()
+
+    assert wipe_buffer(b"immutable") is False
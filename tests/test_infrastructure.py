@@ -4,53 +4,246 @@ import os
 import zipfile
 import io
 import json
+import asyncio
+import shutil
+from pathlib import Path
 from unittest.mock import MagicMock, AsyncMock
 
 # Infrastructure 계층의 클래스들
-from app.infrastructure.drm.adapter import UndrmAdapter
-from app.infrastructure.llm.openai_client import LlmClient
+from app.infrastructure.drm import kms_service
 from app.infrastructure.drm.kms_service import KmsKeyService
+from app.infrastructure.drm.license_service import LicenseService
 from app.infrastructure.drm.database_license_service import DatabaseLicenseService
+from app.infrastructure.drm.cached_license_service import CachedLicenseService, LicenseCache
+from app.infrastructure.storage.s3_client import S3Client
+from app.infrastructure.log.dynamodb_logger import DynamoDBLogger, drain_pending_logs
+from app.infrastructure.log.file_logger import FileLogger
+from app.infrastructure.aws_http import KeepAliveAIOHTTPSession, TCP_KEEPIDLE
 
 # Domain 모델
-from app.domain.models import UndrmInput, LlmInput, TocItem, FileCharStat
+from app.domain.models import UndrmInput, LlmInput, TocItem, FileCharStat, UndrmLog
 
 # --- DRM Adapter Test ---
 
-@pytest.fixture
+SAMPLE_EPUB_PATH = Path('.sample') / '364721831.EPUB'
+SAMPLE_KEY_PATH = Path('.sample') / 'key.txt'
+
+@pytest.fixture(scope="session")
 def undrm_adapter():
+    # DRM 어댑터와 LLM 클라이언트는 import 비용이 커서, 해당 테스트가 실행될 때만 import합니다.
+    from app.infrastructure.drm.adapter import UndrmAdapter
+    # UndrmAdapter는 상태가 없으므로 세션 전체에서 공유합니다.
     return UndrmAdapter()
 
-def test_decrypt_sample_epub_successfully(undrm_adapter):
-    """샘플 EPUB 파일이 성공적으로 복호화되는지 테스트합니다."""
-    epub_path = os.path.join('.sample', '364721831.EPUB')
-    key_path = os.path.join('.sample', 'key.txt')
-
-    with open(epub_path, 'rb') as f: encrypted_epub_bytes = f.read()
-    with open(key_path, 'r') as f: license_key = f.read().strip()
+@pytest.fixture(scope="session")
+def sample_epub_files():
+    """샘플 암호화 EPUB과 라이선스 키를 세션에서 한 번만 읽습니다."""
+    return SAMPLE_EPUB_PATH.read_bytes(), SAMPLE_KEY_PATH.read_text().strip()
 
+@pytest.fixture(scope="session")
+def sample_decrypted_epub(undrm_adapter, sample_epub_files):
+    """샘플 EPUB을 세션에서 한 번만 복호화하여 (UndrmInput, UndrmOutput)을 반환합니다."""
+    encrypted_epub_bytes, license_key = sample_epub_files
     undrm_input = UndrmInput(
         encrypted_epub=encrypted_epub_bytes,
         license_key=license_key,
         grant_id=None,  # grant_id는 이제 선택 사항
         tenant_id="pytest-tenant"
     )
-    undrm_output = undrm_adapter.decrypt(undrm_input)
+    return undrm_input, undrm_adapter.decrypt(undrm_input)
+
+@pytest.fixture(scope="session")
+def _epub_template_dir(tmp_path_factory, sample_decrypted_epub):
+    """복호화된 샘플 EPUB을 세션에서 한 번만 디스크에 풀어 둡니다. (테스트에서 직접 수정하지 않음)"""
+    _, undrm_output = sample_decrypted_epub
+    template = tmp_path_factory.mktemp("epub_template")
+    with zipfile.ZipFile(io.BytesIO(undrm_output.decrypted_epub), 'r') as zf:
+        zf.extractall(template)
+    return template
+
+@pytest.fixture
+def decrypted_epub_dir(_epub_template_dir, tmp_path):
+    """템플릿을 테스트별 tmp_path로 복사한, 수정해도 되는 복호화 EPUB 디렉터리를 반환합니다."""
+    return Path(shutil.copytree(_epub_template_dir, tmp_path / "epub"))
+
+@pytest.mark.integration
+@pytest.mark.skipif(not SAMPLE_EPUB_PATH.exists(), reason="샘플 EPUB 파일이 없습니다.")
+def test_decrypt_sample_epub_successfully(undrm_adapter, sample_decrypted_epub):
+    """샘플 EPUB 파일이 성공적으로 복호화되는지 테스트합니다."""
+    undrm_input, undrm_output = sample_decrypted_epub
+    encrypted_epub_bytes = undrm_input.encrypted_epub
 
     assert undrm_output.decrypted_epub
+    # S3 다운로드 결과처럼 bytearray로 들어와도 같은 결과를 내야 함
+    assert undrm_adapter.decrypt(undrm_input.model_copy(
+        update={"encrypted_epub": bytearray(encrypted_epub_bytes)}
+    )).decrypted_epub == undrm_output.decrypted_epub
     with zipfile.ZipFile(io.BytesIO(undrm_output.decrypted_epub), 'r') as zf:
         assert 'META-INF/encryption.xml' not in zf.namelist()
+        # 원시 복사된 엔트리를 포함해 모든 엔트리의 CRC가 유효해야 함
+        assert zf.testzip() is None
+        assert zf.infolist()[0].filename == 'mimetype'
+        assert zf.infolist()[0].compress_type == zipfile.ZIP_STORED
+        with zipfile.ZipFile(io.BytesIO(encrypted_epub_bytes), 'r') as src:
+            # 암호화되지 않은 엔트리는 원본 압축 방식 그대로 복사됨
+            assert zf.getinfo('OEBPS/content.opf').compress_type == src.getinfo('OEBPS/content.opf').compress_type
+            assert zf.read('OEBPS/content.opf') == src.read('OEBPS/content.opf')
+
+@pytest.mark.integration
+@pytest.mark.skipif(not SAMPLE_EPUB_PATH.exists(), reason="샘플 EPUB 파일이 없습니다.")
+def test_decrypted_sample_epub_extracts_to_directory(decrypted_epub_dir):
+    """복호화된 샘플 EPUB을 디스크에 풀었을 때 mimetype과 OPF가 있고 encryption.xml은 없는지 테스트합니다."""
+    assert (decrypted_epub_dir / 'mimetype').read_bytes() == b'application/epub+zip'
+    assert (decrypted_epub_dir / 'OEBPS' / 'content.opf').is_file()
+    assert not (decrypted_epub_dir / 'META-INF' / 'encryption.xml').exists()
+
+def test_decrypt_without_encryption_xml_returns_input_without_copy(undrm_adapter):
+    """encryption.xml이 없는 EPUB은 복사 없이 원본 바이트를 그대로 반환하는지 테스트합니다."""
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w") as zf:
+        zf.writestr("mimetype", "application/epub+zip")
+    epub_bytes = zip_buffer.getvalue()
+
+    undrm_output = undrm_adapter.decrypt(UndrmInput(
+        encrypted_epub=epub_bytes, license_key="A" * 44, tenant_id="pytest-tenant"
+    ))
+    assert undrm_output.decrypted_epub is epub_bytes
+
+_TEST_KEY32 = bytes(range(32))
+
+def _encrypt_v2_payload(plain: bytes, key32: bytes = _TEST_KEY32) -> bytes:
+    """테스트용으로 평문을 V2 DRM 형식(헤더 + HMAC + AES-CBC)으로 암호화합니다."""
+    import hashlib, hmac, struct
+    from cryptography.hazmat.primitives import padding
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    from app.infrastructure.drm.adapter import AES_256_IV_FILE, HMAC_SHA1_KEY_FILE_V2
+
+    padder = padding.PKCS7(128).padder()
+    encryptor = Cipher(algorithms.AES(key32), modes.CBC(AES_256_IV_FILE)).encryptor()
+    enc = encryptor.update(padder.update(plain) + padder.finalize()) + encryptor.finalize()
+    mac = hmac.new(HMAC_SHA1_KEY_FILE_V2, enc, hashlib.sha1).digest()
+    return struct.pack("<III", len(plain), len(enc), 8) + mac[:8] + enc + mac[8:]
+
+def _encryption_xml(uri: str) -> str:
+    return (
+        '<encryption xmlns="urn:oasis:names:tc:opendocument:xmlns:container" '
+        'xmlns:enc="http://www.w3.org/2001/04/xmlenc#"><enc:EncryptedData><enc:CipherData>'
+        f'<enc:CipherReference URI="{uri}"/></enc:CipherData></enc:EncryptedData></encryption>'
+    )
+
+def _decrypt_test_epub(undrm_adapter, epub_bytes: bytes):
+    import base64
+    return undrm_adapter.decrypt(UndrmInput(
+        encrypted_epub=epub_bytes, license_key=base64.b64encode(_TEST_KEY32).decode(), tenant_id="pytest-tenant"
+    ))
+
+def test_decrypt_matches_percent_encoded_encryption_uri(undrm_adapter):
+    """encryption.xml의 URI가 퍼센트 인코딩되어 있어도 해당 ZIP 엔트리를 복호화하는지 테스트합니다."""
+    plain = b"<html><body>hello</body></html>"
+
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w") as zf:
+        zf.writestr("mimetype", "application/epub+zip")
+        zf.writestr("META-INF/encryption.xml", _encryption_xml("OEBPS/chapter%201.xhtml"))
+        zf.writestr("OEBPS/chapter 1.xhtml", _encrypt_v2_payload(plain))
+
+    undrm_output = _decrypt_test_epub(undrm_adapter, zip_buffer.getvalue())
+    with zipfile.ZipFile(io.BytesIO(undrm_output.decrypted_epub)) as zf:
+        assert zf.read("OEBPS/chapter 1.xhtml") == plain
+
+def test_decrypt_rewrites_entries_when_zipfile_internals_are_missing(undrm_adapter, monkeypatch):
+    """zipfile 내부 속성이 없는 파이썬 버전에서는 원시 복사 대신 모든 엔트리를 STORED로 다시 쓰는지 테스트합니다."""
+    from app.infrastructure.drm import adapter
+    monkeypatch.setattr(adapter, "_ZIPFILE_WRITE_INTERNALS", adapter._ZIPFILE_WRITE_INTERNALS + ("_removed_in_future",))
+
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w") as zf:
+        zf.writestr("mimetype", "application/epub+zip")
+        zf.writestr("META-INF/encryption.xml", _encryption_xml("OEBPS/chapter1.xhtml"))
+        zf.writestr("OEBPS/chapter1.xhtml", _encrypt_v2_payload(b"<p>secret</p>"))
+        zf.writestr("OEBPS/chapter2.xhtml", b"<p>plain</p>" * 20, compress_type=zipfile.ZIP_DEFLATED)
+
+    undrm_output = _decrypt_test_epub(undrm_adapter, zip_buffer.getvalue())
+    with zipfile.ZipFile(io.BytesIO(undrm_output.decrypted_epub)) as zf:
+        assert {info.compress_type for info in zf.infolist()} == {zipfile.ZIP_STORED}
+        assert zf.read("OEBPS/chapter2.xhtml") == b"<p>plain</p>" * 20
+        assert zf.testzip() is None
+
+def test_decrypt_rewrites_lzma_entries_as_stored(undrm_adapter):
+    """STORED/DEFLATED 이외의 압축 방식 엔트리는 원시 복사하지 않고 STORED로 다시 써서 FastZip으로 읽을 수 있는지 테스트합니다."""
+    from app.core.fast_zip import FastZip
+
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w") as zf:
+        zf.writestr("mimetype", "application/epub+zip")
+        zf.writestr("META-INF/encryption.xml", _encryption_xml("OEBPS/chapter1.xhtml"))
+        zf.writestr("OEBPS/chapter1.xhtml", _encrypt_v2_payload(b"<p>secret</p>"))
+        zf.writestr("OEBPS/style.css", b"p { margin: 0 }" * 20, compress_type=zipfile.ZIP_LZMA)
+        zf.writestr("OEBPS/chapter2.xhtml", b"<p>plain</p>" * 20, compress_type=zipfile.ZIP_DEFLATED)
+
+    undrm_output = _decrypt_test_epub(undrm_adapter, zip_buffer.getvalue())
+    with zipfile.ZipFile(io.BytesIO(undrm_output.decrypted_epub)) as zf:
+        assert zf.getinfo("OEBPS/style.css").compress_type == zipfile.ZIP_STORED
+        # DEFLATED 엔트리는 그대로 원시 복사됨
+        assert zf.getinfo("OEBPS/chapter2.xhtml").compress_type == zipfile.ZIP_DEFLATED
+    with FastZip(undrm_output.decrypted_epub) as fz:
+        assert fz.read("OEBPS/style.css") == b"p { margin: 0 }" * 20
+        assert fz.read("OEBPS/chapter1.xhtml") == b"<p>secret</p>"
+        assert fz.read("OEBPS/chapter2.xhtml") == b"<p>plain</p>" * 20
+
+def test_decrypt_releases_input_buffer_for_wipe(undrm_adapter):
+    """
+    복호화가 끝나면 입력 bytearray에 대한 memoryview가 해제되어 wipe_buffer가 버퍼를 비울 수 있는지 테스트합니다.
+    실패한 경우에도 예외의 traceback이 decrypt 프레임(과 memoryview)을 붙잡고 있으므로 함께 확인합니다.
+    """
+    from app.core.buffer_utils import wipe_buffer
+
+    def make_epub(payload: bytes) -> bytearray:
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, "w") as zf:
+            zf.writestr("mimetype", "application/epub+zip")
+            zf.writestr("META-INF/encryption.xml", _encryption_xml("OEBPS/chapter1.xhtml"))
+            zf.writestr("OEBPS/chapter1.xhtml", payload)
+            zf.writestr("OEBPS/chapter2.xhtml", b"<p>plain</p>" * 20, compress_type=zipfile.ZIP_DEFLATED)
+        return bytearray(zip_buffer.getvalue())
+
+    epub_buf = make_epub(_encrypt_v2_payload(b"<p>secret</p>"))
+    _decrypt_test_epub(undrm_adapter, epub_buf)
+    assert wipe_buffer(epub_buf) and len(epub_buf) == 0
+
+    broken_buf = make_epub(b"\x00" * 64)
+    with pytest.raises(RuntimeError) as excinfo:
+        _decrypt_test_epub(undrm_adapter, broken_buf)
+    # excinfo가 traceback을 붙잡고 있는 상태에서 지웁니다.
+    assert wipe_buffer(broken_buf) and len(broken_buf) == 0
+    del excinfo
+
+def test_decrypt_with_empty_encryption_xml_returns_input_without_copy(undrm_adapter):
+    """encryption.xml이 암호화된 파일을 하나도 가리키지 않으면 ZIP을 다시 만들지 않는지 테스트합니다."""
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w") as zf:
+        zf.writestr("mimetype", "application/epub+zip")
+        zf.writestr("META-INF/encryption.xml", '<encryption xmlns="urn:oasis:names:tc:opendocument:xmlns:container"/>')
+    epub_bytes = zip_buffer.getvalue()
+
+    undrm_output = undrm_adapter.decrypt(UndrmInput(
+        encrypted_epub=epub_bytes, license_key="A" * 44, tenant_id="pytest-tenant"
+    ))
+    assert undrm_output.decrypted_epub is epub_bytes
 
 # --- LLM Client Test ---
 
+# 모킹한 LLM 응답은 변하지 않으므로 import 시 한 번만 직렬화합니다.
+_LLM_MOCK_OUTPUT_JSON = json.dumps({"file": "ch1.xhtml", "rationale": "Mocked response", "confidence": 0.9})
+_LLM_MOCK_RESPONSE = MagicMock(output_text=_LLM_MOCK_OUTPUT_JSON)
+
 @pytest.fixture
 def llm_client_with_mock_api(mocker):
     """OpenAI API 호출을 모킹한 LlmClient 인스턴스를 제공합니다."""
+    from app.infrastructure.llm.openai_client import LlmClient
     mock_openai_client = MagicMock()
     # AsyncOpenAI 클라이언트의 비동기 메서드를 모킹
-    mock_openai_client.responses.create = AsyncMock(return_value=MagicMock(output_text=json.dumps({
-        "file": "ch1.xhtml", "rationale": "Mocked response", "confidence": 0.9
-    })))
+    mock_openai_client.responses.create = AsyncMock(return_value=_LLM_MOCK_RESPONSE)
     
     client = LlmClient(
         client=mock_openai_client,
@@ -60,7 +253,6 @@ def llm_client_with_mock_api(mocker):
     )
     return client, mock_openai_client
 
-@pytest.mark.asyncio
 async def test_llm_client_suggest_start_parses_response_correctly(llm_client_with_mock_api):
     """LLM 클라이언트가 API 응답을 정확하게 파싱하는지 테스트합니다."""
     client, mock_api = llm_client_with_mock_api
@@ -73,28 +265,39 @@ async def test_llm_client_suggest_start_parses_response_correctly(llm_client_wit
     assert result.file == "ch1.xhtml"
     assert result.confidence == 0.9
 
+def test_llm_client_format_input_lists_only_unreferenced_files_in_file_stats(llm_client_with_mock_api):
+    """목차가 가리키는 파일은 항목의 chars로만 전달하고, file_stats에는 나머지 파일만 남기는지 테스트합니다."""
+    client, _ = llm_client_with_mock_api
+    payload = json.loads(client.format_input_for_llm(
+        toc=[TocItem(title="Chapter 1", href="ch1.xhtml#start", level=1)],
+        file_stats=[
+            FileCharStat(path="cover.xhtml", chars=10, has_text=True),
+            FileCharStat(path="ch1.xhtml", chars=100, has_text=True),
+        ],
+    ))
+    assert payload["table_of_contents_with_stats"][0]["chars"] == 100
+    assert payload["file_stats"] == {"cover.xhtml": 10}
+
 # --- KMS Key Service Test ---
 
+# aiobotocore 세션 → create_client → kms_client 모킹 구조는 모듈 import 시 한 번만 만듭니다.
+_KMS_CLIENT = AsyncMock()
+_FAKE_SESSION = MagicMock()
+_FAKE_SESSION.create_client.return_value.__aenter__ = AsyncMock(return_value=_KMS_CLIENT)
+
 @pytest.fixture
-def kms_service_with_mock_aiobotocore(mocker):
+def kms_service_with_mock_aiobotocore(monkeypatch):
     """aiobotocore 클라이언트를 모킹한 KmsKeyService를 제공합니다."""
-    mock_kms_client = AsyncMock()
+    # 모듈 단위 복호화 캐시가 다른 테스트의 결과를 재사용하지 않도록 비웁니다.
+    kms_service._plaintext_cache.clear()
+    monkeypatch.setattr(kms_service, "get_session", lambda: _FAKE_SESSION)
+    # 공유 클라이언트의 호출 기록은 테스트마다 초기화합니다.
+    _KMS_CLIENT.reset_mock()
     decrypted_key = "DECRYPTED_HEX_KEY"
-    mock_kms_client.decrypt.return_value = {'Plaintext': decrypted_key.encode('utf-8')}
-    
-    # aiobotocore.session.get_session을 모킹
-    mock_get_session = mocker.patch('app.infrastructure.drm.kms_service.get_session')
-    
-    mock_session = MagicMock()
-    mock_context_manager = AsyncMock()
-    mock_context_manager.__aenter__.return_value = mock_kms_client
-    mock_session.create_client.return_value = mock_context_manager
-    mock_get_session.return_value = mock_session
-    
+    _KMS_CLIENT.decrypt.return_value = {'Plaintext': decrypted_key.encode('utf-8')}
     service = KmsKeyService(aws_profile="mock_profile", region_name="us-east-1", key_id="mock_key_id")
-    return service, mock_kms_client
+    return service, _KMS_CLIENT
 
-@pytest.mark.asyncio
 async def test_kms_key_service_decrypts_successfully(kms_service_with_mock_aiobotocore):
     """KmsKeyService가 boto3 클라이언트를 올바르게 호출하고 응답을 디코딩하는지 테스트합니다."""
     service, mock_client = kms_service_with_mock_aiobotocore
@@ -102,37 +305,397 @@ async def test_kms_key_service_decrypts_successfully(kms_service_with_mock_aiobo
     mock_client.decrypt.assert_called_once()
     assert result == "DECRYPTED_HEX_KEY"
 
+async def test_kms_key_service_uses_shared_client():
+    """공유 KMS 클라이언트가 주입되면 세션에서 클라이언트를 만들지 않고 그대로 사용하는지 테스트합니다."""
+    kms_service._plaintext_cache.clear()
+    shared_client = AsyncMock()
+    shared_client.decrypt.return_value = {'Plaintext': b"SHARED_CLIENT_KEY"}
+    service = KmsKeyService(aws_profile=None, region_name="us-east-1", key_id="shared_key_id", client=shared_client)
+
+    assert await service.get_decrypted_key(item_id="any_item_id") == "SHARED_CLIENT_KEY"
+    shared_client.decrypt.assert_awaited_once()
+    assert service.session is None
+
+async def test_kms_key_service_sends_one_decrypt_for_concurrent_callers(kms_service_with_mock_aiobotocore):
+    """동시에 들어온 복호화 요청과 이후 요청이 KMS 호출 한 번의 결과를 공유하는지 테스트합니다."""
+    service, mock_client = kms_service_with_mock_aiobotocore
+    results = await asyncio.gather(*(service.get_decrypted_key(item_id=str(i)) for i in range(5)))
+    assert results == ["DECRYPTED_HEX_KEY"] * 5
+    assert await service.get_decrypted_key(item_id="later") == "DECRYPTED_HEX_KEY"
+    mock_client.decrypt.assert_called_once()
+
+async def test_kms_license_service_returns_decrypted_key():
+    """KMS 기반 LicenseService가 KmsKeyService의 복호화 결과를 라이선스 키로 반환하는지 테스트합니다."""
+    kms = MagicMock()
+    kms.get_decrypted_key = AsyncMock(return_value="DECRYPTED_HEX_KEY")
+    assert await LicenseService(kms).get_license("12345") == "DECRYPTED_HEX_KEY"
+    kms.get_decrypted_key.assert_awaited_once_with("12345")
+
 # --- Database License Service Test ---
-@pytest.fixture
-def db_license_service_with_mock_db():
-    """데이터베이스 세션 및 쿼리 실행을 모킹한 DatabaseLicenseService를 제공합니다."""
-    mock_session_instance = MagicMock()
-    mock_session_instance.__aenter__.return_value = mock_session_instance
-    mock_session_instance.__aexit__ = AsyncMock()
+@pytest.fixture(scope="module")
+def _db_license_skeleton():
+    """모킹한 커넥션/엔진과 DatabaseLicenseService는 모듈에서 한 번만 만듭니다."""
+    mock_conn = MagicMock()
+    mock_conn.__aenter__.return_value = mock_conn
+    mock_conn.__aexit__ = AsyncMock()
 
-    # execute는 비동기 메서드이므로 AsyncMock으로 설정
-    mock_result = MagicMock()
-    mock_session_instance.execute = AsyncMock(return_value=mock_result)
+    # 공유 AsyncEngine은 외부에서 주입됩니다.
+    mock_engine = MagicMock()
+    mock_engine.connect.return_value = mock_conn
 
-    # session_factory는 이제 외부에서 주입됩니다.
-    mock_session_factory = MagicMock(return_value=mock_session_instance)
-    
-    service = DatabaseLicenseService(session_factory=mock_session_factory, table_name="test_table")
-    
+    service = DatabaseLicenseService(engine=mock_engine, table_name="test_table")
+    return service, mock_conn
+
+@pytest.fixture
+def db_license_service_with_mock_db(_db_license_skeleton):
+    """데이터베이스 커넥션 및 쿼리 실행을 모킹한 DatabaseLicenseService를 제공합니다."""
+    service, mock_conn = _db_license_skeleton
+    # execute는 비동기 메서드이므로 AsyncMock으로 설정 (조회 결과는 테스트마다 새로 만듦)
+    mock_result = MagicMock()
+    mock_conn.execute = AsyncMock(return_value=mock_result)
     return service, mock_result
 
-@pytest.mark.asyncio
-async def test_db_license_service_returns_key_on_success(db_license_service_with_mock_db):
-    """DB에서 키를 성공적으로 조회했을 때, 해당 키를 반환하는지 테스트합니다."""
+@pytest.mark.parametrize("db_value,expected", [("DB_FETCHED_KEY", "DB_FETCHED_KEY"), (None, None)])
+async def test_db_license_service_get_license(db_license_service_with_mock_db, db_value, expected):
+    """DB에서 조회한 키를 반환하고, 키를 찾지 못하면 None을 반환하는지 테스트합니다."""
     service, mock_result = db_license_service_with_mock_db
-    mock_result.scalar_one_or_none.return_value = "DB_FETCHED_KEY" # 성공 시나리오 설정
+    mock_result.scalar_one_or_none.return_value = db_value
     result = await service.get_license(item_id="12345")
-    assert result == "DB_FETCHED_KEY"
+    assert result == expected
 
-@pytest.mark.asyncio
-async def test_db_license_service_returns_none_when_not_found(db_license_service_with_mock_db):
-    """DB에서 키를 찾지 못했을 때, None을 반환하는지 테스트합니다."""
-    service, mock_result = db_license_service_with_mock_db
-    mock_result.scalar_one_or_none.return_value = None # 키가 없는 시나리오 설정
-    result = await service.get_license(item_id="not_found_id")
-    assert result is None
+
+async def test_cached_license_service_reuses_key_until_invalidated():
+    """같은 item_id의 반복 조회는 캐시를 사용하고, invalidate 이후에는 다시 조회하는지 테스트합니다."""
+    inner = MagicMock()
+    inner.get_license = AsyncMock(return_value="DB_FETCHED_KEY")
+    service = CachedLicenseService(inner, LicenseCache(maxsize=16, ttl=60))
+
+    assert await service.get_license("12345") == "DB_FETCHED_KEY"
+    assert await service.get_license("12345") == "DB_FETCHED_KEY"
+    assert inner.get_license.await_count == 1
+
+    service.invalidate("12345")
+    assert await service.get_license("12345") == "DB_FETCHED_KEY"
+    assert inner.get_license.await_count == 2
+
+async def test_cached_license_service_coalesces_concurrent_misses():
+    """캐시에 없는 같은 item_id를 동시에 조회하면 저장소 조회가 한 번만 일어나는지 테스트합니다."""
+    release = asyncio.Event()
+
+    async def slow_get_license(item_id):
+        await release.wait()
+        return "DB_FETCHED_KEY"
+
+    inner = MagicMock()
+    inner.get_license = AsyncMock(side_effect=slow_get_license)
+    cache = LicenseCache(maxsize=16, ttl=60)
+
+    pending = [asyncio.ensure_future(CachedLicenseService(inner, cache).get_license("12345")) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    assert await asyncio.gather(*pending) == ["DB_FETCHED_KEY"] * 5
+    assert inner.get_license.await_count == 1
+    assert not cache.inflight
+
+# --- S3 Client Test ---
+class _FakeS3Body:
+    """aiobotocore StreamingBody의 async 컨텍스트/iter_chunks 동작만 흉내냅니다."""
+    def __init__(self, data: bytes):
+        self._data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def iter_chunks(self, chunk_size):
+        for i in range(0, len(self._data), chunk_size):
+            yield self._data[i:i + chunk_size]
+
+async def test_s3_client_parallel_range_get_reassembles_object():
+    """구간별 Range GET 결과가 원본과 동일한 순서로 조립되고, 짧게 끊긴 응답은 이어받는지 테스트합니다."""
+    data = os.urandom(3 * 1024 * 1024 + 123)
+    truncated = set()
+
+    async def get_object(Bucket, Key, Range, **kwargs):
+        start, end = map(int, Range.split("=")[1].split("-"))
+        end = min(end, len(data) - 1)
+        chunk = data[start:end + 1]
+        content_range = f"bytes {start}-{end}/{len(data)}"
+        # 각 구간의 첫 응답은 절반만 내려주어 재개 로직을 검증합니다.
+        if end not in truncated:
+            truncated.add(end)
+            chunk = chunk[:len(chunk) // 2]
+        return {"Body": _FakeS3Body(chunk), "ContentRange": content_range}
+
+    async def head_object(Bucket, Key, **kwargs):
+        # 체크섬 조회용 HEAD만 허용합니다.
+        assert kwargs.get("ChecksumMode") == "ENABLED", "HEAD 요청 없이 첫 구간 응답으로 크기를 알아내야 합니다."
+        return {}
+
+    mock_s3 = MagicMock()
+    mock_s3.head_object = head_object
+    mock_s3.get_object = get_object
+
+    client = S3Client(s3_client=mock_s3, parallel_reads=4, min_part_size=512 * 1024)
+    result = await client.get_object_bytes(bucket="test-bucket", key="test-key.epub")
+
+    assert result == data
+
+async def test_s3_client_rejects_crc32c_mismatch():
+    """HeadObject로 받은 객체 전체 CRC32C와 받은 바이트가 다르면 ExternalServiceError가 발생하는지 테스트합니다."""
+    pytest.importorskip("google_crc32c")
+    from app.core.exceptions import ExternalServiceError
+
+    data = os.urandom(1000)
+    mock_s3 = MagicMock()
+    # 실제 S3처럼 Range GET 응답에는 체크섬이 없고, HEAD(ChecksumMode=ENABLED) 응답에만 있습니다.
+    mock_s3.get_object = AsyncMock(return_value={"Body": _FakeS3Body(data), "ContentRange": "bytes 0-999/1000"})
+    mock_s3.head_object = AsyncMock(return_value={"ChecksumCRC32C": "AAAAAA==", "ChecksumType": "FULL_OBJECT"})
+
+    with pytest.raises(ExternalServiceError):
+        await S3Client(s3_client=mock_s3).get_object_bytes(bucket="test-bucket", key="test-key.epub")
+    mock_s3.head_object.assert_awaited_once_with(Bucket="test-bucket", Key="test-key.epub", ChecksumMode="ENABLED")
+
+async def test_s3_client_maps_missing_key_to_not_found():
+    """HEAD 없이 보낸 첫 구간 GET의 NoSuchKey 오류가 EpubFileNotFoundError로 변환되는지 테스트합니다."""
+    from botocore.exceptions import ClientError
+    from app.core.exceptions import EpubFileNotFoundError
+
+    mock_s3 = MagicMock()
+    mock_s3.get_object = AsyncMock(side_effect=ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject"))
+
+    with pytest.raises(EpubFileNotFoundError):
+        await S3Client(s3_client=mock_s3).get_object_bytes(bucket="test-bucket", key="missing.epub")
+
+async def test_s3_client_fails_fast_on_access_denied(mocker):
+    """권한 오류처럼 재시도해도 소용없는 오류는 백오프 대기 없이 바로 실패하는지 테스트합니다."""
+    from botocore.exceptions import ClientError
+    from app.core.exceptions import ExternalServiceError
+
+    mock_s3 = MagicMock()
+    mock_s3.get_object = AsyncMock(side_effect=ClientError({"Error": {"Code": "AccessDenied"}}, "GetObject"))
+    sleep = mocker.patch("app.infrastructure.storage.s3_client.asyncio.sleep", new=AsyncMock())
+
+    with pytest.raises(ExternalServiceError):
+        await S3Client(s3_client=mock_s3).get_object_bytes(bucket="test-bucket", key="test-key.epub")
+    assert mock_s3.get_object.await_count == 1
+    sleep.assert_not_awaited()
+
+
+async def test_s3_client_cancels_other_ranges_when_one_fails(mocker):
+    """한 구간이 AccessDenied로 실패하면 나머지 구간 작업을 취소하여, 실패 이후 S3 재요청이 없는지 테스트합니다."""
+    from botocore.exceptions import ClientError, ConnectionClosedError
+    from app.core.exceptions import ExternalServiceError
+
+    size = 4096
+    release = asyncio.Event()
+    calls = []
+
+    async def get_object(Bucket, Key, Range, **kwargs):
+        start, end = map(int, Range.split("=")[1].split("-"))
+        calls.append(start)
+        if start == 0:
+            return {"Body": _FakeS3Body(bytes(end + 1)), "ContentRange": f"bytes 0-{end}/{size}"}
+        if start == 1024:
+            raise ClientError({"Error": {"Code": "AccessDenied"}}, "GetObject")
+        # 나머지 구간은 진행 중이다가 재시도 가능한 오류로 끊깁니다.
+        await release.wait()
+        raise ConnectionClosedError(endpoint_url="s3://test-bucket/test-key.epub")
+
+    mock_s3 = MagicMock()
+    mock_s3.get_object = get_object
+    mocker.patch("app.infrastructure.storage.s3_client._backoff_delay", return_value=0)
+
+    client = S3Client(s3_client=mock_s3, parallel_reads=3, min_part_size=1024)
+    with pytest.raises(ExternalServiceError):
+        await client.get_object_bytes(bucket="test-bucket", key="test-key.epub")
+    calls_at_failure = len(calls)
+
+    release.set()
+    for _ in range(10):
+        await asyncio.sleep(0)
+    assert len(calls) == calls_at_failure
+
+
+def test_keepalive_session_applies_socket_options():
+    """botocore가 계산한 socket_options와 짧은 keep-alive 주기가 새 소켓에 적용되는지 테스트합니다."""
+    import socket
+    session = KeepAliveAIOHTTPSession(socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)])
+    socket_factory = session._connector_args.get("socket_factory")
+    if socket_factory is None:
+        pytest.skip("이 aiohttp 버전은 socket_factory를 지원하지 않습니다.")
+
+    sock = socket_factory((socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", ("127.0.0.1", 443)))
+    try:
+        assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+        assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE) == TCP_KEEPIDLE
+    finally:
+        sock.close()
+
+# --- File Logger Test ---
+async def test_file_logger_appends_events_and_folds_final_state(tmp_path):
+    """FileLogger가 생성/갱신을 한 줄씩 덧붙이고, load_log가 최종 상태를 복원하는지 테스트합니다."""
+    file_logger = FileLogger(log_dir=str(tmp_path))
+    log = UndrmLog(
+        tenant_id="pytest-tenant", itemId="12345", s3_bucket="b", s3_key="k", grant_id="N/A",
+        reason="test", status="PROCESSING", undrm_start_time="2024-01-01T00:00:00Z",
+    )
+    event_id = await file_logger.create_log(log)
+    await file_logger.update_log(event_id, "FAILURE", "2024-01-01T00:00:05Z", failure_reason="boom")
+
+    with open(tmp_path / f"{event_id}.ndjson", encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+    state = file_logger.load_log(event_id)
+    assert state["status"] == "FAILURE"
+    assert state["failure_reason"] == "boom"
+    assert state["undrm_end_time"] == "2024-01-01T00:00:05Z"
+    assert state["itemId"] == "12345"
+
+
+# --- DynamoDB Logger Test ---
+async def test_dynamodb_logger_update_waits_for_background_create():
+    """create_log는 즉시 반환하고, update_log는 선행 put_item이 끝난 뒤에 수행되는지 테스트합니다."""
+    calls = []
+    put_started = asyncio.Event()
+    release_put = asyncio.Event()
+
+    async def batch_write_item(RequestItems):
+        (requests,) = RequestItems.values()
+        item = requests[0]["PutRequest"]["Item"]
+        assert item["event_id"] == {"S": log_entry.event_id}
+        assert item["failure_reason"] == {"NULL": True}
+        put_started.set()
+        await release_put.wait()
+        calls.append("put")
+        return {"UnprocessedItems": {}}
+
+    async def update_item(**kwargs):
+        assert kwargs["Key"] == {"event_id": {"S": log_entry.event_id}}
+        assert kwargs["ExpressionAttributeValues"][":status"] == {"S": "SUCCESS"}
+        calls.append("update")
+
+    client = MagicMock()
+    client.batch_write_item = batch_write_item
+    client.update_item = update_item
+    db_logger = DynamoDBLogger(client=client, table_name="audit-log-test")
+
+    log_entry = UndrmLog(
+        tenant_id="t", itemId="12345", grant_id="N/A", s3_bucket="b", s3_key="k",
+        reason="test", status="PROCESSING", undrm_start_time="2024-01-01T00:00:00+00:00",
+    )
+    event_id = await db_logger.create_log(log_entry)
+    assert event_id == log_entry.event_id
+
+    await put_started.wait()
+    update = asyncio.create_task(db_logger.update_log(event_id=event_id, status="SUCCESS", end_time="now"))
+    await asyncio.sleep(0)
+    assert calls == []
+
+    release_put.set()
+    await update
+    assert calls == ["put", "update"]
+
+async def test_dynamodb_logger_batches_creates_and_retries_unprocessed():
+    """동시에 생성된 감사 로그가 BatchWriteItem 한 번으로 묶이고, 미처리 항목은 다시 보내는지 테스트합니다."""
+    sent = []
+
+    async def batch_write_item(RequestItems):
+        (requests,) = RequestItems.values()
+        sent.append(len(requests))
+        # 첫 호출에서는 마지막 항목을 미처리로 돌려줍니다.
+        return {"UnprocessedItems": {"audit-log-test": requests[-1:]} if len(sent) == 1 else {}}
+
+    client = MagicMock()
+    client.batch_write_item = batch_write_item
+
+    logs = [
+        UndrmLog(tenant_id="t", itemId="12345", grant_id="N/A", s3_bucket="b", s3_key="k",
+                 reason="test", status="SUCCESS", undrm_start_time="2024-01-01T00:00:00+00:00")
+        for _ in range(3)
+    ]
+    for log in logs:
+        await DynamoDBLogger(client=client, table_name="audit-log-test").create_log(log)
+    await drain_pending_logs()
+    assert sent == [3, 1]
+
+
+async def test_dynamodb_logger_uses_new_client_after_drain():
+    """drain 이후(lifespan 재시작) 같은 테이블에 새 클라이언트로 쓰면 닫힌 이전 클라이언트가 아닌 새 클라이언트로 보내는지 테스트합니다."""
+    sent = {"old": 0, "new": 0}
+
+    def make_client(name):
+        async def batch_write_item(RequestItems):
+            (requests,) = RequestItems.values()
+            sent[name] += len(requests)
+            return {"UnprocessedItems": {}}
+        client = MagicMock()
+        client.batch_write_item = batch_write_item
+        return client
+
+    def new_log():
+        return UndrmLog(tenant_id="t", itemId="12345", grant_id="N/A", s3_bucket="b", s3_key="k",
+                        reason="test", status="SUCCESS", undrm_start_time="2024-01-01T00:00:00+00:00")
+
+    old_client, new_client = make_client("old"), make_client("new")
+    await DynamoDBLogger(client=old_client, table_name="audit-log-test").create_log(new_log())
+    await drain_pending_logs()
+    await DynamoDBLogger(client=new_client, table_name="audit-log-test").create_log(new_log())
+    await drain_pending_logs()
+    assert sent == {"old": 1, "new": 1}
+
+
+def test_enable_idle_ping_pings_only_idle_connections(mocker):
+    """enable_idle_ping이 idle_seconds 넘게 풀에서 쉬었던 커넥션만 체크아웃 시 핑하는지 테스트합니다."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import QueuePool
+    from app.infrastructure.db_pool import enable_idle_ping
+
+    engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=1)
+    enable_idle_ping(engine, idle_seconds=60)
+    do_ping = mocker.patch.object(engine.dialect, "do_ping", return_value=True)
+    clock = mocker.patch("app.infrastructure.db_pool.time.monotonic", return_value=1000.0)
+
+    engine.connect().close()   # 새 커넥션: 핑 없음
+    engine.connect().close()   # 방금 반납된 커넥션: 핑 없음
+    assert do_ping.call_count == 0
+
+    clock.return_value = 1100.0  # 60초 넘게 유휴
+    engine.connect().close()
+    assert do_ping.call_count == 1
+    engine.dispose()
+
+
+async def test_prewarm_db_pool_returns_all_connections_when_one_probe_fails():
+    """사전 준비 중 커넥션 하나가 실패해도 나머지 커넥션이 모두 연결을 마친 뒤 풀에 반납되는지 테스트합니다."""
+    from contextlib import asynccontextmanager
+    from app.lifespan import _prewarm_db_pool
+
+    checked_out, returned = [], []
+    pool = MagicMock()
+    pool.checkedout.side_effect = lambda: len(checked_out)
+    attempts = []
+
+    @asynccontextmanager
+    async def connect():
+        attempts.append(None)
+        if len(attempts) == 1:
+            raise ConnectionError("connection refused")
+        await asyncio.sleep(0.01)  # 실패보다 늦게 연결이 끝나는 커넥션
+        conn = MagicMock()
+        conn.execute = AsyncMock()
+        checked_out.append(conn)
+        try:
+            yield conn
+        finally:
+            checked_out.remove(conn)
+            returned.append(conn)
+
+    engine = MagicMock(pool=pool, connect=connect)
+    await _prewarm_db_pool(engine, 4)
+    # 반환 시점에 늦게 끝난 커넥션까지 모두 스택을 통해 반납되어 있어야 합니다.
+    assert len(returned) == 3
+    assert pool.checkedout() == 0